@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 各模組以 程式碼/ 為匯入路徑（與直接執行腳本時相同）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), '程式碼'))
@@ -0,0 +1,13 @@
+import matplotlib
+import numpy as np
+
+import chart_spec
+
+
+def test_label_path_follows_configured_font():
+    with matplotlib.rc_context({'font.sans-serif': ['DejaVu Sans']}):
+        sans = chart_spec._label_path('123', 8, 'sans-serif', 2)
+    with matplotlib.rc_context({'font.sans-serif': ['DejaVu Serif']}):
+        serif = chart_spec._label_path('123', 8, 'sans-serif', 2)
+    assert sans.vertices.shape != serif.vertices.shape or not np.allclose(sans.vertices,
+                                                                          serif.vertices)
@@ -0,0 +1,18 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+import choropleth
+import geo_index
+from incident_cube import IncidentCube, SLOT_COUNTY
+
+
+def test_unmatched_township_is_nan():
+    counts = np.ones((1, 1, 13, len(SLOT_COUNTY)), dtype=np.int32)
+    cube = IncidentCube(counts, ['住宅竊盜'], [112])
+    known = geo_index.children(63000)[0]
+    layer = SimpleNamespace(codes=np.array([known, 99999999]),
+                            store={'county_code': np.array([63000, 63000])})
+    values = choropleth.township_values(cube, layer)
+    assert values[0] == 13
+    assert np.isnan(values[1])
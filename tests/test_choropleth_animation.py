@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import incident_cube
+from choropleth_animation import ChoroplethAnimation, cube_frames
+from incident_cube import IncidentCube, SLOT_COUNTY
+
+
+@pytest.fixture
+def cube():
+    counts = np.ones((1, 2, 13, len(SLOT_COUNTY)), dtype=np.int32)
+    return IncidentCube(counts, ['住宅竊盜'], [111, 112])
+
+
+@pytest.mark.parametrize('path', ['out.avi', 'out', 'out.GIF.png'])
+def test_unsupported_format_raises_value_error(path):
+    animation = ChoroplethAnimation.__new__(ChoroplethAnimation)
+    with pytest.raises(ValueError, match='.gif'):
+        animation.save(path)
+    with pytest.raises(ValueError, match='.mp4'):
+        animation.save_video(path)
+
+
+def test_cube_frames_county_filter(cube):
+    layer = SimpleNamespace(store={}, bind=lambda values: values)
+    frames = cube_frames(cube, layer, county='臺北市')
+    assert [label for label, _ in frames] == ['111年', '112年']
+    taipei = incident_cube.COUNTY_NAMES.index('臺北市')
+    values = frames[0][1]
+    assert values[taipei] > 0
+    assert np.isnan(np.delete(values, taipei)).all()
+
+
+def test_cube_frames_rejects_year(cube):
+    with pytest.raises(ValueError):
+        cube_frames(cube, SimpleNamespace(store={}), year=112)
@@ -0,0 +1,15 @@
+import pytest
+
+import cjk_fonts
+
+
+def test_invalid_env_font_falls_back(monkeypatch, tmp_path):
+    monkeypatch.setenv('CJK_FONT', str(tmp_path / 'missing.ttf'))
+    monkeypatch.setattr(cjk_fonts, 'FONT_CACHE_PATH', str(tmp_path / 'cjk_font.json'))
+    monkeypatch.setattr(cjk_fonts, '_discover', lambda: None)
+    cjk_fonts.resolve_font.cache_clear()
+    try:
+        with pytest.warns(UserWarning, match='CJK_FONT'):
+            assert cjk_fonts.resolve_font() is None
+    finally:
+        cjk_fonts.resolve_font.cache_clear()
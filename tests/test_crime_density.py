@@ -0,0 +1,49 @@
+import numpy as np
+
+import crime_density
+from crime_density import DensitySurface
+
+
+def test_cache_key_uses_resolved_params(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_surface(cube, **kwargs):
+        calls.append(kwargs)
+        return DensitySurface(np.zeros((2, 2)), (0, 1, 0, 1))
+
+    monkeypatch.setattr(crime_density, 'DENSITY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(crime_density, 'density_surface', fake_surface)
+    monkeypatch.setattr(crime_density.boundary_store, 'load_store',
+                        lambda path: {'meta': {'sha1': 'store'}})
+    cube = type('Cube', (), {'key': {'112': {'sha1': 'cube'}}})()
+
+    first = crime_density.load_surface(cube, 112, '住宅竊盜')
+    # 與預設值相同（型別不同）的參數沿用同一份快取
+    again = crime_density.load_surface(cube, 112, '住宅竊盜', bandwidth_km=5, cell_km=1,
+                                       adaptive=1)
+    assert len(calls) == 1
+    assert again.key == first.key
+    assert first.key['params'] == {'bandwidth_km': 5.0, 'cell_km': 1.0, 'adaptive': True}
+
+    crime_density.load_surface(cube, 112, '住宅竊盜', bandwidth_km=3)
+    assert len(calls) == 2
+
+
+def test_different_params_use_separate_files(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_surface(cube, **kwargs):
+        calls.append(kwargs)
+        return DensitySurface(np.zeros((2, 2)), (0, 1, 0, 1))
+
+    monkeypatch.setattr(crime_density, 'DENSITY_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(crime_density, 'density_surface', fake_surface)
+    monkeypatch.setattr(crime_density.boundary_store, 'load_store',
+                        lambda path: {'meta': {'sha1': 'store'}})
+    cube = type('Cube', (), {'key': {'112': {'sha1': 'cube'}}})()
+
+    for _ in range(2):
+        crime_density.load_surface(cube, 112, '住宅竊盜', bandwidth_km=3)
+        crime_density.load_surface(cube, 112, '住宅竊盜', bandwidth_km=8)
+    assert len(calls) == 2
+    assert len(list(tmp_path.iterdir())) == 2
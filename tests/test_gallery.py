@@ -0,0 +1,17 @@
+import os
+
+import boundary_store
+import gallery
+
+
+def test_registered_inputs_exist():
+    missing = {path for c in gallery.CHARTS for path in gallery.missing_inputs(c)}
+    # 邊界檔需以 boundary_store.py build 建立後提交（建檔需要連網）
+    if not os.path.exists(boundary_store.STORE_PATH):
+        missing.discard(gallery.COUNTY_STORE)
+    assert missing == set()
+
+
+def test_missing_inputs_reports_unresolved_paths():
+    chart = gallery.Chart('x', 'y', inputs=['不存在.csv', '年度犯罪資料/*.zzz', '竊盜統計2V.csv'])
+    assert gallery.missing_inputs(chart) == ['不存在.csv', '年度犯罪資料/*.zzz']
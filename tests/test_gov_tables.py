@@ -0,0 +1,29 @@
+import gov_tables
+from gov_tables import TableSchema
+
+CSV = """表3　竊盜統計,,,,
+,,,,
+機關別,,總計,,
+,,發生數,破獲數,破獲率
+新北市,,"6,031","6,030",99.98
+署所屬機關,,722,565,    －
+資料來源：各級警察機關偵辦刑案紀錄表。,,,,Source: The Record of Criminal Cases.
+"""
+
+
+def test_parse_skips_merged_columns_and_footnotes(tmp_path):
+    path = tmp_path / 'table.csv'
+    path.write_text(CSV, encoding='utf-8')
+    schema = TableSchema(file=str(path), data_start=4, usecols=[0, 2, 3, 4],
+                         columns=['機關別', '發生數', '破獲數', '破獲率'], text_columns=['機關別'],
+                         drop={'機關別': ['署所屬機關']})
+    df = gov_tables.parse(schema)
+    assert df['機關別'].tolist() == ['新北市']
+    assert df['發生數'].tolist() == [6031.0]
+    assert df['破獲率'].tolist() == [99.98]
+
+
+def test_larceny_schema_matches_source():
+    df = gov_tables.load('竊盜統計2', use_cache=False)
+    assert len(df) == 22 and '署所屬機關' not in df['機關別'].tolist()
+    assert df.loc[df['機關別'] == '新北市', '總計_發生數'].item() == 6031
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import incident_cube
+from incident_cube import IncidentCube, SLOT_COUNTY
+
+
+@pytest.fixture
+def cube():
+    rng = np.random.default_rng(0)
+    types = ['住宅竊盜', '機車竊盜']
+    years = [104, 105]
+    counts = rng.integers(0, 5, (len(types), len(years), 13, len(SLOT_COUNTY)))
+    return IncidentCube(counts.astype(np.int32), types, years)
+
+
+def test_query_known_values(cube):
+    assert cube.query(type='機車竊盜', year=105) == int(cube.counts[1, 1].sum())
+    assert cube.query(county='臺北市') == int(cube.county_counts[..., incident_cube._county_index('臺北市')].sum())
+
+
+def test_unknown_type_raises(cube):
+    with pytest.raises(KeyError):
+        cube.query(type='機車竊盜x')
+    with pytest.raises(KeyError):
+        cube.labels('type', type='不存在')
+
+
+@pytest.mark.parametrize('year', [103, 114, [104, 106]])
+def test_unknown_year_raises(cube, year):
+    with pytest.raises(KeyError):
+        cube.query(year=year)
+    with pytest.raises(KeyError):
+        cube.query_series('year', year=year)
+
+
+def test_unknown_county_raises(cube):
+    with pytest.raises(KeyError):
+        cube.query(county='不存在縣')
+    with pytest.raises(KeyError):
+        cube.query(by=['township'], county='不存在縣')
+    # 「未知」仍可明確查詢無法辨識縣市的槽位
+    assert cube.query(county='未知') == int(cube.county_counts[..., -1].sum())
+
+
+def test_unknown_month_raises(cube):
+    with pytest.raises(KeyError):
+        cube.query(month=13)
@@ -0,0 +1,21 @@
+import numpy as np
+
+import incident_data
+
+CSV = """﻿type,oc_year,oc_data,oc_county,oc_region
+案類,發生年,發生日期,發生縣市,發生鄉鎮市區
+機車竊盜,110,101,臺北市,中正區
+汽車竊盜,110,1227,新北市,板橋區
+,,,,
+說明 : 機車竊盜案件因發生地在路界、縣界等區域或報案,,,,
+          人提供失竊地點不明確時，發生地僅顯示縣、市。,,,,
+"""
+
+
+def test_csv_drops_trailing_footnote(tmp_path):
+    path = tmp_path / '110年度犯罪資料全.csv'
+    path.write_text(CSV, encoding='utf-8')
+    df = incident_data.read_incident_csv(str(path))
+    assert df['type'].tolist() == ['機車竊盜', '汽車竊盜']
+    assert (df['oc_year'] == 110).all()
+    assert df['oc_year'].dtype == np.int16
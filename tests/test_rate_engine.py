@@ -0,0 +1,49 @@
+import warnings
+
+import numpy as np
+import pytest
+
+import incident_cube
+from rate_engine import _parse_population
+
+MIXED = """縣市名稱,鄉鎮市區名稱,人口數
+臺北市,,"300"
+臺北市,松山區,"100"
+臺北市,大安區,"200"
+嘉義市,,"50"
+"""
+
+
+def test_county_subtotal_not_double_counted():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        population = _parse_population(MIXED)
+    assert population.sum() == 350
+    taipei = incident_cube.COUNTY_NAMES.index('臺北市')
+    unspecified = (incident_cube.SLOT_COUNTY == taipei) & (incident_cube.SLOT_TOWNSHIP < 0)
+    assert unspecified.sum() == 1 and population[unspecified].sum() == 0
+    # 只有縣市層級的人口時仍歸到「未註明鄉鎮」
+    chiayi = incident_cube.COUNTY_NAMES.index('嘉義市')
+    assert population[incident_cube.SLOT_COUNTY == chiayi].sum() == 50
+
+
+def test_inconsistent_subtotal_warns():
+    with pytest.warns(UserWarning, match='不一致'):
+        population = _parse_population(MIXED.replace('"300"', '"999"'))
+    assert population.sum() == 350
+
+
+def test_years_without_population_are_left_out():
+    from incident_cube import IncidentCube, SLOT_COUNTY
+    from rate_engine import Population, RateEngine
+
+    counts = np.ones((1, 3, 13, len(SLOT_COUNTY)), dtype=np.int32)
+    cube = IncidentCube(counts, ['住宅竊盜'], [110, 111, 112])
+    population = Population([112], np.full((1, len(SLOT_COUNTY)), 1000.0))
+    engine = RateEngine(cube, population)
+
+    overall = engine.rates(by='county')
+    only_112 = engine.rates(by='county', year=112)
+    np.testing.assert_allclose(overall['rate'], only_112['rate'])
+    with pytest.raises(ValueError, match='110'):
+        engine.rates(year=[110, 112])
@@ -0,0 +1,72 @@
+import numpy as np
+
+from spatial_stats import SpatialWeights, getis_ord_gi_star, hotspots, local_morans_i
+
+
+def grid_weights(size):
+    """size × size 格網的 queen 相鄰矩陣（稠密與 CSR）"""
+    n = size * size
+    dense = np.zeros((n, n))
+    for i in range(n):
+        r, c = divmod(i, size)
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                rr, cc = r + dr, c + dc
+                if (dr or dc) and 0 <= rr < size and 0 <= cc < size:
+                    dense[i, rr * size + cc] = 1
+    rows, cols = np.nonzero(dense)
+    indptr = np.searchsorted(rows, np.arange(n + 1))
+    return dense, SpatialWeights(indptr, cols)
+
+
+def test_statistics_match_brute_force():
+    dense, w = grid_weights(5)
+    x = np.random.default_rng(1).poisson(4, 25).astype(float)
+    n = len(x)
+
+    wi = dense + np.eye(n)
+    weight = wi.sum(axis=1)
+    s = x.std()
+    expected_gi = (wi @ x - x.mean() * weight) / (
+        s * np.sqrt((n * weight - weight ** 2) / (n - 1)))
+    np.testing.assert_allclose(getis_ord_gi_star(x, w), expected_gi)
+
+    z = x - x.mean()
+    standardized = dense / dense.sum(axis=1, keepdims=True)
+    expected_moran = z / (z ** 2).mean() * (standardized @ z)
+    np.testing.assert_allclose(local_morans_i(x, w), expected_moran)
+
+
+def test_constant_slice_is_not_significant():
+    _, w = grid_weights(5)
+    for value in (0.0, 3.0):
+        result = hotspots(np.full(25, value), w, permutations=99)
+        assert np.isnan(result['gi_p']).all()
+        assert np.isnan(result['moran_p']).all()
+        assert (result['quadrant'] == 0).all()
+        assert (result['hotspot'] == 0).all()
+
+
+def test_missing_values_are_masked():
+    _, w = grid_weights(5)
+    x = np.random.default_rng(2).poisson(4, 25).astype(float)
+    missing = np.zeros(25, dtype=bool)
+    missing[[0, 7, 24]] = True
+    x_masked = np.where(missing, np.nan, x)
+
+    result = hotspots(x_masked, w, permutations=99)
+    expected = hotspots(x[~missing], w.subset(~missing), permutations=99)
+    assert np.isnan(result['gi'][missing]).all()
+    assert (result['quadrant'][missing] == 0).all()
+    np.testing.assert_allclose(result['gi'][~missing], expected['gi'])
+    np.testing.assert_allclose(result['moran_p'][~missing], expected['moran_p'])
+
+
+def test_subset_keeps_edges_between_kept_regions():
+    dense, w = grid_weights(4)
+    keep = np.ones(16, dtype=bool)
+    keep[[1, 6, 15]] = False
+    sub = w.subset(keep)
+    rebuilt = np.zeros((sub.n, sub.n))
+    rebuilt[sub.rows, sub.indices] = 1
+    np.testing.assert_array_equal(rebuilt, dense[keep][:, keep])
@@ -0,0 +1,9 @@
+from vector_tiles import _fields
+
+
+def test_fields_are_union_over_features():
+    properties = [{'code': 1, 'name': '甲'},
+                  {'code': 2, 'name': '乙', '112_竊盜': 3},
+                  {'code': 3, 'name': '丙', '112_總計': 4.5}]
+    assert _fields(properties) == {'code': 'Number', 'name': 'String',
+                                   '112_竊盜': 'Number', '112_總計': 'Number'}
@@ -4,11 +4,11 @@ import seaborn as sns
 import numpy as np
 from matplotlib import font_manager
 import warnings
+import cjk_fonts
 warnings.filterwarnings('ignore')
 
 # 設置中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 直接在程式碼中定義數據（修正版本）
 crime_data = [
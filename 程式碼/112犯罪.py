@@ -3,63 +3,25 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
-import requests
+import boundary_store
+from geo_index import english_mapping
+import gov_tables
 
-# Load and clean the crime data
-df = pd.read_csv("行政區犯罪人口率統計/104年行政區犯罪人口率統計_縣市.csv", skiprows=1, encoding='big5')
-# Clean data
-df = df.rename(columns={
+# Load the crime data (行政區犯罪人口率統計V, parsed once by gov_tables)
+rates = gov_tables.county_rates().to_frame()
+df = rates[rates['year'] == 104].rename(columns={
     '縣市名稱': 'County',
     '犯罪人口率': 'Crime_Rate'
 })
-# Convert crime rate to numeric
-df['Crime_Rate'] = pd.to_numeric(df['Crime_Rate'], errors='coerce')
 df = df.dropna()
-# Create county name mapping for GeoJSON matching
-county_mapping = {
-    '新北市': 'New Taipei City',
-    '臺北市': 'Taipei City',
-    '台北市': 'Taipei City',
-    '桃園市': 'Taoyuan City',
-    '臺中市': 'Taichung City',
-    '台中市': 'Taichung City',
-    '臺南市': 'Tainan City',
-    '台南市': 'Tainan City',
-    '高雄市': 'Kaohsiung City',
-    '宜蘭縣': 'Yilan County',
-    '新竹縣': 'Hsinchu County',
-    '苗栗縣': 'Miaoli County',
-    '彰化縣': 'Changhua County',
-    '南投縣': 'Nantou County',
-    '雲林縣': 'Yunlin County',
-    '嘉義縣': 'Chiayi County',
-    '屏東縣': 'Pingtung County',
-    '臺東縣': 'Taitung County',
-    '台東縣': 'Taitung County',
-    '花蓮縣': 'Hualien County',
-    '澎湖縣': 'Penghu County',
-    '基隆市': 'Keelung City',
-    '新竹市': 'Hsinchu City',
-    '嘉義市': 'Chiayi City',
-    '金門縣': 'Kinmen County',
-    '連江縣': 'Lienchiang County'
-}
 
-# Map county names to English
-df['County_English'] = df['County'].map(county_mapping)
-
-# Load Taiwan GeoJSON data
-geojson_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson"
+# Map county names to English (shared canonical county index)
+df['County_English'] = df['County'].map(english_mapping())
 
 try:
-    # Try to load GeoJSON from URL
-    response = requests.get(geojson_url)
-    taiwan_geojson = response.json()
-    
-    # Fix Taoyuan County -> Taoyuan City in GeoJSON
-    for feature in taiwan_geojson['features']:
-        if feature['properties']['name'] == 'Taoyuan County':
-            feature['properties']['name'] = 'Taoyuan City'
+    # Load Taiwan GeoJSON from the local boundary store (names already canonical),
+    # simplified to the 1000px-wide figure below to keep the HTML small
+    taiwan_geojson = boundary_store.to_geojson(pixels=1000)
     # Create the choropleth map
     fig = px.choropleth(
         df,
@@ -163,7 +125,7 @@ try:
     
     print("=" * 60)
 
-except requests.RequestException:
+except FileNotFoundError:
     print("無法載入地理資料，改用替代方案...")
     
     # Alternative: Create a horizontal bar chart if GeoJSON fails
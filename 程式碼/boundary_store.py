@@ -0,0 +1,548 @@
+"""
+本地的臺灣縣市／鄉鎮市區邊界資料
+
+地圖程式原本每次執行都從 click_that_hood 下載 taiwan.geojson 再解析。
+這裡將它預先轉成版本化的二進位檔（地圖資料/taiwan_counties_v3.npz），
+座標與各層偏移量以 GeoArrow 的排列方式存成 NumPy 陣列，並附上
+geo_index 的縣市代碼，載入時不需網路，也不需再解析 JSON。
+
+    gdf = boundary_store.load_counties()      # GeoDataFrame（name, county, county_code, geometry）
+    geojson = boundary_store.to_geojson()     # 給 plotly 使用的 FeatureCollection
+
+邊界檔同時保存數個簡化程度（LOD）。簡化以「弧段」為單位：相鄰縣市
+共用的邊界只簡化一次，兩側得到完全相同的頂點，不會出現縫隙或重疊。
+傳入輸出的 figsize／dpi（或像素寬度）時，會自動選用在該解析度下
+看不出差異的最粗層級：
+
+    gdf = boundary_store.load_counties(figsize=(18, 12), dpi=100)
+
+鄉鎮市區邊界另存於 taiwan_townships_v3.npz，附 geo_index 的鄉鎮代碼，
+供鄉鎮層級的面量圖使用（load_townships()）。
+
+兩個邊界檔都存有各列在 geo_index.COUNTIES 中的位置（county_index），
+統計值對應到地圖只需一次陣列索引，不必合併 DataFrame：
+
+    gdf['rate'] = boundary_store.bind(rates, codes=county_codes)
+
+各區域的標籤位置（label_points()，保證落在區域內）也在建檔時算好。
+
+邊界檔隨專案一起提交，繪圖與批次輸出（例如沒有對外網路的繪圖行程）
+只讀取本地檔案，不會連網。下載來源只在明確的建檔步驟進行，來源更新
+時重新建檔並提交：
+
+    python 程式碼/boundary_store.py build [來源網址或檔案]     # 預設為 GEOJSON_URL
+    python 程式碼/boundary_store.py build-townships [來源網址或檔案]  # 預設為 TOWNSHIP_SOURCE
+
+鄉鎮來源為內政部「鄉鎮市區界線」轉成的 GeoJSON（WGS84），
+以 COUNTYNAME、TOWNNAME 屬性辨識縣市與鄉鎮；預設為 地圖資料/townships.geojson，
+可以環境變數 TOWNSHIP_SOURCE 指定其他檔案或網址。
+"""
+import functools
+import hashlib
+import json
+import os
+import sys
+import urllib.request
+
+import numpy as np
+
+import geo_index
+from incident_data import BASE_DIR
+
+GEOJSON_URL = ("https://raw.githubusercontent.com/codeforgermany/click_that_hood/"
+               "main/public/data/taiwan.geojson")
+
+STORE_VERSION = 3
+STORE_DIR = os.path.join(BASE_DIR, '地圖資料')
+STORE_PATH = os.path.join(STORE_DIR, f'taiwan_counties_v{STORE_VERSION}.npz')
+TOWNSHIP_STORE_PATH = os.path.join(STORE_DIR, f'taiwan_townships_v{STORE_VERSION}.npz')
+# build-townships 未指定來源時使用的檔案或網址
+TOWNSHIP_SOURCE = os.environ.get('TOWNSHIP_SOURCE') or os.path.join(STORE_DIR, 'townships.geojson')
+# 鄉鎮來源中縣市與鄉鎮名稱的屬性欄位
+TOWNSHIP_FIELDS = ('COUNTYNAME', 'TOWNNAME')
+CRS = 'EPSG:4326'
+
+# 各層級的簡化容許誤差（經緯度），層級 0 為原始資料
+LOD_TOLERANCES = (0.0, 0.0005, 0.002, 0.008)
+
+
+def _read_source(source):
+    if os.path.exists(source):
+        with open(source, 'rb') as f:
+            return f.read()
+    with urllib.request.urlopen(source, timeout=60) as response:
+        return response.read()
+
+
+def _polygons(geometry):
+    """Polygon／MultiPolygon 統一為 [多邊形[環[(x, y), ...]]]"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"不支援的幾何型別: {geometry['type']}")
+
+
+def _douglas_peucker(points, tolerance):
+    """Douglas–Peucker 簡化，保留首尾兩點"""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    stack = [(0, n - 1)]
+    while stack:
+        i, j = stack.pop()
+        if j <= i + 1:
+            continue
+        a, b = points[i], points[j]
+        inner = points[i + 1:j]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            dist = np.hypot(*(inner - a).T)
+        else:
+            dist = np.abs(ab[0] * (inner[:, 1] - a[1]) - ab[1] * (inner[:, 0] - a[0])) / length
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i, k))
+            stack.append((k, j))
+    return points[keep]
+
+
+def _simplify_arc(arc, tolerance, done):
+    """
+    簡化一段弧；同一段弧不論方向都得到相同結果（共用邊界兩側一致）
+    """
+    forward = tuple(arc[0]) < tuple(arc[-1]) or (
+        tuple(arc[0]) == tuple(arc[-1]) and tuple(arc[1]) <= tuple(arc[-2]))
+    canonical = arc if forward else arc[::-1]
+    key = canonical.tobytes()
+    if key not in done:
+        done[key] = _douglas_peucker(canonical, tolerance)
+    result = done[key]
+    return result if forward else result[::-1]
+
+
+def _simplify_ring(ring, owners, tolerance, done):
+    """
+    簡化單一環（首尾相同），回傳簡化後的環；點數不足以成環時回傳 None
+
+    owners[i] 為共用第 i 個頂點的縣市集合；集合改變處為弧段的端點，固定不動。
+    """
+    pts = ring[:-1]
+    n = len(pts)
+    if n < 4:
+        return ring
+    prev = np.roll(np.arange(n), 1)
+    nxt = np.roll(np.arange(n), -1)
+    junction = np.array([owners[i] != owners[prev[i]] or owners[i] != owners[nxt[i]]
+                         or len(owners[i]) > 2 for i in range(n)])
+    if not junction.any():
+        # 沒有共用邊界（例如離島）：以起點與最遠點切成兩段
+        far = int(np.argmax(np.hypot(*(pts - pts[0]).T)))
+        junction[[0, far]] = True
+
+    cuts = np.flatnonzero(junction)
+    pts = np.roll(pts, -cuts[0], axis=0)
+    cuts = np.append(cuts - cuts[0], n)
+    closed = np.vstack([pts, pts[:1]])
+    out = []
+    for i, j in zip(cuts[:-1], cuts[1:]):
+        out.append(_simplify_arc(closed[i:j + 1], tolerance, done)[:-1])
+    out = np.vstack(out)
+    if len(out) < 3:
+        return None
+    return np.vstack([out, out[:1]])
+
+
+def _simplify_level(features, tolerance):
+    """features: [[多邊形[環 ndarray, ...], ...], ...]，回傳同結構的簡化結果"""
+    owners = {}
+    for f, polygons in enumerate(features):
+        for polygon in polygons:
+            for ring in polygon:
+                for point in map(tuple, ring[:-1]):
+                    owners.setdefault(point, set()).add(f)
+
+    done = {}
+    result = []
+    for polygons in features:
+        simplified = []
+        for polygon in polygons:
+            exterior = polygon[0]
+            # 比容許誤差還小的島嶼在此解析度下看不見，直接略過
+            if np.ptp(exterior, axis=0).max() < tolerance:
+                continue
+            rings = []
+            for ring in polygon:
+                new = _simplify_ring(ring, [frozenset(owners[tuple(p)]) for p in ring[:-1]],
+                                     tolerance, done)
+                if new is None:
+                    if not rings:
+                        break
+                    continue
+                rings.append(new)
+            if rings:
+                simplified.append(rings)
+        if not simplified:
+            # 至少保留最大的多邊形
+            simplified = [max(polygons, key=lambda poly: np.ptp(poly[0], axis=0).max())]
+        result.append(simplified)
+    return result
+
+
+def _flatten(features):
+    """轉成 GeoArrow 排列：座標與 環／多邊形／縣市 三層偏移量"""
+    coords, ring_offsets, polygon_offsets, feature_offsets = [], [0], [0], [0]
+    for polygons in features:
+        for polygon in polygons:
+            for ring in polygon:
+                coords.append(ring)
+                ring_offsets.append(ring_offsets[-1] + len(ring))
+            polygon_offsets.append(len(ring_offsets) - 1)
+        feature_offsets.append(len(polygon_offsets) - 1)
+    return {
+        'coords': np.vstack(coords).astype(np.float64),
+        'ring_offsets': np.asarray(ring_offsets, dtype=np.int32),
+        'polygon_offsets': np.asarray(polygon_offsets, dtype=np.int32),
+        'feature_offsets': np.asarray(feature_offsets, dtype=np.int32),
+    }
+
+
+def _feature_polygons(feature):
+    return [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon]
+            for polygon in _polygons(feature['geometry'])]
+
+
+def _label_points(geometry):
+    """
+    各區域的標籤位置：面積最大的多邊形外環的形心
+
+    形心落在外環之外時（例如新月形），改用通過形心的水平線與外環
+    交集中最寬的一段的中點，確保標籤落在區域內。
+    """
+    coords = geometry['coords']
+    ring_offsets = geometry['ring_offsets']
+    polygon_offsets = geometry['polygon_offsets']
+    feature_offsets = geometry['feature_offsets']
+
+    # 以 shoelace 公式一次算出所有環的有號面積與形心
+    x, y = coords[:, 0], coords[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    last = ring_offsets[1:] - 1
+    cross[last] = 0  # 環的最後一點與下一個環不相連
+    starts = ring_offsets[:-1]
+    area = np.add.reduceat(cross, starts) / 2
+    cx = np.add.reduceat((x + x1) * cross, starts) / (6 * np.where(area == 0, 1, area))
+    cy = np.add.reduceat((y + y1) * cross, starts) / (6 * np.where(area == 0, 1, area))
+
+    exterior = polygon_offsets[:-1]
+    points = np.empty((len(feature_offsets) - 1, 2))
+    for f in range(len(points)):
+        polys = np.arange(feature_offsets[f], feature_offsets[f + 1])
+        ring = exterior[polys[np.argmax(np.abs(area[exterior[polys]]))]]
+        pts = coords[ring_offsets[ring]:ring_offsets[ring + 1]]
+        px, py = cx[ring], cy[ring]
+        if area[ring] == 0 or not _contains(pts, px, py):
+            px = _scanline_midpoint(pts, py)
+        points[f] = px, py
+    return points
+
+
+def _crossings(ring, py):
+    """水平線 y = py 與環各邊的交點 x 座標（排序後）"""
+    a, b = ring[:-1], ring[1:]
+    hit = (a[:, 1] > py) != (b[:, 1] > py)
+    a, b = a[hit], b[hit]
+    return np.sort(a[:, 0] + (py - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1]))
+
+
+def _contains(ring, px, py):
+    xs = _crossings(ring, py)
+    return np.count_nonzero(xs < px) % 2 == 1
+
+
+def _scanline_midpoint(ring, py):
+    xs = _crossings(ring, py)
+    if len(xs) < 2:
+        return ring[:, 0].mean()
+    widths = xs[1::2] - xs[0::2]
+    i = int(np.argmax(widths))
+    return (xs[2 * i] + xs[2 * i + 1]) / 2
+
+
+def _write_store(path, source, raw, features, tolerances, **columns):
+    """將各簡化層級與屬性欄位寫成 .npz（先寫暫存檔再替換）"""
+    arrays = {}
+    for level, tolerance in enumerate(tolerances):
+        simplified = features if tolerance == 0 else _simplify_level(features, tolerance)
+        for key, value in _flatten(simplified).items():
+            arrays[f'{key}_{level}'] = value
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}.npz'
+    np.savez(tmp,
+             tolerances=np.asarray(tolerances, dtype=np.float64),
+             label_points=_label_points(_level_arrays(arrays)),
+             meta=json.dumps({'version': STORE_VERSION, 'source': source,
+                              'sha1': hashlib.sha1(raw).hexdigest(), 'crs': CRS}),
+             **columns, **arrays)
+    os.replace(tmp, path)
+    load_store.cache_clear()
+    _geojson_text.cache_clear()
+
+
+def _level_arrays(arrays, level=0):
+    """由寫檔用的扁平字典取出某層級的幾何陣列"""
+    return {key: arrays[f'{key}_{level}']
+            for key in ('coords', 'ring_offsets', 'polygon_offsets', 'feature_offsets')}
+
+
+def build_store(source=GEOJSON_URL, path=STORE_PATH, tolerances=LOD_TOLERANCES):
+    """由 GeoJSON（網址或檔案）建立縣市邊界檔（含各簡化層級），回傳縣市數"""
+    raw = _read_source(source)
+    geojson = json.loads(raw)
+
+    features, names, codes = [], [], []
+    for feature in geojson['features']:
+        # 原始資料的名稱可能帶有換行（Taitung County）或舊名（Taoyuan County），
+        # 一律存成 geo_index 的標準英文名稱
+        name = feature['properties']['name'].strip()
+        code = geo_index.county_code(name)
+        if code == geo_index.UNKNOWN:
+            raise KeyError(f"無法辨識的縣市名稱: {name}")
+        names.append(geo_index.county_english(code))
+        codes.append(code)
+        features.append(_feature_polygons(feature))
+
+    _write_store(path, source, raw, features, tolerances,
+                 county_code=np.asarray(codes, dtype=np.int32),
+                 county_index=geo_index.county_positions(codes),
+                 name=np.asarray(names, dtype=str))
+    return len(features)
+
+
+def build_township_store(source, path=TOWNSHIP_STORE_PATH, fields=TOWNSHIP_FIELDS,
+                         tolerances=LOD_TOLERANCES):
+    """由鄉鎮市區 GeoJSON 建立鄉鎮邊界檔，回傳鄉鎮數"""
+    raw = _read_source(source)
+    geojson = json.loads(raw)
+    county_field, town_field = fields
+
+    features, names, codes, unknown = [], [], [], []
+    for feature in geojson['features']:
+        props = feature['properties']
+        county, town = props[county_field].strip(), props[town_field].strip()
+        code = geo_index.township_code(county, town)
+        if code == geo_index.UNKNOWN:
+            unknown.append(f'{county}{town}')
+            continue
+        names.append(geo_index.township_name(code)[1])
+        codes.append(code)
+        features.append(_feature_polygons(feature))
+    if unknown:
+        raise KeyError(f"無法辨識的鄉鎮名稱: {', '.join(unknown)}")
+
+    codes = np.asarray(codes, dtype=np.int32)
+    county_codes = np.array([geo_index.county_of(c) for c in codes], dtype=np.int32)
+    _write_store(path, source, raw, features, tolerances,
+                 township_code=codes,
+                 county_code=county_codes,
+                 county_index=geo_index.county_positions(county_codes),
+                 name=np.asarray(names, dtype=str))
+    return len(features)
+
+
+def _ensure_store(path):
+    """邊界檔不存在時說明如何建立；讀取時不會下載"""
+    if os.path.exists(path):
+        return
+    if path == STORE_PATH:
+        raise FileNotFoundError(
+            f"找不到邊界檔 {path}；請在可連網的環境執行 python 程式碼/boundary_store.py build "
+            f"（或指定本地的 GeoJSON 檔）並提交產生的檔案")
+    elif path == TOWNSHIP_STORE_PATH:
+        raise FileNotFoundError(
+            f"找不到邊界檔 {path}；請執行 python 程式碼/boundary_store.py build-townships "
+            f"[來源]（預設來源為 {TOWNSHIP_SOURCE}）並提交產生的檔案")
+    else:
+        raise FileNotFoundError(f"找不到邊界檔 {path}")
+
+
+@functools.lru_cache(maxsize=None)
+def load_store(path=STORE_PATH):
+    """讀取邊界檔的所有陣列（同一行程內只讀一次）"""
+    _ensure_store(path)
+    with np.load(path) as data:
+        store = {key: data[key] for key in data.files}
+    meta = json.loads(str(store.pop('meta')))
+    if meta['version'] != STORE_VERSION:
+        raise ValueError(f"邊界檔版本 {meta['version']} 與程式 ({STORE_VERSION}) 不符")
+    store['meta'] = meta
+    store['levels'] = [
+        {key: store.pop(f'{key}_{level}')
+         for key in ('coords', 'ring_offsets', 'polygon_offsets', 'feature_offsets')}
+        for level in range(len(store['tolerances']))]
+    coords = store['levels'][0]['coords']
+    store['bounds'] = np.concatenate([coords.min(axis=0), coords.max(axis=0)])
+    if 'label_points' not in store:
+        store['label_points'] = _label_points(store['levels'][0])
+    return store
+
+
+def label_points(path=STORE_PATH):
+    """各區域的標籤位置（n × 2 陣列，與邊界列同順序；建檔時預先算好）"""
+    return load_store(path)['label_points']
+
+
+def bind(values, codes=None, path=STORE_PATH):
+    """
+    將各縣市的統計值排成與邊界列相同的順序（float64，無資料為 NaN）
+
+    codes 省略時，values 須依 geo_index.COUNTIES 的順序排列，結果只是一次
+    np.take；否則 codes 為各值的縣市代碼。鄉鎮邊界檔得到的是所屬縣市的值。
+    """
+    rows = load_store(path)['county_index']
+    values = np.asarray(values, dtype=np.float64)
+    if codes is not None:
+        positions = geo_index.county_positions(codes)
+        # 無法辨識的代碼（-1）寫到最後一格，之後丟掉
+        ordered = np.full(len(geo_index.COUNTIES) + 1, np.nan)
+        ordered[positions] = values
+        values = ordered[:-1]
+    # 邊界列的位置為 -1 時取到最後補上的 NaN
+    values = np.append(values, np.nan)
+    return np.take(values, rows)
+
+
+def pick_level(pixels, path=STORE_PATH):
+    """
+    依輸出時地圖的像素寬度（長邊）選擇層級
+
+    選擇容許誤差不超過一個像素的最粗層級，簡化的差異在輸出中看不出來。
+    """
+    store = load_store(path)
+    minx, miny, maxx, maxy = store['bounds']
+    pixel = max(maxx - minx, maxy - miny) / pixels
+    return int(np.flatnonzero(store['tolerances'] <= pixel)[-1])
+
+
+def figure_pixels(figsize, dpi=None, fraction=1.0):
+    """figsize（英吋）與 dpi 換算成地圖的像素寬度；fraction 為地圖佔圖面的比例"""
+    if dpi is None:
+        import matplotlib.pyplot as plt
+        dpi = plt.rcParams['savefig.dpi']
+        if dpi == 'figure':
+            dpi = plt.rcParams['figure.dpi']
+    return max(figsize) * dpi * fraction
+
+
+def _resolve_level(path, level, figsize, dpi, fraction, pixels):
+    if level is not None:
+        return level
+    if figsize is not None:
+        pixels = figure_pixels(figsize, dpi, fraction)
+    return 0 if pixels is None else pick_level(pixels, path)
+
+
+def _rings(geometry, feature):
+    """依序產生某縣市的（多邊形序號, 環座標）"""
+    p0, p1 = geometry['feature_offsets'][feature:feature + 2]
+    for p in range(p0, p1):
+        r0, r1 = geometry['polygon_offsets'][p:p + 2]
+        for r in range(r0, r1):
+            c0, c1 = geometry['ring_offsets'][r:r + 2]
+            yield p, geometry['coords'][c0:c1]
+
+
+def _geometries(store, level):
+    import shapely
+
+    geometry = store['levels'][level]
+    return shapely.from_ragged_array(
+        shapely.GeometryType.MULTIPOLYGON, geometry['coords'],
+        (geometry['ring_offsets'], geometry['polygon_offsets'], geometry['feature_offsets']))
+
+
+def load_counties(path=STORE_PATH, level=None, figsize=None, dpi=None, fraction=1.0):
+    """
+    回傳各縣市的 GeoDataFrame（name 為標準英文名稱，county 為中文名稱）
+
+    level 未指定時，依 figsize／dpi 自動選擇簡化層級；都未指定則使用原始資料。
+    """
+    import geopandas as gpd
+
+    store = load_store(path)
+    level = _resolve_level(path, level, figsize, dpi, fraction, None)
+    codes = store['county_code']
+    return gpd.GeoDataFrame({
+        'name': store['name'],
+        'county': [geo_index.county_name(c) for c in codes],
+        'county_code': codes,
+        'label_x': store['label_points'][:, 0],
+        'label_y': store['label_points'][:, 1],
+    }, geometry=_geometries(store, level), crs=store['meta']['crs'])
+
+
+def load_townships(path=TOWNSHIP_STORE_PATH, level=None, figsize=None, dpi=None, fraction=1.0):
+    """回傳各鄉鎮市區的 GeoDataFrame（county, township, county_code, township_code）"""
+    import geopandas as gpd
+
+    store = load_store(path)
+    level = _resolve_level(path, level, figsize, dpi, fraction, None)
+    codes = store['county_code']
+    return gpd.GeoDataFrame({
+        'county': [geo_index.county_name(c) for c in codes],
+        'township': store['name'],
+        'county_code': codes,
+        'township_code': store['township_code'],
+        'label_x': store['label_points'][:, 0],
+        'label_y': store['label_points'][:, 1],
+    }, geometry=_geometries(store, level), crs=store['meta']['crs'])
+
+
+@functools.lru_cache(maxsize=None)
+def _geojson_text(path, level):
+    store = load_store(path)
+    geometry = store['levels'][level]
+    features = []
+    for i, (name, code) in enumerate(zip(store['name'], store['county_code'])):
+        polygons = {}
+        for p, ring in _rings(geometry, i):
+            polygons.setdefault(p, []).append(ring.tolist())
+        features.append({
+            'type': 'Feature',
+            'properties': {'name': str(name), 'county': geo_index.county_name(code),
+                           'county_code': int(code)},
+            'geometry': {'type': 'MultiPolygon', 'coordinates': list(polygons.values())},
+        })
+    return json.dumps({'type': 'FeatureCollection', 'features': features})
+
+
+def to_geojson(path=STORE_PATH, level=None, pixels=None):
+    """
+    回傳 GeoJSON FeatureCollection（dict），properties 含 name、county、county_code
+
+    pixels 為圖面寬度（例如 plotly 的 width），用來自動選擇簡化層級。
+    """
+    level = _resolve_level(path, level, None, None, 1.0, pixels)
+    return json.loads(_geojson_text(path, level))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'build':
+        source = sys.argv[2] if len(sys.argv) >= 3 else GEOJSON_URL
+        n = build_store(source)
+        print(f"已建立 {STORE_PATH}（{n} 個縣市）")
+    elif len(sys.argv) >= 2 and sys.argv[1] == 'build-townships':
+        source = sys.argv[2] if len(sys.argv) >= 3 else TOWNSHIP_SOURCE
+        n = build_township_store(source)
+        print(f"已建立 {TOWNSHIP_STORE_PATH}（{n} 個鄉鎮市區）")
+    else:
+        for path in (STORE_PATH, TOWNSHIP_STORE_PATH):
+            store = load_store(path)
+            print(f"{path}: {len(store['name'])} 個區域")
+            for tolerance, geometry in zip(store['tolerances'], store['levels']):
+                print(f"  容許誤差 {tolerance:g}°：{len(geometry['coords'])} 個頂點")
@@ -0,0 +1,187 @@
+"""
+以 matplotlib 直接繪製的面量圖（縣市／鄉鎮市區）
+
+邊界取自 boundary_store，每個區域轉成一條複合 Path 後組成一個
+PathCollection；換資料時只需 set_array()，不必重建幾何或合併 DataFrame。
+鄉鎮層級以 incident_cube 的鄉鎮槽位對應邊界列，任何切片的件數都是
+一次陣列索引：
+
+    township_map = TownshipMap(incident_cube.load_cube())
+    township_map.render('out.png', type='機車竊盜', year=112)
+"""
+import functools
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.collections import PathCollection
+from matplotlib.path import Path
+
+import boundary_store
+
+
+def _compound_paths(geometry):
+    """每個區域一條 Path（各環以 MOVETO 開始、CLOSEPOLY 結束）"""
+    coords = geometry['coords']
+    ring_offsets = geometry['ring_offsets']
+    codes = np.full(len(coords), Path.LINETO, dtype=Path.code_type)
+    codes[ring_offsets[:-1]] = Path.MOVETO
+    codes[ring_offsets[1:] - 1] = Path.CLOSEPOLY
+
+    # 座標依區域順序連續排列，各區域為一個連續區段
+    starts = ring_offsets[geometry['polygon_offsets'][geometry['feature_offsets']]]
+    return [Path(coords[a:b], codes[a:b]) for a, b in zip(starts[:-1], starts[1:])]
+
+
+class ChoroplethLayer:
+    """某一邊界檔、某一簡化層級的 Path 與區域代碼"""
+
+    def __init__(self, path, level):
+        store = boundary_store.load_store(path)
+        self.path = path
+        self.store = store
+        self.level = level
+        self.paths = _compound_paths(store['levels'][level])
+        self.codes = store.get('township_code', store['county_code'])
+        self.bounds = store['bounds']
+        # 標籤位置（交給 label_layout.draw_labels()）
+        self.label_points = store['label_points']
+
+    def __len__(self):
+        return len(self.paths)
+
+    def bind(self, values, codes=None):
+        """各縣市統計值 -> 與本圖層區域同順序的數值（見 boundary_store.bind()）"""
+        return boundary_store.bind(values, codes, self.path)
+
+    def collection(self, values=None, cmap='OrRd', norm=None, edgecolor='white',
+                   linewidth=0.3, missing_color='lightgrey'):
+        """建立 PathCollection；values 為與區域同順序的數值（NaN 以 missing_color 顯示）"""
+        cmap = plt.get_cmap(cmap).with_extremes(bad=missing_color)
+        collection = PathCollection(self.paths, cmap=cmap, norm=norm,
+                                    edgecolors=edgecolor, linewidths=linewidth)
+        if values is not None:
+            collection.set_array(np.ma.masked_invalid(np.asarray(values, dtype=float)))
+        return collection
+
+    def draw(self, ax, values, **kwargs):
+        """在 ax 上繪製並回傳 PathCollection"""
+        collection = self.collection(values, **kwargs)
+        ax.add_collection(collection)
+        minx, miny, maxx, maxy = self.bounds
+        ax.set_xlim(minx, maxx)
+        ax.set_ylim(miny, maxy)
+        ax.set_aspect('equal')
+        return collection
+
+
+@functools.lru_cache(maxsize=None)
+def layer(path, level):
+    """同一行程內共用的圖層（Path 只建一次）"""
+    return ChoroplethLayer(path, level)
+
+
+def township_layer(level=None, figsize=None, dpi=None, fraction=1.0):
+    path = boundary_store.TOWNSHIP_STORE_PATH
+    level = boundary_store._resolve_level(path, level, figsize, dpi, fraction, None)
+    return layer(path, level)
+
+
+def county_layer(level=None, figsize=None, dpi=None, fraction=1.0):
+    path = boundary_store.STORE_PATH
+    level = boundary_store._resolve_level(path, level, figsize, dpi, fraction, None)
+    return layer(path, level)
+
+
+@functools.lru_cache(maxsize=None)
+def _slot_rows(township_codes):
+    """鄉鎮邊界各列 -> 立方體的鄉鎮槽位；立方體沒有的鄉鎮為 -1"""
+    from incident_cube import _slot_lookup
+
+    slot_of = _slot_lookup()
+    return np.array([slot_of.get(int(c), -1) for c in township_codes], dtype=np.int64)
+
+
+def township_values(cube, township_layer, **filters):
+    """
+    立方體切片在各鄉鎮邊界上的件數（與 township_layer 同順序）
+
+    county 篩選時，其他縣市的鄉鎮為 NaN（地圖上以缺值顏色顯示）；立方體
+    沒有的鄉鎮也是 NaN。
+    """
+    county = filters.pop('county', None)
+    counts = cube.query('township', **filters)
+    rows = _slot_rows(tuple(township_layer.codes.tolist()))
+    values = counts[rows].astype(float)
+    # 立方體沒有的鄉鎮（例如改制後的新代碼）畫成缺值，不借用其他槽位的件數
+    values[rows < 0] = np.nan
+    if county is not None:
+        import geo_index
+
+        counties = [county] if isinstance(county, (str, int, np.integer)) else list(county)
+        codes = [geo_index.county_code(c) if isinstance(c, str) else c for c in counties]
+        values[~np.isin(township_layer.store['county_code'], codes)] = np.nan
+    return values
+
+
+class TownshipMap:
+    """
+    鄉鎮面量圖的批次繪製器
+
+    圖面、PathCollection 與色條只建一次；每張圖只更新數值、色階與標題
+    後存檔，適合大量 年 × 案類 的組合。
+    """
+
+    def __init__(self, cube, figsize=(8, 10), dpi=100, cmap='OrRd', level=None):
+        self.cube = cube
+        self.dpi = dpi
+        self.layer = township_layer(level, figsize=figsize, dpi=dpi)
+        self.fig, self.ax = plt.subplots(figsize=figsize)
+        self.collection = self.layer.draw(self.ax, None, cmap=cmap)
+        self.collection.set_array(np.zeros(len(self.layer)))
+        self.colorbar = self.fig.colorbar(self.collection, ax=self.ax, shrink=0.6, label='件數')
+        self.ax.set_axis_off()
+
+    def values(self, **filters):
+        return township_values(self.cube, self.layer, **filters)
+
+    def update(self, title=None, **filters):
+        values = self.values(**filters)
+        self.collection.set_array(np.ma.masked_invalid(values))
+        vmax = np.nanmax(values) if np.isfinite(values).any() else 1
+        self.collection.set_clim(0, max(vmax, 1))
+        if title is not None:
+            self.ax.set_title(title)
+        return values
+
+    def render(self, path, title=None, **filters):
+        """繪製一個切片並存檔"""
+        self.update(title, **filters)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.fig.savefig(path, dpi=self.dpi, bbox_inches='tight')
+
+    def close(self):
+        plt.close(self.fig)
+
+
+if __name__ == '__main__':
+    import time
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    import incident_cube
+
+    cube = incident_cube.load_cube()
+    out_dir = os.path.join(boundary_store.BASE_DIR, 'image', '鄉鎮犯罪件數')
+    township_map = TownshipMap(cube)
+    start = time.perf_counter()
+    n = 0
+    for year in cube.years.tolist():
+        for crime in cube.types.tolist():
+            township_map.render(os.path.join(out_dir, f'{year}年{crime}.png'),
+                                title=f'{year}年 {crime} 各鄉鎮市區件數',
+                                type=crime, year=year)
+            n += 1
+    township_map.close()
+    print(f"已輸出 {n} 張圖，{time.perf_counter() - start:.1f} 秒")
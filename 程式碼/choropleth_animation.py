@@ -0,0 +1,218 @@
+"""
+逐年變化的面量圖動畫（GIF／MP4／WebM，以及網頁用的影格拼圖）
+
+底圖、邊界、色條與標籤只繪製一次並存成背景；每一格只還原背景、
+更新 PathCollection 的顏色與標題，再重繪這兩個物件（matplotlib 的 blit），
+不必每年重建整張 geopandas 圖。所有影格共用同一色階，年度之間可直接比較。
+
+    animation = ChoroplethAnimation(choropleth.county_layer(figsize=(8, 10)), rate_frames())
+    animation.save('104~112年.gif')
+    animation.save_sprite('104~112年_sprite.png')
+"""
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+import choropleth
+import geo_index
+import label_layout
+
+# 各格式傳給 ffmpeg 的編碼參數（寬高需為偶數）
+VIDEO_CODECS = {
+    '.mp4': ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2'],
+    '.webm': ['-c:v', 'libvpx-vp9', '-b:v', '0', '-crf', '32', '-pix_fmt', 'yuv420p',
+              '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2'],
+}
+SUPPORTED_FORMATS = ('.gif', *VIDEO_CODECS)
+
+
+def rate_frames(layer=None, metric='犯罪人口率'):
+    """行政區犯罪人口率統計V 的各年度影格：[(標籤, 與圖層同順序的數值), ...]"""
+    import gov_tables
+
+    layer = layer or choropleth.county_layer()
+    rates = gov_tables.county_rates()
+    return [(f'{year}年', layer.bind(rates.vector(year, metric))) for year in rates.years.tolist()]
+
+
+def cube_frames(cube, layer=None, **filters):
+    """
+    incident_cube 的各年度件數影格；鄉鎮圖層時為各鄉鎮件數
+
+    county 篩選時，其他縣市為 NaN（與 choropleth.township_values() 相同）；
+    影格本身即為各年度，因此不接受 year 篩選。
+    """
+    if 'year' in filters:
+        raise ValueError("cube_frames() 的影格即為各年度，不接受 year 篩選")
+    layer = layer or choropleth.county_layer()
+    frames = []
+    if 'township_code' in layer.store:
+        for year in cube.years.tolist():
+            frames.append((f'{year}年', choropleth.township_values(cube, layer, year=year, **filters)))
+        return frames
+    # 縣市維度依 geo_index.COUNTIES 排列，最後一格為未知縣市
+    county = filters.pop('county', None)
+    counts = cube.query(['year', 'county'], **filters).astype(float)
+    if county is not None:
+        counts[:, ~np.isin(np.arange(counts.shape[1]), cube._axis_index('county', county))] = np.nan
+    return [(f'{year}年', layer.bind(counts[y, :-1])) for y, year in enumerate(cube.years.tolist())]
+
+
+class ChoroplethAnimation:
+    """
+    以固定的底圖逐格更新顏色的面量圖動畫
+
+    frames 為 [(標籤, 數值), ...]；title 可含 {label}。labels=True 時
+    在各區域標上名稱（鄉鎮圖層預設不標）。
+    """
+
+    def __init__(self, layer, frames, figsize=(8, 10), dpi=100, cmap='Reds', title='{label}',
+                 colorbar_label='', labels=None, fontsize=8):
+        self.layer = layer
+        self.frames = [(label, np.asarray(values, dtype=float)) for label, values in frames]
+        self.title = title
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot()
+
+        stacked = np.vstack([values for _, values in self.frames])
+        finite = stacked[np.isfinite(stacked)]
+        norm = Normalize(finite.min(), finite.max()) if len(finite) else Normalize(0, 1)
+        self.collection = layer.draw(self.ax, self.frames[0][1], cmap=cmap, norm=norm)
+        self.fig.colorbar(self.collection, ax=self.ax, shrink=0.6, label=colorbar_label)
+        self.ax.set_axis_off()
+        self.title_text = self.ax.set_title('')
+
+        if labels is None:
+            labels = 'township_code' not in layer.store
+        self.labels = []
+        if labels:
+            names = [geo_index.county_name(c) for c in layer.store['county_code']]
+            points = layer.label_points
+            self.labels = label_layout.draw_labels(self.ax, points[:, 0], points[:, 1], names,
+                                                   fontsize=fontsize)
+
+        # 會變動的物件不畫進背景；標籤在面之上，每格跟著重畫
+        self.animated = [self.collection, self.title_text, *self.labels]
+        for artist in self.animated:
+            artist.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._rendered = {}
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def size(self):
+        """影格的（寬, 高）像素"""
+        width, height = self.canvas.get_width_height()
+        return width, height
+
+    def frame(self, i):
+        """第 i 格的 RGB 影像（高 × 寬 × 3）；同一格只算一次"""
+        if i not in self._rendered:
+            label, values = self.frames[i]
+            self.canvas.restore_region(self.background)
+            self.collection.set_array(np.ma.masked_invalid(values))
+            self.title_text.set_text(self.title.format(label=label))
+            for artist in self.animated:
+                self.ax.draw_artist(artist)
+            self._rendered[i] = np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+        return self._rendered[i]
+
+    def images(self):
+        from PIL import Image
+
+        return [Image.fromarray(self.frame(i)) for i in range(len(self))]
+
+    def save_gif(self, path, duration=800):
+        """duration 為每格毫秒數"""
+        images = self.images()
+        _makedirs(path)
+        images[0].save(path, save_all=True, append_images=images[1:], duration=duration,
+                       loop=0, optimize=True)
+
+    def save_video(self, path, fps=1):
+        """以 ffmpeg 輸出 MP4／WebM（影格以原始 RGB 經由 stdin 傳入）"""
+        ext = _extension(path)
+        if ext not in VIDEO_CODECS:
+            raise ValueError(f"save_video() 不支援 {ext or '（無副檔名）'}，"
+                             f"可用：{'、'.join(VIDEO_CODECS)}")
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError(f"輸出 {ext} 需要 ffmpeg，請先安裝或改輸出 .gif")
+        width, height = self.size
+        _makedirs(path)
+        command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                   '-s', f'{width}x{height}', '-r', str(fps), '-i', '-',
+                   *VIDEO_CODECS[ext], path]
+        with subprocess.Popen(command, stdin=subprocess.PIPE) as process:
+            for i in range(len(self)):
+                process.stdin.write(self.frame(i).tobytes())
+            process.stdin.close()
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg 輸出 {path} 失敗")
+
+    def save_sprite(self, path, columns=None):
+        """
+        所有影格拼成一張圖，並寫出同名 .json（影格大小、欄數與各格標籤），
+        網頁以 background-position 切換年度，只需下載一張圖
+        """
+        from PIL import Image
+
+        width, height = self.size
+        columns = columns or len(self)
+        rows = -(-len(self) // columns)
+        sheet = Image.new('RGB', (width * columns, height * rows), 'white')
+        for i, image in enumerate(self.images()):
+            r, c = divmod(i, columns)
+            sheet.paste(image, (c * width, r * height))
+        _makedirs(path)
+        sheet.save(path, optimize=True)
+        manifest = {'image': os.path.basename(path), 'width': width, 'height': height,
+                    'columns': columns, 'frames': [label for label, _ in self.frames]}
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    def save(self, path, **kwargs):
+        """依副檔名輸出 .gif、.mp4 或 .webm"""
+        ext = _extension(path)
+        if ext == '.gif':
+            self.save_gif(path, **kwargs)
+        elif ext in VIDEO_CODECS:
+            self.save_video(path, **kwargs)
+        else:
+            raise ValueError(f"不支援的輸出格式 {ext or '（無副檔名）'}，"
+                             f"可用：{'、'.join(SUPPORTED_FORMATS)}")
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def _makedirs(path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+
+if __name__ == '__main__':
+    import time
+
+    out_dir = os.path.join(choropleth.boundary_store.BASE_DIR, 'image', '各縣市犯罪人口104~112')
+    start = time.perf_counter()
+    layer = choropleth.county_layer(figsize=(8, 10))
+    animation = ChoroplethAnimation(layer, rate_frames(layer),
+                                    title='台灣各縣市犯罪人口率（{label}）',
+                                    colorbar_label='犯罪人口率（每十萬人）')
+    animation.save(os.path.join(out_dir, '104~112年.gif'))
+    animation.save_sprite(os.path.join(out_dir, '104~112年_sprite.png'))
+    if shutil.which('ffmpeg'):
+        animation.save(os.path.join(out_dir, '104~112年.mp4'))
+        animation.save(os.path.join(out_dir, '104~112年.webm'))
+    print(f"已輸出 {len(animation)} 格動畫，{time.perf_counter() - start:.1f} 秒")
@@ -0,0 +1,156 @@
+"""
+中文字型與輸出樣式的共用設定
+
+各腳本原本各自設定 font.sans-serif（Microsoft JhengHei、Arial Unicode MS、
+SimHei…）或寫死 C:/Windows/Fonts/msjh.ttc，換到 Linux／macOS 就只剩方框。
+這裡依序嘗試：環境變數 CJK_FONT 指定的字型檔、上次找到的字型檔
+（.cache/fonts/cjk_font.json）、matplotlib 字型清單中的常見中文字型，
+最後在 Linux 上以 fc-list 查詢支援繁體中文的字型檔。結果記錄下來，
+之後的行程不必再搜尋。
+
+    import cjk_fonts
+    cjk_fonts.setup()
+    ax.set_title('...', fontproperties=cjk_fonts.font_properties(size=16))
+
+setup() 同時設定 PDF／PS 內嵌 TrueType 子集字型、SVG 以路徑輸出字形，
+輸出的向量檔在沒有安裝中文字型的電腦上也能正確顯示。
+容器建置時可先執行 python 程式碼/cjk_fonts.py，預先建立 matplotlib 的
+字型快取並記錄字型路徑。
+"""
+import functools
+import json
+import os
+import shutil
+import subprocess
+import warnings
+from collections import namedtuple
+
+from incident_data import BASE_DIR
+
+FONT_CACHE_PATH = os.path.join(BASE_DIR, '.cache', 'fonts', 'cjk_font.json')
+
+# 依偏好排列：繁體中文字型優先，其次是簡體與泛用的 Unicode 字型
+FAMILIES = (
+    'Microsoft JhengHei', 'PingFang TC', 'Heiti TC', 'Noto Sans CJK TC', 'Noto Sans TC',
+    'Source Han Sans TW', 'WenQuanYi Zen Hei', 'WenQuanYi Micro Hei', 'AR PL UMing TW',
+    'Microsoft YaHei', 'SimHei', 'Noto Sans CJK SC', 'Arial Unicode MS', 'Droid Sans Fallback',
+)
+
+CJKFont = namedtuple('CJKFont', ['path', 'family'])
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _load_record():
+    """上次找到的字型檔；檔案已不存在或已變更時為 None"""
+    try:
+        with open(FONT_CACHE_PATH, encoding='utf-8') as f:
+            record = json.load(f)
+        if _signature(record['path']) == record:
+            return record['path']
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _save_record(path):
+    os.makedirs(os.path.dirname(FONT_CACHE_PATH), exist_ok=True)
+    with open(FONT_CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(_signature(path), f, ensure_ascii=False, indent=2)
+
+
+def _fontconfig_candidates():
+    """fc-list 查到支援繁體中文的字型檔，偏好的字型在前"""
+    fc_list = shutil.which('fc-list')
+    if fc_list is None:
+        return []
+    try:
+        output = subprocess.run([fc_list, ':lang=zh-tw', 'family', 'file'], capture_output=True,
+                                text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    candidates = []
+    for line in output.splitlines():
+        path, _, families = line.partition(':')
+        names = [name.strip() for name in families.split(',')]
+        rank = min((FAMILIES.index(n) for n in names if n in FAMILIES), default=len(FAMILIES))
+        candidates.append((rank, path.strip()))
+    return [path for _, path in sorted(candidates)]
+
+
+def _discover():
+    """搜尋中文字型檔，找不到時為 None"""
+    from matplotlib import font_manager
+
+    by_name = {}
+    for entry in font_manager.fontManager.ttflist:
+        by_name.setdefault(entry.name, entry.fname)
+    for family in FAMILIES:
+        if family in by_name:
+            return by_name[family]
+    candidates = _fontconfig_candidates()
+    return candidates[0] if candidates else None
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_font():
+    """中文字型（路徑, 名稱）；同一行程只搜尋一次，找不到時為 None"""
+    from matplotlib import font_manager
+
+    path = os.environ.get('CJK_FONT')
+    if path and not os.path.isfile(path):
+        warnings.warn(f"環境變數 CJK_FONT 指定的字型檔 {path} 不存在，改為自動搜尋中文字型")
+        path = None
+    path = path or _load_record()
+    if path is None:
+        path = _discover()
+        if path is None:
+            return None
+        _save_record(path)
+    # 不在 matplotlib 字型清單中的檔案（環境變數、fc-list）需先登記
+    font_manager.fontManager.addfont(path)
+    return CJKFont(path, font_manager.FontProperties(fname=path).get_name())
+
+
+def setup():
+    """設定中文字型與向量輸出的字型內嵌方式，回傳 resolve_font() 的結果"""
+    import matplotlib
+
+    font = resolve_font()
+    # matplotlib 逐字元依序找字型：中文字型缺的字形（例如部分符號）由 DejaVu Sans 補上
+    families = ([font.family] if font else []) + ['DejaVu Sans']
+    # 42 為 TrueType 子集內嵌；部分 matplotlib 版本無法以 42 內嵌 .ttc，改用同樣是子集的 Type 3
+    fonttype = 3 if font and font.path.lower().endswith('.ttc') else 42
+    matplotlib.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.sans-serif': families,
+        'axes.unicode_minus': False,
+        'pdf.fonttype': fonttype,
+        'ps.fonttype': fonttype,
+        'svg.fonttype': 'path',
+    })
+    return font
+
+
+def font_properties(size=None):
+    """中文字型的 FontProperties（取代寫死的 msjh.ttc 路徑）"""
+    from matplotlib.font_manager import FontProperties
+
+    font = resolve_font()
+    if font is None:
+        return FontProperties(family='sans-serif', size=size)
+    return FontProperties(fname=font.path, size=size)
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    font = resolve_font()
+    if font is None:
+        print("找不到中文字型，請安裝 Noto Sans CJK TC 或以環境變數 CJK_FONT 指定字型檔")
+    else:
+        print(f"中文字型：{font.family}（{font.path}），{time.perf_counter() - start:.1f} 秒")
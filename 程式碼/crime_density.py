@@ -0,0 +1,229 @@
+"""
+犯罪密度面（核密度估計）
+
+把各鄉鎮的件數放在鄉鎮的標籤點上（boundary_store.label_points()，保證
+落在鄉鎮內），以自適應頻寬的高斯核算出全台的密度網格（件／平方公里）：
+
+1. 以線性分箱把件數分到網格上；
+2. 先以固定頻寬算出試驗密度，再依 Abramson 平方根法則決定各點的頻寬
+   （密集處較窄、稀疏處較寬）；
+3. 頻寬量化成少數幾級，每級各做一次 FFT 卷積後相加。
+
+計算量只與網格大小及頻寬級數有關，與件數無關。結果依（年, 案類, 參數）
+快取在 .cache/density/，來源資料或邊界檔變更時重算。
+
+    surface = load_surface(cube, year=112, type='住宅竊盜')
+    surface.draw(ax, alpha=0.6)
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+import boundary_store
+from incident_data import BASE_DIR
+
+DENSITY_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'density')
+DENSITY_VERSION = 1
+
+KM_PER_DEGREE = 111.32
+CELL_KM = 1.0
+BANDWIDTH_KM = 5.0
+BANDWIDTH_CLASSES = 8
+# 自適應頻寬相對於 BANDWIDTH_KM 的範圍
+BANDWIDTH_RANGE = (0.25, 4.0)
+TRUNCATE = 4.0
+
+
+class DensityGrid:
+    """經緯度網格；x、y 方向的格距換算成相同的公里數"""
+
+    def __init__(self, bounds, cell_km=CELL_KM, margin_km=10.0):
+        minx, miny, maxx, maxy = bounds
+        lat0 = np.radians((miny + maxy) / 2)
+        self.cell_km = cell_km
+        self.dx = cell_km / (KM_PER_DEGREE * np.cos(lat0))
+        self.dy = cell_km / KM_PER_DEGREE
+        mx, my = margin_km / cell_km * self.dx, margin_km / cell_km * self.dy
+        self.x0, self.y0 = minx - mx, miny - my
+        self.shape = (int(np.ceil((maxy - miny + 2 * my) / self.dy)) + 1,
+                      int(np.ceil((maxx - minx + 2 * mx) / self.dx)) + 1)
+
+    @property
+    def extent(self):
+        """imshow(origin='lower') 用的範圍：左、右、下、上"""
+        ny, nx = self.shape
+        return (self.x0 - self.dx / 2, self.x0 + (nx - 0.5) * self.dx,
+                self.y0 - self.dy / 2, self.y0 + (ny - 0.5) * self.dy)
+
+    def cell_coords(self, x, y):
+        """經緯度 -> 以格為單位的座標（格中心為整數）"""
+        return (np.asarray(x) - self.x0) / self.dx, (np.asarray(y) - self.y0) / self.dy
+
+    def bin(self, x, y, weights):
+        """線性分箱：每個點的權重依距離分給周圍四個格點"""
+        ny, nx = self.shape
+        gx, gy = self.cell_coords(x, y)
+        ix = np.clip(np.floor(gx).astype(np.int64), 0, nx - 2)
+        iy = np.clip(np.floor(gy).astype(np.int64), 0, ny - 2)
+        fx = np.clip(gx - ix, 0, 1)
+        fy = np.clip(gy - iy, 0, 1)
+        grid = np.zeros(ny * nx)
+        for ox, oy, share in ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                              (0, 1, (1 - fx) * fy), (1, 1, fx * fy)):
+            grid += np.bincount((iy + oy) * nx + ix + ox, weights=weights * share,
+                                minlength=ny * nx)
+        return grid.reshape(ny, nx)
+
+    def sample(self, grid, x, y):
+        """網格在各點的值（最近格點）"""
+        ny, nx = self.shape
+        gx, gy = self.cell_coords(x, y)
+        ix = np.clip(np.rint(gx).astype(np.int64), 0, nx - 1)
+        iy = np.clip(np.rint(gy).astype(np.int64), 0, ny - 1)
+        return grid[iy, ix]
+
+
+def _gaussian_kernel(sigma):
+    """以格為單位的標準差，截斷於 TRUNCATE 倍，總和為 1"""
+    radius = max(1, int(np.ceil(TRUNCATE * sigma)))
+    r = np.arange(-radius, radius + 1)
+    k = np.exp(-0.5 * (r / sigma) ** 2)
+    k /= k.sum()
+    return np.outer(k, k)
+
+
+def _fft_convolve(grid, kernel):
+    """以 FFT 做二維卷積，輸出與 grid 同形狀"""
+    ny, nx = grid.shape
+    ky, kx = kernel.shape
+    shape = (ny + ky - 1, nx + kx - 1)
+    out = np.fft.irfft2(np.fft.rfft2(grid, shape) * np.fft.rfft2(kernel, shape), shape)
+    out = out[ky // 2:ky // 2 + ny, kx // 2:kx // 2 + nx]
+    # 捨去浮點誤差造成的極小負值
+    return np.maximum(out, 0)
+
+
+def kde(grid, x, y, weights, bandwidth_km=BANDWIDTH_KM, classes=BANDWIDTH_CLASSES,
+        adaptive=True):
+    """
+    加權點的核密度（件／平方公里），形狀為 grid.shape
+
+    adaptive=False 時所有點使用同一頻寬 bandwidth_km。
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    weights = np.nan_to_num(np.asarray(weights, dtype=float))
+    keep = weights > 0
+    x, y, weights = x[keep], y[keep], weights[keep]
+    area = grid.cell_km ** 2
+    sigma = bandwidth_km / grid.cell_km
+    if not len(weights):
+        return np.zeros(grid.shape)
+
+    pilot = _fft_convolve(grid.bin(x, y, weights), _gaussian_kernel(sigma))
+    if not adaptive:
+        return pilot / area
+
+    # Abramson：h_i = h * (f(x_i) / g) ** -0.5，g 為試驗密度的加權幾何平均
+    f = np.maximum(grid.sample(pilot, x, y), 1e-12)
+    g = np.exp(np.average(np.log(f), weights=weights))
+    scale = np.clip(np.sqrt(g / f), *BANDWIDTH_RANGE)
+
+    # 頻寬在對數尺度上量化成 classes 級
+    levels = np.geomspace(*BANDWIDTH_RANGE, classes)
+    level = np.abs(np.log(scale)[:, None] - np.log(levels)[None, :]).argmin(axis=1)
+    density = np.zeros(grid.shape)
+    for c in np.unique(level):
+        part = level == c
+        binned = grid.bin(x[part], y[part], weights[part])
+        density += _fft_convolve(binned, _gaussian_kernel(sigma * levels[c]))
+    return density / area
+
+
+class DensitySurface:
+    """一個（年, 案類）切片的密度網格"""
+
+    def __init__(self, density, extent, key=None):
+        self.density = density
+        self.extent = tuple(extent)
+        self.key = key
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez_compressed(path, density=self.density.astype(np.float32),
+                            extent=np.asarray(self.extent),
+                            key=json.dumps(self.key, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['density'].astype(float), data['extent'],
+                       json.loads(str(data['key'])))
+
+    def draw(self, ax, cmap='inferno', alpha=0.7, threshold=0.01, **kwargs):
+        """疊在地圖上；低於 threshold 的格子透明"""
+        density = np.ma.masked_less(self.density, threshold)
+        return ax.imshow(density, origin='lower', extent=self.extent, cmap=cmap,
+                         alpha=alpha, interpolation='bilinear', **kwargs)
+
+
+def _cache_path(year, crime, params):
+    """不同頻寬、網格參數的密度面各存一個檔案，不會互相覆蓋"""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(DENSITY_CACHE_DIR, f'{year}_{crime or "全部"}_{digest}.npz')
+
+
+def density_surface(cube, layer=None, bandwidth_km=BANDWIDTH_KM, cell_km=CELL_KM,
+                    adaptive=True, **filters):
+    """依立方體的切片計算密度面（不使用快取）；layer 預設為原始解析度的鄉鎮圖層"""
+    import choropleth
+
+    layer = layer or choropleth.township_layer(0)
+    grid = DensityGrid(layer.bounds, cell_km)
+    values = choropleth.township_values(cube, layer, **filters)
+    points = layer.label_points
+    density = kde(grid, points[:, 0], points[:, 1], values, bandwidth_km, adaptive=adaptive)
+    return DensitySurface(density, grid.extent)
+
+
+def load_surface(cube, year=None, type=None, use_cache=True, bandwidth_km=BANDWIDTH_KM,
+                 cell_km=CELL_KM, adaptive=True):
+    """讀取（必要時計算）某年、某案類的密度面；None 表示不篩選"""
+    filters = {k: v for k, v in (('year', year), ('type', type)) if v is not None}
+    store = boundary_store.load_store(boundary_store.TOWNSHIP_STORE_PATH)
+    source = getattr(cube, 'key', None)
+    if year is not None and source is not None:
+        source = source.get(str(year))
+    # 以實際使用的參數值為鍵：5 與 5.0、省略與傳入預設值都對應同一份快取
+    params = {'bandwidth_km': float(bandwidth_km), 'cell_km': float(cell_km),
+              'adaptive': bool(adaptive)}
+    key = {'version': DENSITY_VERSION, 'source': source, 'store': store['meta']['sha1'],
+           'params': params}
+
+    path = _cache_path(year, type, params)
+    if use_cache and source is not None and os.path.exists(path):
+        surface = DensitySurface.load(path)
+        if surface.key == key:
+            return surface
+
+    surface = density_surface(cube, **params, **filters)
+    surface.key = key
+    if use_cache and source is not None:
+        surface.save(path)
+    return surface
+
+
+if __name__ == '__main__':
+    import time
+
+    import incident_cube
+
+    cube = incident_cube.load_cube()
+    start = time.perf_counter()
+    n = 0
+    for year in cube.years.tolist():
+        for crime in [None] + cube.types.tolist():
+            load_surface(cube, year, crime)
+            n += 1
+    print(f"{n} 個密度面，{time.perf_counter() - start:.1f} 秒")
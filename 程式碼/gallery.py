@@ -0,0 +1,647 @@
+"""
+網站畫廊圖片（image/）的批次輸出
+
+各圖表腳本原本以 plt.show() 逐張顯示，更新 image/ 只能逐一執行、手動存檔。
+這裡集中登記每張圖片由哪個腳本的第幾次 plt.show() 產生（CHARTS），
+以 Agg 後端執行腳本，攔截 plt.show() 將當時的圖存成 index.html 引用的
+檔名（image/<分類>/<名稱>.png），一個指令輸出全部圖片：
+
+    python 程式碼/gallery.py              # 全部
+    python 程式碼/gallery.py 104年 六都警政績效雷達圖
+    python 程式碼/gallery.py -j 4 ...     # 指定行程數（預設為 CPU 數）
+    python 程式碼/gallery.py --dry-run    # 列出需要重繪的圖片與原因
+    python 程式碼/gallery.py --force      # 忽略快取全部重繪
+    python 程式碼/gallery.py --check      # 比對 index.html 引用的圖片，檢查資料檔是否存在
+
+同一腳本的多張圖片只執行一次腳本。沒有對應腳本的圖片（各年度
+犯罪人口率地圖）以本模組的繪圖函式產生。
+
+各工作分配到行程池平行執行，每個工作回報耗時與記憶體峰值；
+單一圖表失敗（例外或行程崩潰）只會讓該工作失敗，其餘照常輸出；
+有任何圖表失敗時結束碼為 1，排程工作可據此偵測。
+
+每張圖片的鍵為其相依項目的雜湊：腳本與遞迴匯入的 程式碼/ 模組、
+登記的資料檔（SCRIPT_INPUTS）與輸出參數。鍵未變更的圖片不重繪，
+只改了一個 CSV 時只會重繪讀取它的圖表。
+"""
+import contextlib
+import json
+import os
+import re
+import runpy
+import sys
+import time
+
+from incident_data import BASE_DIR
+
+IMAGE_DIR = os.path.join(BASE_DIR, 'image')
+SCRIPT_DIR = os.path.join(BASE_DIR, '程式碼')
+INDEX_PATH = os.path.join(BASE_DIR, 'index.html')
+DPI = 150
+
+
+class Chart:
+    """
+    一張畫廊圖片
+
+    script 的第 index 次 trigger（'show' 為 plt.show()，'savefig' 為
+    plt.savefig()）時的圖面即為此圖；function 有值時改以本模組的
+    函式繪製（args 為其參數）。inputs 為讀取的資料檔（相對於專案根目錄，
+    可用萬用字元），省略時使用 SCRIPT_INPUTS 中該腳本的登記。
+    """
+
+    def __init__(self, category, name, script=None, index=1, trigger='show',
+                 function=None, args=(), inputs=None):
+        self.category = category
+        self.name = name
+        self.script = script
+        self.index = index
+        self.trigger = trigger
+        self.function = function
+        self.args = tuple(args)
+        self.inputs = tuple(SCRIPT_INPUTS.get(script, ()) if inputs is None else inputs)
+
+    @property
+    def output(self):
+        return os.path.join(IMAGE_DIR, self.category, f'{self.name}.png')
+
+    @property
+    def source(self):
+        return self.script or f'{__name__}.{self.function}'
+
+    def __repr__(self):
+        return f'Chart({self.category}/{self.name} <- {self.source}#{self.index})'
+
+
+# 各腳本讀取的資料檔（程式碼本身與其匯入的 程式碼/ 模組會自動納入）
+COUNTY_STORE = '地圖資料/taiwan_counties_v3.npz'
+SCRIPT_INPUTS = {
+    '主要警政統計指標1.py': ['主要警政統計指標1V.csv'],
+    '台灣暴力.py': ['暴力犯罪統計2V.csv', COUNTY_STORE],
+    '台灣竊盜.py': ['竊盜統計2V.csv', COUNTY_STORE],
+    '暴力犯罪台灣地圖.py': [COUNTY_STORE],
+    '警備人數.py': [COUNTY_STORE],
+}
+
+POLICE = '92~112主要警政統計指標'
+OTHER = '其他'
+EDUCATION = '刑事案件嫌疑犯人數－按教育別'
+OCCUPATION = '刑事案件嫌疑犯人數－按職業別'
+CASES = '刑事案件發生數、破獲數及嫌疑犯人數－按案類別'
+CASUALTIES = '刑事案件被害人死傷人數－按案類別'
+VICTIMS = '刑事案件被害者人數－按案類及年齡層別'
+VIOLENCE = '台灣暴力案件犯罪統計'
+COUNTY_RATES = '各縣市犯罪人口104~112'
+
+CHARTS = [
+    Chart(POLICE, '2023各縣市全般刑案發生數', '主要警政統計指標2.py', 1),
+    Chart(POLICE, '2023各縣市全般刑案破獲率', '主要警政統計指標2.py', 2),
+    Chart(POLICE, '各縣市三種犯罪類型犯罪率', '主要警政統計指標2.py', 8),
+    Chart(POLICE, '六都警政績效雷達圖', '主要警政統計指標2.py', 10),
+    Chart(POLICE, '暴力犯罪發生與破獲率', '主要警政統計指標1.py', 1),
+    Chart(POLICE, '全般刑案發生數與破獲率', '主要警政統計指標1.py', 2),
+    Chart(POLICE, '各類犯罪發生數趨勢', '主要警政統計指標1.py', 3),
+    Chart(POLICE, '各類犯罪查獲率趨勢', '主要警政統計指標1.py', 4),
+
+    Chart(EDUCATION, '台灣刑事案件嫌疑犯教育程度時間變化', '刑事案件嫌疑犯人數－按教育別.py', 1),
+    Chart(EDUCATION, '男女嫌疑人學歷分布', 'test.py', 1, trigger='savefig'),
+    Chart(EDUCATION, '男女嫌疑人學歷分布比例堆疊', 'test.py', 2, trigger='savefig'),
+    Chart(EDUCATION, '主要學歷類別嫌疑人數趨勢', 'test.py', 4, trigger='savefig'),
+
+    Chart(OCCUPATION, '2022年刑事案件嫌疑犯', '刑事案件嫌疑犯人數－按職業別.py', 1),
+    Chart(OCCUPATION, '台灣刑事案件嫌疑犯職業類別', '刑事案件嫌疑犯人數－按職業別.py', 2),
+
+    Chart(CASES, '台灣主要犯罪類型發生數趨勢(2015~2022)', '刑事案件發生數、破獲數及嫌疑犯人數1_2.py', 3),
+    Chart(CASES, '2022各類犯罪發生數排名', '刑事案件發生數、破獲數及嫌疑犯人數1_2.py', 5),
+    Chart(CASES, '2022各類犯罪發生數嫌疑人', '刑事案件發生數、破獲數及嫌疑犯人數1_2.py', 6),
+    Chart(CASES, '各縣市形勢發生數破獲數嫌疑人', '刑事案件發生數、破獲數及嫌疑犯人數3.py', 2),
+    Chart(CASES, '各縣市主要犯罪類型案件數', '刑事案件發生數、破獲數及嫌疑犯人數3.py', 5),
+
+    Chart(CASUALTIES, '92年~111年刑事案件死傷', '刑事死傷.py', 1),
+    Chart(CASUALTIES, '2023年前10大犯罪類型', '刑事案件被害人死傷人數2.py', 5),
+    Chart(CASUALTIES, '2023年台灣各類刑事案件死亡率', '刑事案件被害人死傷人數2.py', 6),
+
+    Chart(VICTIMS, '2023刑事案件被害者', '刑事案件被害者人數－按案類及年齡層別.py', 1),
+    Chart(VICTIMS, '2023各案類刑事案件被害者性別', '刑事案件被害者人數－按案類及年齡層別.py', 3),
+    Chart(VICTIMS, '主要案類按年齡層分布堆疊圖', '刑事案件被害者人數－按案類及年齡層別.py', 4),
+    Chart(VICTIMS, '犯罪統計分析案性別年齡層', '性別年齡.py', 1),
+
+    Chart(VIOLENCE, '主要縣市暴力犯罪類型', '暴力犯罪台灣地圖.py', 1),
+    Chart(VIOLENCE, '台灣地區暴力犯罪案件統計', '台灣暴力.py', 1),
+
+    Chart(OTHER, '2022年各犯罪類型年齡層', '刑事案件嫌疑犯人數－按案類及年齡層別.py', 1),
+    Chart(OTHER, '2023年刑事案件24小時分布', '刑事案件發生數－按案類及時間別.py', 1),
+    Chart(OTHER, '主要犯罪類型24小時疊加', '刑事案件發生數－按案類及時間別.py', 5),
+    Chart(OTHER, '台灣各縣市警備人數', '警備人數.py', 1),
+    Chart(OTHER, '台灣竊盜案件統計分析', '台灣竊盜.py', 1),
+] + [
+    Chart(COUNTY_RATES, f'{year}年', function='county_rate_map', args=(year,),
+          inputs=['行政區犯罪人口率統計V/*年行政區犯罪人口率統計_縣市.csv', COUNTY_STORE])
+    for year in range(104, 113)
+]
+
+
+def county_rate_map(year):
+    """各縣市犯罪人口率地圖（行政區犯罪人口率統計V）"""
+    import matplotlib.pyplot as plt
+
+    import choropleth
+    import geo_index
+    import gov_tables
+    from label_layout import draw_labels
+
+    layer = choropleth.county_layer(figsize=(10, 12))
+    rates = gov_tables.county_rates()
+    values = layer.bind(rates.vector(year))
+    fig, ax = plt.subplots(figsize=(10, 12))
+    collection = layer.draw(ax, values, cmap='Reds', edgecolor='black', linewidth=0.5)
+    fig.colorbar(collection, ax=ax, shrink=0.6, label='犯罪人口率（每十萬人）')
+    ax.set_title(f'台灣各縣市犯罪人口率分布圖 (民國{year}年)', fontsize=16)
+    ax.set_axis_off()
+    names = [geo_index.county_name(c) for c in layer.store['county_code']]
+    texts = [f'{n}\n{v:,.0f}' if v == v else n for n, v in zip(names, values)]
+    points = layer.label_points
+    draw_labels(ax, points[:, 0], points[:, 1], texts, fontsize=8, priority=values)
+    return fig
+
+
+def jobs(charts=CHARTS):
+    """依來源分組：同一腳本的圖片在同一個工作中輸出"""
+    groups = {}
+    for chart in charts:
+        key = chart.script or (chart.function, chart.args)
+        groups.setdefault(key, []).append(chart)
+    return list(groups.values())
+
+
+def _save(fig, chart):
+    os.makedirs(os.path.dirname(chart.output), exist_ok=True)
+    fig.savefig(chart.output, dpi=DPI, bbox_inches='tight')
+
+
+@contextlib.contextmanager
+def _script_context():
+    """
+    在專案根目錄執行（腳本以相對路徑讀取資料），並可匯入 程式碼/ 的模組；
+    腳本印出的分析報告不混進批次輸出的紀錄
+    """
+    cwd, path = os.getcwd(), list(sys.path)
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, SCRIPT_DIR)
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, \
+                contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        os.chdir(cwd)
+        sys.path[:] = path
+
+
+def _render_script(charts):
+    """執行腳本一次，輸出其中登記的所有圖片"""
+    import matplotlib.pyplot as plt
+
+    script = charts[0].script
+    trigger = charts[0].trigger
+    wanted = {chart.index: chart for chart in charts}
+    saved = []
+    count = 0
+
+    def capture(*args, **kwargs):
+        nonlocal count
+        count += 1
+        chart = wanted.get(count)
+        if chart is not None:
+            _save(plt.gcf(), chart)
+            saved.append(chart)
+        if trigger == 'show':
+            plt.close('all')
+
+    def ignore(*args, **kwargs):
+        pass
+
+    # 觸發的函式改成存檔；另一個（腳本自己的 savefig 或 show）不動作
+    patched = {'show': capture, 'savefig': ignore} if trigger == 'show' else \
+              {'show': ignore, 'savefig': capture}
+    original = {name: getattr(plt, name) for name in patched}
+    try:
+        for name, func in patched.items():
+            setattr(plt, name, func)
+        with _script_context():
+            runpy.run_path(os.path.join(SCRIPT_DIR, script), run_name='__main__')
+    finally:
+        for name, func in original.items():
+            setattr(plt, name, func)
+        plt.close('all')
+
+    missing = [chart.name for chart in charts if chart not in saved]
+    if missing:
+        raise RuntimeError(f"{script} 只觸發了 {count} 次 plt.{trigger}()，未產生：{missing}")
+    return saved
+
+
+def _render_function(charts):
+    import matplotlib.pyplot as plt
+
+    chart = charts[0]
+    with _script_context():
+        fig = globals()[chart.function](*chart.args)
+    _save(fig, chart)
+    plt.close(fig)
+    return [chart]
+
+
+def render_job(charts):
+    """輸出一個工作（同一來源）的所有圖片；腳本對 rcParams 的修改不會留到下一個工作"""
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+    with matplotlib.rc_context():
+        if charts[0].script is not None:
+            return _render_script(charts)
+        return _render_function(charts)
+
+
+class RenderResult:
+    """一個工作的結果：秒數、行程的記憶體峰值（MB）與錯誤訊息（成功時為 None）"""
+
+    def __init__(self, charts, seconds, peak_mb, error=None, detail=None):
+        self.charts = charts
+        self.seconds = seconds
+        self.peak_mb = peak_mb
+        self.error = error
+        self.detail = detail
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _reset_peak():
+    """重設行程的 RSS 峰值（Linux 的 clear_refs；其他系統無法重設）"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _peak_mb():
+    """行程的 RSS 峰值（MB）；取不到時為 None"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 以位元組為單位，Linux 以 KB 為單位
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_job(charts):
+    """在工作行程中執行；任何例外都轉成結果，不會中斷整批輸出"""
+    import traceback
+
+    _reset_peak()
+    start = time.perf_counter()
+    try:
+        render_job(charts)
+        error = detail = None
+    except BaseException as e:
+        if isinstance(e, KeyboardInterrupt):
+            raise
+        error = f'{type(e).__name__}: {e}'
+        detail = traceback.format_exc()
+    return RenderResult(charts, time.perf_counter() - start, _peak_mb(), error, detail)
+
+
+# 工作行程啟動時先匯入，之後每個工作不再付匯入成本
+HEAVY_MODULES = ('numpy', 'pandas', 'matplotlib.pyplot', 'geopandas', 'seaborn', 'plotly.express')
+
+
+def _init_worker():
+    import importlib
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    sys.path.insert(0, SCRIPT_DIR)
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    # 中文字型在每個工作行程只搜尋一次，各腳本的 cjk_fonts.setup() 直接沿用
+    import cjk_fonts
+    cjk_fonts.resolve_font()
+
+
+TIMINGS_PATH = os.path.join(BASE_DIR, '.cache', 'gallery', 'timings.json')
+
+
+def _load_timings():
+    try:
+        with open(TIMINGS_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_timings(results):
+    timings = _load_timings()
+    timings.update({r.charts[0].source: r.seconds for r in results if r.ok})
+    os.makedirs(os.path.dirname(TIMINGS_PATH), exist_ok=True)
+    with open(TIMINGS_PATH, 'w', encoding='utf-8') as f:
+        json.dump(timings, f, ensure_ascii=False, indent=2)
+
+
+def render(charts=CHARTS, workers=None):
+    """
+    以行程池輸出圖片，回傳各工作的 RenderResult
+
+    依上次的耗時由長到短派工，讓各行程的負載接近。工作行程異常結束
+    （例如 C 擴充模組崩潰）時，未完成的工作改為各自在獨立行程中重試，
+    只有真正出問題的工作會失敗。workers=1 時在目前的行程依序執行。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    timings = _load_timings()
+    pending = sorted(jobs(charts), key=lambda job: -timings.get(job[0].source, 0))
+    workers = workers or min(len(pending), os.cpu_count() or 1)
+    if workers <= 1:
+        results = [_run_job(job) for job in pending]
+        _save_timings(results)
+        return results
+
+    results, retry = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [(job, pool.submit(_run_job, job)) for job in pending]
+        for job, future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                retry.append(job)
+    for job in retry:
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_worker) as pool:
+            try:
+                results.append(pool.submit(_run_job, job).result())
+            except BrokenProcessPool:
+                results.append(RenderResult(job, 0.0, None, '工作行程異常結束'))
+    _save_timings(results)
+    return results
+
+
+RENDER_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'gallery')
+OBJECT_DIR = os.path.join(RENDER_CACHE_DIR, 'objects')
+MANIFEST_PATH = os.path.join(RENDER_CACHE_DIR, 'manifest.json')
+FILE_HASHES_PATH = os.path.join(RENDER_CACHE_DIR, 'files.json')
+RENDER_CACHE_VERSION = 1
+
+
+class _FileHashes:
+    """
+    檔案內容的雜湊值；大小與修改時間未變時沿用上次的結果，
+    不必每次重讀 年度犯罪資料 之類的大檔
+    """
+
+    def __init__(self, path=FILE_HASHES_PATH):
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.signatures = json.load(f)
+        except (OSError, ValueError):
+            self.signatures = {}
+
+    def __call__(self, path):
+        from incident_data import _signature_matches, _source_signature
+
+        name = os.path.relpath(path, BASE_DIR)
+        if not os.path.exists(path):
+            return 'missing'
+        cached = self.signatures.get(name)
+        if cached is None or not _signature_matches(cached, path)[0]:
+            cached = self.signatures[name] = _source_signature(path)
+        return cached['sha1']
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.signatures, f, ensure_ascii=False, indent=2)
+
+
+def _local_imports(source):
+    """原始碼中匯入的 程式碼/ 模組"""
+    import ast
+
+    names = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.add(node.module.split('.')[0])
+    return {name for name in names if os.path.exists(os.path.join(SCRIPT_DIR, f'{name}.py'))}
+
+
+def code_dependencies(chart):
+    """
+    圖表的程式碼：腳本（或繪圖函式）以及遞迴匯入的 程式碼/ 模組，
+    回傳 {名稱: 原始碼}
+    """
+    import inspect
+
+    if chart.script is not None:
+        with open(os.path.join(SCRIPT_DIR, chart.script), encoding='utf-8') as f:
+            root = (chart.script, f.read())
+    else:
+        root = (chart.source, inspect.getsource(globals()[chart.function]))
+    code = dict([root])
+    queue = list(_local_imports(root[1]))
+    while queue:
+        name = queue.pop()
+        if f'{name}.py' in code:
+            continue
+        with open(os.path.join(SCRIPT_DIR, f'{name}.py'), encoding='utf-8') as f:
+            code[f'{name}.py'] = f.read()
+        queue.extend(_local_imports(code[f'{name}.py']))
+    return code
+
+
+def chart_inputs(chart):
+    """展開萬用字元後的資料檔（絕對路徑）"""
+    import glob
+
+    paths = []
+    for pattern in chart.inputs:
+        full = os.path.join(BASE_DIR, pattern)
+        matches = sorted(glob.glob(full)) if glob.has_magic(pattern) else [full]
+        paths.extend(matches or [full])
+    return paths
+
+
+def missing_inputs(chart):
+    """找不到的資料檔（相對於專案根目錄）；萬用字元沒有符合的檔案也算"""
+    return [os.path.relpath(path, BASE_DIR) for path in chart_inputs(chart)
+            if not os.path.exists(path)]
+
+
+def chart_dependencies(chart, hashes):
+    """圖表的所有相依項目與其雜湊值（程式碼、資料檔、參數）"""
+    import hashlib
+    import matplotlib
+
+    deps = {f'code:{name}': hashlib.sha1(text.encode('utf-8')).hexdigest()
+            for name, text in sorted(code_dependencies(chart).items())}
+    deps.update({f'input:{os.path.relpath(path, BASE_DIR)}': hashes(path)
+                 for path in chart_inputs(chart)})
+    deps['params'] = json.dumps([RENDER_CACHE_VERSION, chart.index, chart.trigger,
+                                 list(chart.args), DPI, matplotlib.__version__])
+    return deps
+
+
+def chart_key(deps):
+    import hashlib
+
+    return hashlib.sha1(json.dumps(deps, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _load_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def plan(charts=CHARTS):
+    """
+    比對相依項目，回傳 [(圖片, 鍵, 相依項目, 狀態, 變更的項目), ...]
+
+    狀態為 'fresh'（輸出已是最新）、'cached'（快取中有相同鍵的圖，
+    複製即可）或 'stale'（需要重繪）。
+    """
+    hashes = _FileHashes()
+    manifest = _load_manifest()
+    entries = []
+    for chart in charts:
+        deps = chart_dependencies(chart, hashes)
+        key = chart_key(deps)
+        record = manifest.get(os.path.relpath(chart.output, BASE_DIR), {})
+        if record.get('key') == key and os.path.exists(chart.output):
+            state = 'fresh'
+        elif os.path.exists(os.path.join(OBJECT_DIR, f'{key}.png')):
+            state = 'cached'
+        else:
+            state = 'stale'
+        old = record.get('deps', {})
+        changed = sorted(k for k in deps.keys() | old.keys() if deps.get(k) != old.get(k))
+        entries.append((chart, key, deps, state, changed if old else ['(首次輸出)']))
+    hashes.save()
+    return entries
+
+
+def build(charts=CHARTS, workers=None, force=False):
+    """
+    增量輸出：只重繪相依項目有變更的圖片
+
+    輸出以相依項目的雜湊為鍵另存一份在 .cache/gallery/objects/，
+    之後相同的鍵（例如切回舊版本的資料）直接複製，不必重繪。
+    回傳（render() 的結果, 略過的圖片數）。
+    """
+    import shutil
+
+    entries = plan(charts)
+    manifest = _load_manifest()
+    keys = {}
+    todo = []
+    for chart, key, deps, state, _ in entries:
+        name = os.path.relpath(chart.output, BASE_DIR)
+        if state == 'stale' or force:
+            todo.append(chart)
+            keys[chart.output] = (name, key, deps)
+            continue
+        if state == 'cached':
+            os.makedirs(os.path.dirname(chart.output), exist_ok=True)
+            shutil.copyfile(os.path.join(OBJECT_DIR, f'{key}.png'), chart.output)
+        manifest[name] = {'key': key, 'deps': deps}
+
+    results = render(todo, workers) if todo else []
+    os.makedirs(OBJECT_DIR, exist_ok=True)
+    for result in results:
+        if not result.ok:
+            continue
+        for chart in result.charts:
+            name, key, deps = keys[chart.output]
+            shutil.copyfile(chart.output, os.path.join(OBJECT_DIR, f'{key}.png'))
+            manifest[name] = {'key': key, 'deps': deps}
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return results, len(charts) - len(todo)
+
+
+def referenced_images(index_path=INDEX_PATH):
+    """index.html 引用的所有圖片（分類/檔名）"""
+    with open(index_path, encoding='utf-8') as f:
+        html = f.read()
+    images = set()
+    for block in re.split(r'data-category="', html)[1:]:
+        category = block[:block.index('"')]
+        for name in re.findall(r"selectOption\(this, '[^']*', '([^']+)'\)", block):
+            images.add(f'{category}/{name}')
+    return images
+
+
+def select(names, charts=CHARTS):
+    """依名稱（或 分類/名稱）挑出圖片"""
+    names = set(names)
+    return [c for c in charts if c.name in names or f'{c.category}/{c.name}' in names]
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args == ['--check']:
+        registered = {f'{c.category}/{c.name}.png' for c in CHARTS}
+        referenced = referenced_images()
+        for image in sorted(referenced - registered):
+            print(f"index.html 引用但未登記：{image}")
+        for image in sorted(registered - referenced):
+            print(f"已登記但 index.html 未引用：{image}")
+        missing = {}
+        for chart in CHARTS:
+            for path in missing_inputs(chart):
+                missing.setdefault(path, []).append(chart.source)
+        for path, sources in sorted(missing.items()):
+            print(f"找不到資料檔：{path}（{'、'.join(sorted(set(sources)))}）")
+        sys.exit(1 if referenced != registered or missing else 0)
+
+    if args[:1] == ['--dry-run']:
+        for chart, _, _, state, changed in plan(select(args[1:]) if args[1:] else CHARTS):
+            if state != 'fresh':
+                print(f"[{state}] {chart.category}/{chart.name}：{', '.join(changed)}")
+        sys.exit(0)
+
+    workers = None
+    force = '--force' in args
+    args = [a for a in args if a != '--force']
+    if args[:1] == ['-j']:
+        workers, args = int(args[1]), args[2:]
+    charts = select(args) if args else CHARTS
+    start = time.perf_counter()
+    results, skipped = build(charts, workers, force)
+    for result in sorted(results, key=lambda r: r.ok):
+        status = '完成' if result.ok else '失敗'
+        names = '、'.join(c.name for c in result.charts)
+        peak = f'，峰值 {result.peak_mb:.0f} MB' if result.peak_mb else ''
+        print(f"[{status}] {result.charts[0].source}（{result.seconds:.1f} 秒{peak}）：{names}")
+        if not result.ok:
+            print(f"    {result.error}")
+    failed = sum(len(r.charts) for r in results if not r.ok)
+    busy = sum(r.seconds for r in results)
+    elapsed = time.perf_counter() - start
+    print(f"共 {len(charts)} 張，略過 {skipped} 張（未變更），失敗 {failed} 張，"
+          f"{elapsed:.1f} 秒（各工作合計 {busy:.1f} 秒）")
+    sys.exit(1 if failed else 0)
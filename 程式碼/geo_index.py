@@ -0,0 +1,294 @@
+"""
+縣市／鄉鎮市區 標準名稱索引
+
+各程式共用的地理對照表：縣市代碼（行政區犯罪人口率統計V 的 COUNTY_ID）、
+標準中文名稱（統一使用「臺」）、GeoJSON 使用的英文名稱，以及各縣市所屬的
+鄉鎮市區。所有別名（台/臺、英文名、改制前名稱）在載入時預先建成一張雜湊表，
+查詢皆為 O(1)，合併資料時改用整數代碼，避免字串不一致造成資料遺失。
+"""
+import numpy as np
+import pandas as pd
+
+# 查無對應時回傳的代碼
+UNKNOWN = -1
+
+# (縣市代碼, 標準名稱, 英文名稱)，順序與 行政區犯罪人口率統計V 相同
+COUNTIES = [
+    (65000, '新北市', 'New Taipei City'),
+    (63000, '臺北市', 'Taipei City'),
+    (68000, '桃園市', 'Taoyuan City'),
+    (66000, '臺中市', 'Taichung City'),
+    (67000, '臺南市', 'Tainan City'),
+    (64000, '高雄市', 'Kaohsiung City'),
+    (10002, '宜蘭縣', 'Yilan County'),
+    (10004, '新竹縣', 'Hsinchu County'),
+    (10005, '苗栗縣', 'Miaoli County'),
+    (10007, '彰化縣', 'Changhua County'),
+    (10008, '南投縣', 'Nantou County'),
+    (10009, '雲林縣', 'Yunlin County'),
+    (10010, '嘉義縣', 'Chiayi County'),
+    (10013, '屏東縣', 'Pingtung County'),
+    (10014, '臺東縣', 'Taitung County'),
+    (10015, '花蓮縣', 'Hualien County'),
+    (10016, '澎湖縣', 'Penghu County'),
+    (10017, '基隆市', 'Keelung City'),
+    (10018, '新竹市', 'Hsinchu City'),
+    (10020, '嘉義市', 'Chiayi City'),
+    (9020, '金門縣', 'Kinmen County'),
+    (9007, '連江縣', 'Lienchiang County'),
+]
+
+# 改制或合併前的舊名稱 -> 標準名稱
+COUNTY_ALIASES = {
+    '臺北縣': '新北市',
+    '桃園縣': '桃園市',
+    '臺中縣': '臺中市',
+    '臺南縣': '臺南市',
+    '高雄縣': '高雄市',
+    'Taipei County': 'New Taipei City',
+    'Taoyuan County': 'Taoyuan City',
+    'Taichung County': 'Taichung City',
+    'Tainan County': 'Tainan City',
+    'Kaohsiung County': 'Kaohsiung City',
+}
+
+# 各縣市的鄉鎮市區；鄉鎮代碼為「縣市代碼 * 100 + 清單中的序號」，
+# 新增項目請加在各清單尾端，以免既有代碼改變
+TOWNSHIPS = {
+    '新北市': [
+        '三峽區', '三芝區', '三重區', '中和區', '五股區', '八里區', '土城區', '坪林區',
+        '平溪區', '新店區', '新莊區', '板橋區', '林口區', '樹林區', '永和區', '汐止區',
+        '泰山區', '淡水區', '深坑區', '烏來區', '瑞芳區', '石碇區', '石門區', '萬里區',
+        '蘆洲區', '貢寮區', '金山區', '雙溪區', '鶯歌區',
+    ],
+    '臺北市': [
+        '中山區', '中正區', '信義區', '內湖區', '北投區', '南港區', '士林區', '大同區',
+        '大安區', '文山區', '松山區', '萬華區',
+    ],
+    '桃園市': [
+        '中壢區', '八德區', '大園區', '大溪區', '平鎮區', '復興區', '新屋區', '桃園區',
+        '楊梅區', '蘆竹區', '觀音區', '龍潭區', '龜山區',
+    ],
+    '臺中市': [
+        '中區', '北區', '北屯區', '南區', '南屯區', '后里區', '和平區', '外埔區',
+        '大安區', '大甲區', '大肚區', '大里區', '大雅區', '太平區', '新社區', '東勢區',
+        '東區', '梧棲區', '沙鹿區', '清水區', '潭子區', '烏日區', '石岡區', '神岡區',
+        '西區', '西屯區', '豐原區', '霧峰區', '龍井區',
+    ],
+    '臺南市': [
+        '七股區', '下營區', '中西區', '仁德區', '佳里區', '六甲區', '北區', '北門區',
+        '南化區', '南區', '善化區', '大內區', '學甲區', '安南區', '安定區', '安平區',
+        '官田區', '將軍區', '山上區', '左鎮區', '後壁區', '新化區', '新市區', '新營區',
+        '東區', '東山區', '柳營區', '楠西區', '歸仁區', '永康區', '玉井區', '白河區',
+        '西港區', '關廟區', '鹽水區', '麻豆區', '龍崎區',
+    ],
+    '高雄市': [
+        '三民區', '仁武區', '內門區', '六龜區', '前金區', '前鎮區', '大寮區', '大樹區',
+        '大社區', '小港區', '岡山區', '左營區', '彌陀區', '新興區', '旗山區', '旗津區',
+        '杉林區', '林園區', '桃源區', '梓官區', '楠梓區', '橋頭區', '永安區', '湖內區',
+        '燕巢區', '田寮區', '甲仙區', '美濃區', '苓雅區', '茂林區', '茄萣區', '路竹區',
+        '那瑪夏區', '阿蓮區', '鳥松區', '鳳山區', '鹽埕區', '鼓山區',
+    ],
+    '宜蘭縣': [
+        '三星鄉', '五結鄉', '冬山鄉', '南澳鄉', '員山鄉', '壯圍鄉', '大同鄉', '宜蘭市',
+        '礁溪鄉', '羅東鎮', '蘇澳鎮', '頭城鎮',
+    ],
+    '新竹縣': [
+        '五峰鄉', '北埔鄉', '寶山鄉', '尖石鄉', '峨眉鄉', '新埔鎮', '新豐鄉', '橫山鄉',
+        '湖口鄉', '竹北市', '竹東鎮', '芎林鄉', '關西鎮',
+    ],
+    '苗栗縣': [
+        '三灣鄉', '三義鄉', '公館鄉', '卓蘭鎮', '南庄鄉', '大湖鄉', '後龍鎮', '泰安鄉',
+        '獅潭鄉', '竹南鎮', '苑裡鎮', '苗栗市', '西湖鄉', '通霄鎮', '造橋鄉', '銅鑼鄉',
+        '頭份市', '頭屋鄉',
+    ],
+    '彰化縣': [
+        '二林鎮', '二水鄉', '伸港鄉', '北斗鎮', '和美鎮', '員林市', '埔心鄉', '埔鹽鄉',
+        '埤頭鄉', '大城鄉', '大村鄉', '彰化市', '永靖鄉', '溪州鄉', '溪湖鎮', '田中鎮',
+        '田尾鄉', '社頭鄉', '福興鄉', '秀水鄉', '竹塘鄉', '線西鄉', '芬園鄉', '花壇鄉',
+        '芳苑鄉', '鹿港鎮',
+    ],
+    '南投縣': [
+        '中寮鄉', '仁愛鄉', '信義鄉', '南投市', '名間鄉', '國姓鄉', '埔里鎮', '水里鄉',
+        '竹山鎮', '草屯鎮', '集集鎮', '魚池鄉', '鹿谷鄉',
+    ],
+    '雲林縣': [
+        '二崙鄉', '元長鄉', '北港鎮', '口湖鄉', '古坑鄉', '四湖鄉', '土庫鎮', '大埤鄉',
+        '崙背鄉', '斗六市', '斗南鎮', '東勢鄉', '林內鄉', '水林鄉', '臺西鄉', '莿桐鄉',
+        '虎尾鎮', '褒忠鄉', '西螺鎮', '麥寮鄉',
+    ],
+    '嘉義縣': [
+        '中埔鄉', '六腳鄉', '大埔鄉', '大林鎮', '太保市', '布袋鎮', '新港鄉', '朴子市',
+        '東石鄉', '梅山鄉', '民雄鄉', '水上鄉', '溪口鄉', '番路鄉', '竹崎鄉', '義竹鄉',
+        '阿里山鄉', '鹿草鄉',
+    ],
+    '屏東縣': [
+        '三地門鄉', '九如鄉', '佳冬鄉', '來義鄉', '內埔鄉', '南州鄉', '屏東市', '崁頂鄉',
+        '恆春鎮', '新園鄉', '新埤鄉', '春日鄉', '東港鎮', '枋寮鄉', '枋山鄉', '林邊鄉',
+        '泰武鄉', '滿州鄉', '潮州鎮', '牡丹鄉', '獅子鄉', '琉球鄉', '瑪家鄉', '竹田鄉',
+        '萬丹鄉', '萬巒鄉', '車城鄉', '里港鄉', '長治鄉', '霧臺鄉', '高樹鄉', '鹽埔鄉',
+        '麟洛鄉',
+    ],
+    '臺東縣': [
+        '卑南鄉', '大武鄉', '太麻里鄉', '延平鄉', '成功鎮', '東河鄉', '池上鄉', '海端鄉',
+        '綠島鄉', '臺東市', '蘭嶼鄉', '達仁鄉', '金峰鄉', '長濱鄉', '關山鎮', '鹿野鄉',
+    ],
+    '花蓮縣': [
+        '光復鄉', '卓溪鄉', '吉安鄉', '壽豐鄉', '富里鄉', '新城鄉', '玉里鎮', '瑞穗鄉',
+        '秀林鄉', '花蓮市', '萬榮鄉', '豐濱鄉', '鳳林鎮',
+    ],
+    '澎湖縣': [
+        '七美鄉', '望安鄉', '湖西鄉', '白沙鄉', '西嶼鄉', '馬公市',
+    ],
+    '基隆市': [
+        '七堵區', '中山區', '中正區', '仁愛區', '信義區', '安樂區', '暖暖區',
+    ],
+    '新竹市': [
+        '北區', '東區', '香山區',
+    ],
+    '嘉義市': [
+        '東區', '西區',
+    ],
+    '金門縣': [
+        '烈嶼鄉', '烏坵鄉', '金城鎮', '金寧鄉', '金沙鎮', '金湖鎮',
+    ],
+    '連江縣': [
+        '北竿鄉', '南竿鄉', '東引鄉', '莒光鄉',
+    ],
+}
+
+# 鄉鎮市區改制前名稱 -> 標準名稱
+TOWNSHIP_ALIASES = {
+    ('彰化縣', '員林鎮'): '員林市',
+    ('苗栗縣', '頭份鎮'): '頭份市',
+}
+
+
+def normalize_name(name):
+    """去除空白並統一使用「臺」"""
+    return str(name).strip().replace('台', '臺')
+
+
+def _build_indexes():
+    """建立 名稱/別名 -> 代碼 的雜湊表"""
+    by_name = {}
+    info = {}
+    for code, name, english in COUNTIES:
+        info[code] = (name, english)
+        for key in (name, name.replace('臺', '台'), english, english.lower(), str(code)):
+            by_name[key] = code
+    for alias, target in COUNTY_ALIASES.items():
+        code = by_name[target]
+        for key in (alias, alias.replace('臺', '台'), alias.lower()):
+            by_name[key] = code
+
+    townships = {}
+    town_info = {}
+    children = {}
+    for county, names in TOWNSHIPS.items():
+        county_code = by_name[county]
+        children[county_code] = []
+        for i, town in enumerate(names, start=1):
+            town_code = county_code * 100 + i
+            townships[(county_code, town)] = town_code
+            town_info[town_code] = (county_code, town)
+            children[county_code].append(town_code)
+    for (county, alias), target in TOWNSHIP_ALIASES.items():
+        county_code = by_name[county]
+        townships[(county_code, alias)] = townships[(county_code, target)]
+
+    return by_name, info, townships, town_info, children
+
+
+_COUNTY_INDEX, _COUNTY_INFO, _TOWNSHIP_INDEX, _TOWNSHIP_INFO, _CHILDREN = _build_indexes()
+
+
+def county_code(name, default=UNKNOWN):
+    """查詢縣市代碼（接受中文、台/臺、英文、舊名稱或代碼字串）"""
+    key = str(name).strip()
+    code = _COUNTY_INDEX.get(key)
+    if code is None:
+        code = _COUNTY_INDEX.get(normalize_name(key), default)
+    return code
+
+
+def county_codes(values, strict=False):
+    """
+    將一整欄縣市名稱轉成代碼（int32，查無為 -1）
+
+    傳入 pd.Series 時回傳相同索引的 Series。strict=True 時遇到
+    無法辨識的名稱會拋出 KeyError，而不是默默地讓資料在合併時消失。
+    """
+    series = pd.Series(values)
+    uniques = series.dropna().unique()
+    lookup = {v: county_code(v) for v in uniques}
+    if strict:
+        missing = sorted(str(v) for v, c in lookup.items() if c == UNKNOWN)
+        if missing:
+            raise KeyError(f"無法辨識的縣市名稱: {missing}")
+    codes = series.map(lookup).fillna(UNKNOWN).astype(np.int32)
+    return codes if isinstance(values, pd.Series) else codes.to_numpy()
+
+
+# 縣市代碼 -> COUNTIES 中的位置（查表用的稠密陣列，查無為 -1）
+_POSITION_LOOKUP = np.full(max(code for code, _, _ in COUNTIES) + 1, UNKNOWN, dtype=np.int32)
+_POSITION_LOOKUP[[code for code, _, _ in COUNTIES]] = np.arange(len(COUNTIES))
+
+
+def county_positions(codes):
+    """縣市代碼陣列 -> 在 COUNTIES 中的位置（int32，查無為 -1）"""
+    codes = np.asarray(codes, dtype=np.int64)
+    valid = (codes >= 0) & (codes < len(_POSITION_LOOKUP))
+    return np.where(valid, _POSITION_LOOKUP[np.where(valid, codes, 0)], UNKNOWN).astype(np.int32)
+
+
+def county_name(code):
+    """縣市代碼 -> 標準中文名稱"""
+    return _COUNTY_INFO[code][0]
+
+
+def county_english(code):
+    """縣市代碼 -> GeoJSON 英文名稱"""
+    return _COUNTY_INFO[code][1]
+
+
+def english_mapping():
+    """回傳 中文名稱（含台/臺寫法）-> 英文名稱 的對照 dict"""
+    mapping = {}
+    for code, name, english in COUNTIES:
+        mapping[name] = english
+        mapping[name.replace('臺', '台')] = english
+    return mapping
+
+
+def township_code(county, township, default=UNKNOWN):
+    """查詢鄉鎮市區代碼；county 可為縣市名稱或代碼"""
+    c = county if isinstance(county, (int, np.integer)) else county_code(county)
+    return _TOWNSHIP_INDEX.get((c, normalize_name(township)), default)
+
+
+def township_codes(counties, townships):
+    """將縣市、鄉鎮兩欄一次轉成鄉鎮代碼（int32，查無為 -1）"""
+    pairs = pd.MultiIndex.from_arrays([county_codes(counties), np.asarray(townships)])
+    positions, uniques = pairs.factorize()
+    # 只對不重複的 (縣市, 鄉鎮) 組合查表，再以陣列索引展開
+    lookup = np.array([township_code(c, t) if isinstance(t, str) and t else UNKNOWN
+                       for c, t in uniques] + [UNKNOWN], dtype=np.int32)
+    return lookup[positions]
+
+
+def township_name(code):
+    """鄉鎮代碼 -> (縣市標準名稱, 鄉鎮標準名稱)"""
+    county, town = _TOWNSHIP_INFO[code]
+    return county_name(county), town
+
+
+def children(county):
+    """回傳縣市所屬的所有鄉鎮代碼"""
+    c = county if isinstance(county, (int, np.integer)) else county_code(county)
+    return list(_CHILDREN.get(c, []))
+
+
+def county_of(town_code):
+    """鄉鎮代碼 -> 所屬縣市代碼"""
+    return town_code // 100
@@ -0,0 +1,309 @@
+"""
+政府統計表（多列標題 CSV）的共用解析器
+
+警政統計的 CSV 都有 2–4 列標題、千分位逗號、「－」代表 0 或無資料，
+以及結尾的空列或附註。各表的版面集中寫在 SCHEMAS，解析時：
+
+1. 以 csv 模組讀一次，逐格去除空白與千分位逗號；
+2. 數值欄位整塊一次轉成 float64；表尾的「資料來源」「附註」之後不再讀取；
+3. 結果以 pickle 快取在 .cache/tables/，來源檔案未變更時直接載入。
+
+例：
+    df = gov_tables.load('主要警政統計指標1')
+"""
+import csv
+import functools
+import glob
+import io
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import geo_index
+from incident_data import BASE_DIR, _signature_matches, _source_signature
+
+TABLE_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'tables')
+CACHE_VERSION = 2
+
+# 視為缺值的儲存格內容
+NA_VALUES = {'', '－', '-', '—', '…', '...'}
+# 第一格以這些文字開頭的列為表尾附註，之後的列不再讀取
+FOOTNOTE_PREFIXES = ('資料來源', '附', '說明', '註')
+
+
+class TableSchema:
+    """
+    一張統計表的版面
+
+    file: 相對於專案根目錄的檔名
+    data_start: 資料開始的列號（0 起算）
+    columns: 欄位名稱；header_row 有值時，columns 只列出前面固定的欄位，
+             其餘由該列標題產生（去除空白與「(1)」之類的註腳編號）
+    text_columns: 不轉成數值的欄位
+    int_columns: 轉成整數的欄位（缺值的列會被移除）
+    fill_down: 只在群組第一列填寫、需向下補齊的欄位
+    drop: {欄位: [值, ...]}，要移除的列（例如非縣市的「署所屬機關」）
+    usecols: 只讀取這些位置的儲存格（0 起算，與 columns 一一對應），
+             用於跳過合併儲存格留下的空欄
+    """
+
+    def __init__(self, file, data_start, columns, text_columns, int_columns=(),
+                 header_row=None, fill_down=(), drop=None, usecols=None):
+        self.file = file
+        self.data_start = data_start
+        self.columns = list(columns)
+        self.text_columns = list(text_columns)
+        self.int_columns = list(int_columns)
+        self.header_row = header_row
+        self.fill_down = list(fill_down)
+        self.drop = drop or {}
+        self.usecols = list(usecols) if usecols is not None else None
+
+    @property
+    def path(self):
+        return os.path.join(BASE_DIR, self.file)
+
+    def column_names(self, rows):
+        if self.header_row is None:
+            return self.columns
+        header = rows[self.header_row][len(self.columns):]
+        return self.columns + [_clean_label(h) for h in header if h.strip()]
+
+
+def _clean_label(label):
+    label = re.sub(r'\s+', '', label)
+    return re.sub(r'\(\d+\)$', '', label)
+
+
+SCHEMAS = {
+    '主要警政統計指標1': TableSchema(
+        file='主要警政統計指標1V.csv',
+        data_start=5,
+        columns=['年別', '西元年',
+                 '全般刑案_發生數', '全般刑案_破獲數', '全般刑案_破獲率',
+                 '全般刑案_嫌疑犯', '全般刑案_犯罪率', '全般刑案_犯罪人口率',
+                 '暴力犯罪_發生數', '暴力犯罪_破獲數', '暴力犯罪_破獲率',
+                 '暴力犯罪_嫌疑犯', '暴力犯罪_犯罪率',
+                 '竊盜_發生數', '竊盜_破獲數', '竊盜_破獲率', '竊盜_嫌疑犯', '竊盜_犯罪率'],
+        text_columns=['年別'],
+        int_columns=['西元年'],
+    ),
+    '主要警政統計指標2': TableSchema(
+        file='主要警政統計指標2V.csv',
+        data_start=4,
+        columns=['機關別',
+                 '全般刑案_發生數', '全般刑案_破獲數', '全般刑案_破獲率',
+                 '全般刑案_嫌疑犯', '全般刑案_犯罪率', '全般刑案_犯罪人口率',
+                 '暴力犯罪_發生數', '暴力犯罪_破獲數', '暴力犯罪_破獲率',
+                 '暴力犯罪_嫌疑犯', '暴力犯罪_犯罪率',
+                 '竊盜_發生數', '竊盜_破獲數', '竊盜_破獲率', '竊盜_嫌疑犯', '竊盜_犯罪率'],
+        text_columns=['機關別'],
+        drop={'機關別': ['署所屬機關']},
+    ),
+    '暴力犯罪統計2': TableSchema(
+        file='暴力犯罪統計2V.csv',
+        data_start=4,
+        columns=['機關別', '總計_發生數', '總計_破獲率', '故意殺人_發生數', '故意殺人_破獲率',
+                 '擄人勒贖_發生數', '擄人勒贖_破獲率', '強盜_發生數', '強盜_破獲率',
+                 '搶奪_發生數', '搶奪_破獲率', '重傷害_發生數', '重傷害_破獲率',
+                 '恐嚇取財_發生數', '恐嚇取財_破獲率', '強制性交_發生數', '強制性交_破獲率'],
+        text_columns=['機關別'],
+        drop={'機關別': ['署所屬機關']},
+    ),
+    '竊盜統計2': TableSchema(
+        file='竊盜統計2V.csv',
+        data_start=5,
+        columns=['機關別'] + [f'{group}_{item}'
+                             for group in ('總計', '重大竊盜', '普通竊盜', '汽車竊盜', '機車竊盜')
+                             for item in ('發生數', '破獲數', '破獲率')],
+        text_columns=['機關別'],
+        drop={'機關別': ['署所屬機關']},
+    ),
+    # 87、88 年「服務」與「銷售」、「駕駛」與「機械設備操作」合併填在兩欄之間
+    '刑事案件嫌疑犯人數按職業別1': TableSchema(
+        file='刑事案件嫌疑犯人數－按職業別1V.csv',
+        data_start=4,
+        usecols=[0] + list(range(4, 22)),
+        columns=['年別', '總計', '民意代表主管及經理人員', '專業人員', '技術員及助理專業人員',
+                 '事務支援人員', '服務工作人員', '服務及銷售工作人員', '銷售及展示工作人員',
+                 '農林漁牧業生產人員', '保安服務工作人員', '技藝有關工作人員',
+                 '駕駛及移運設備操作人員', '駕駛及機械設備操作人員', '機械設備操作及組裝人員',
+                 '基層技術工及勞力工', '學生', '無職', '其他'],
+        text_columns=['年別'],
+    ),
+    # 各縣市（機關別）× 教育程度 × 性別；第 5 列為「男／女」的副標題
+    '刑事案件嫌疑犯人數按教育別2': TableSchema(
+        file='刑事案件嫌疑犯人數－按教育別2.csv',
+        data_start=5,
+        columns=['機關別'] + [f'{level}_{sex}'
+                             for level in ('總計', '不識字', '自修', '國小', '國中', '高中職',
+                                           '大專', '研究所', '其他')
+                             for sex in ('男', '女', '總和')],
+        text_columns=['機關別'],
+        drop={'機關別': ['民國112年']},
+    ),
+    '刑事案件按案類別1': TableSchema(
+        file='刑事案件發生數、破獲數及嫌疑犯人數－按案類別1V.csv',
+        data_start=5,
+        columns=['年別', '項目', 'Item'],
+        header_row=3,
+        text_columns=['年別', '項目', 'Item'],
+        fill_down=['年別'],
+    ),
+}
+
+
+def parse(schema):
+    """依 schema 解析 CSV（不使用快取）"""
+    with open(schema.path, encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.reader(f))
+
+    names = schema.column_names(rows)
+    width = len(names)
+    numeric = [i for i, name in enumerate(names) if name not in schema.text_columns]
+    text = [i for i, name in enumerate(names) if name in schema.text_columns]
+
+    text_block, numeric_block = [], []
+    last = {}
+    for row in rows[schema.data_start:]:
+        if row and row[0].strip().startswith(FOOTNOTE_PREFIXES):
+            break
+        if schema.usecols is not None:
+            row = [row[i] if i < len(row) else '' for i in schema.usecols]
+        row = [cell.strip() for cell in row[:width]]
+        row += [''] * (width - len(row))
+        if not any(row):
+            continue
+        for i in text:
+            name = names[i]
+            if name in schema.fill_down:
+                if row[i]:
+                    last[name] = row[i]
+                else:
+                    row[i] = last.get(name, '')
+        text_block.append([' '.join(row[i].split()) for i in text])
+        # 千分位逗號在切割時就去掉，缺值改為 nan，之後整塊轉換
+        numeric_block.append(['nan' if row[i] in NA_VALUES else row[i].replace(',', '')
+                              for i in numeric])
+
+    values = np.array(numeric_block, dtype=np.float64).reshape(len(numeric_block), len(numeric))
+    data = {names[i]: [r[j] for r in text_block] for j, i in enumerate(text)}
+    data.update({names[i]: values[:, j] for j, i in enumerate(numeric)})
+    df = pd.DataFrame(data)[names]
+
+    for col, labels in schema.drop.items():
+        df = df[~df[col].isin(labels)]
+    for col in schema.int_columns:
+        df = df[df[col].notna()]
+        df[col] = df[col].astype(np.int64)
+    return df.reset_index(drop=True)
+
+
+def _cache_paths(name):
+    return (os.path.join(TABLE_CACHE_DIR, f'{name}.pkl'),
+            os.path.join(TABLE_CACHE_DIR, f'{name}.json'))
+
+
+def load(name, use_cache=True):
+    """讀取已登記的統計表；來源未變更時使用快取"""
+    schema = SCHEMAS[name]
+    data_path, meta_path = _cache_paths(name)
+
+    if use_cache:
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+        if meta is not None and meta.get('version') == CACHE_VERSION:
+            fresh, touched = _signature_matches(meta['source'], schema.path)
+            if fresh:
+                if touched:
+                    _write_json(meta_path, meta)
+                return pd.read_pickle(data_path)
+
+    df = parse(schema)
+    if use_cache:
+        os.makedirs(TABLE_CACHE_DIR, exist_ok=True)
+        df.to_pickle(data_path)
+        _write_json(meta_path, {'version': CACHE_VERSION, 'file': schema.file,
+                                'source': _source_signature(schema.path)})
+    return df
+
+
+def _write_json(path, meta):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+RATE_DIR = os.path.join(BASE_DIR, '行政區犯罪人口率統計V')
+RATE_METRICS = ['犯罪人口率', '少年犯罪人口率', '青年犯罪人口率', '成年犯罪人口率']
+
+
+def _read_text(path):
+    """年度檔有 UTF-8 與 Big5 兩種編碼"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    try:
+        return raw.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return raw.decode('cp950')
+
+
+class CountyRates:
+    """
+    各年度各縣市的犯罪人口率
+
+    values[year, county, metric]，county 依 geo_index.COUNTIES 的順序，
+    可直接交給 boundary_store.bind()。
+    """
+
+    def __init__(self, years, values):
+        self.years = np.asarray(years)
+        self.metrics = list(RATE_METRICS)
+        self.values = values
+
+    def vector(self, year, metric='犯罪人口率'):
+        """某年某指標的各縣市數值（COUNTIES 順序）"""
+        y = int(np.flatnonzero(self.years == year)[0])
+        return self.values[y, :, self.metrics.index(metric)]
+
+    def to_frame(self):
+        """長表：year, county_code, 縣市名稱, 各指標"""
+        n_years, n_counties, _ = self.values.shape
+        codes = [code for code, _, _ in geo_index.COUNTIES]
+        names = [name for _, name, _ in geo_index.COUNTIES]
+        df = pd.DataFrame(self.values.reshape(-1, len(self.metrics)), columns=self.metrics)
+        df.insert(0, '縣市名稱', np.tile(names, n_years))
+        df.insert(0, 'county_code', np.tile(codes, n_years))
+        df.insert(0, 'year', np.repeat(self.years, n_counties))
+        return df
+
+
+@functools.lru_cache(maxsize=None)
+def county_rates(directory=RATE_DIR):
+    """讀取 行政區犯罪人口率統計V 的所有年度檔（同一行程內只讀一次）"""
+    paths = sorted(glob.glob(os.path.join(directory, '*年行政區犯罪人口率統計_縣市.csv')))
+    years = [int(re.match(r'(\d+)年', os.path.basename(p)).group(1)) for p in paths]
+    values = np.full((len(paths), len(geo_index.COUNTIES), len(RATE_METRICS)), np.nan)
+
+    for y, path in enumerate(paths):
+        # 前兩列為英文欄位代碼與中文標題
+        rows = list(csv.reader(io.StringIO(_read_text(path))))[2:]
+        rows = [row for row in rows if row and row[0].strip()]
+        positions = geo_index.county_positions([int(row[0]) for row in rows])
+        block = [['nan' if cell.strip() in NA_VALUES else cell.replace(',', '')
+                  for cell in row[2:2 + len(RATE_METRICS)]] for row in rows]
+        keep = positions >= 0
+        values[y, positions[keep]] = np.array(block, dtype=np.float64)[keep]
+    return CountyRates(years, values)
+
+
+if __name__ == '__main__':
+    for name in SCHEMAS:
+        df = load(name)
+        print(f"{name}: {df.shape}")
+        print(df.head(3).to_string())
@@ -0,0 +1,244 @@
+"""
+犯罪資料的點陣圖索引
+
+對 type、oc_county、oc_region 與年度的每個值各建一個壓縮點陣圖
+（類 Roaring 結構：列號按 65536 分段，稀疏段存排序過的 uint16 陣列，
+密集段存 1024 個 uint64 位元字），多條件查詢只需點陣圖的 AND / OR，
+再以 popcount 計數或取出列號，不必對整份資料各做一次布林遮罩。
+
+例：
+    index = BitmapIndex(incident_data.load_years())
+    index.count(type='毒品', oc_county='臺中市', year=112)
+    index.select(type=['汽車竊盜', '機車竊盜'], year=range(110, 114))
+"""
+from functools import reduce
+
+import numpy as np
+
+from geo_index import normalize_name
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+# 段內筆數超過此值時改用位元字儲存（與 Roaring 相同的門檻）
+ARRAY_LIMIT = 4096
+WORDS = CHUNK_SIZE // 64
+
+INDEXED_COLUMNS = ('type', 'oc_county', 'oc_region', 'year')
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        return int(np.bitwise_count(words).sum())
+else:
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(words):
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def _array_to_words(values):
+    bits = np.zeros(CHUNK_SIZE, dtype=bool)
+    bits[values] = True
+    return np.packbits(bits, bitorder='little').view(np.uint64)
+
+
+def _words_to_array(words):
+    bits = np.unpackbits(words.view(np.uint8), bitorder='little')
+    return np.flatnonzero(bits).astype(np.uint16)
+
+
+def _is_words(container):
+    return container.dtype == np.uint64
+
+
+def _shrink(words):
+    """位元字容器筆數降到門檻以下時轉回陣列"""
+    return _words_to_array(words) if _popcount(words) <= ARRAY_LIMIT else words
+
+
+def _and(a, b):
+    if _is_words(a) and _is_words(b):
+        return _shrink(a & b)
+    if _is_words(a):
+        a, b = b, a
+    if _is_words(b):
+        # 陣列 AND 位元字：逐一檢查位元
+        hit = (b[a >> 6] >> (a & 63).astype(np.uint64)) & np.uint64(1)
+        return a[hit.astype(bool)]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def _or(a, b):
+    if not _is_words(a) and not _is_words(b):
+        merged = np.union1d(a, b)
+        return _array_to_words(merged) if len(merged) > ARRAY_LIMIT else merged
+    if not _is_words(a):
+        a = _array_to_words(a)
+    if not _is_words(b):
+        b = _array_to_words(b)
+    return a | b
+
+
+def _size(container):
+    return _popcount(container) if _is_words(container) else len(container)
+
+
+class Bitmap:
+    """壓縮點陣圖：keys 為段號（列號 >> 16），containers 為各段內容"""
+
+    def __init__(self, keys, containers):
+        self.keys = keys
+        self.containers = containers
+
+    @classmethod
+    def from_indices(cls, indices):
+        """由遞增排序的列號建立"""
+        indices = np.asarray(indices, dtype=np.int64)
+        if not len(indices):
+            return cls(np.empty(0, dtype=np.int64), [])
+        high = indices >> CHUNK_BITS
+        bounds = np.flatnonzero(np.diff(high)) + 1
+        keys = high[np.r_[0, bounds]]
+        containers = []
+        for part in np.split(indices, bounds):
+            low = (part & (CHUNK_SIZE - 1)).astype(np.uint16)
+            containers.append(_array_to_words(low) if len(low) > ARRAY_LIMIT else low)
+        return cls(keys, containers)
+
+    def __and__(self, other):
+        keys, ia, ib = np.intersect1d(self.keys, other.keys, assume_unique=True,
+                                      return_indices=True)
+        out_keys, out = [], []
+        for key, i, j in zip(keys, ia, ib):
+            c = _and(self.containers[i], other.containers[j])
+            if _size(c):
+                out_keys.append(key)
+                out.append(c)
+        return Bitmap(np.array(out_keys, dtype=np.int64), out)
+
+    def __or__(self, other):
+        keys = np.union1d(self.keys, other.keys)
+        mine = dict(zip(self.keys.tolist(), self.containers))
+        theirs = dict(zip(other.keys.tolist(), other.containers))
+        out = []
+        for key in keys.tolist():
+            a, b = mine.get(key), theirs.get(key)
+            out.append(a if b is None else b if a is None else _or(a, b))
+        return Bitmap(keys, out)
+
+    def __len__(self):
+        """popcount：點陣圖中的列數"""
+        return sum(_size(c) for c in self.containers)
+
+    def to_indices(self):
+        """回傳遞增排序的列號（int64）"""
+        if not self.containers:
+            return np.empty(0, dtype=np.int64)
+        parts = []
+        for key, c in zip(self.keys.tolist(), self.containers):
+            low = _words_to_array(c) if _is_words(c) else c
+            parts.append((key << CHUNK_BITS) + low.astype(np.int64))
+        return np.concatenate(parts)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + sum(c.nbytes for c in self.containers)
+
+
+def _group_bitmaps(codes, n_values):
+    """依代碼分組列號，回傳每個代碼的點陣圖（代碼 -1 略過）"""
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes[codes >= 0], minlength=n_values)
+    # 缺值（-1）排在最前面
+    start = int(np.count_nonzero(codes < 0))
+    bitmaps = []
+    for n in counts:
+        bitmaps.append(Bitmap.from_indices(order[start:start + n]))
+        start += n
+    return bitmaps
+
+
+class BitmapIndex:
+    """IncidentTable 各欄位值 -> 點陣圖"""
+
+    def __init__(self, table):
+        self.table = table
+        self.index = {}
+        for col in ('type', 'oc_county', 'oc_region'):
+            categories = table.categories[col]
+            bitmaps = _group_bitmaps(table.codes[col], len(categories))
+            values = {}
+            for value, bitmap in zip(categories, bitmaps):
+                # 縣市名稱「台」「臺」併為同一個值
+                if col == 'oc_county':
+                    value = normalize_name(value)
+                values[value] = values[value] | bitmap if value in values else bitmap
+            self.index[col] = values
+
+        years, year_codes = np.unique(np.asarray(table.oc_year), return_inverse=True)
+        self.index['year'] = dict(zip(years.tolist(), _group_bitmaps(year_codes, len(years))))
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for values in self.index.values() for b in values.values())
+
+    def values(self, col):
+        """欄位已建立索引的所有值"""
+        return list(self.index[col])
+
+    def lookup(self, col, value):
+        """單一值的點陣圖；值為清單或 range 時回傳各值的 OR"""
+        if col not in self.index:
+            raise ValueError(f"未建立索引的欄位: {col}")
+        if isinstance(value, (str, int, np.integer)):
+            value = [value]
+        empty = Bitmap.from_indices([])
+        values = self.index[col]
+        bitmaps = []
+        for v in value:
+            if col == 'oc_county':
+                v = normalize_name(v)
+            bitmaps.append(values.get(int(v) if col == 'year' else v, empty))
+        return reduce(Bitmap.__or__, bitmaps, empty)
+
+    def select(self, **predicates):
+        """
+        各欄位條件 AND 起來的點陣圖
+
+        predicates 的鍵為 INDEXED_COLUMNS，值為單一值或清單（清單內為 OR）。
+        """
+        unknown = set(predicates) - set(INDEXED_COLUMNS)
+        if unknown:
+            raise ValueError(f"未建立索引的欄位: {sorted(unknown)}")
+        if not predicates:
+            return Bitmap.from_indices(np.arange(len(self.table)))
+        bitmaps = [self.lookup(col, value) for col, value in predicates.items()]
+        # 由小到大 AND，中間結果盡早縮小
+        bitmaps.sort(key=len)
+        return reduce(Bitmap.__and__, bitmaps)
+
+    def count(self, **predicates):
+        """符合條件的筆數"""
+        return len(self.select(**predicates))
+
+    def rows(self, **predicates):
+        """符合條件的資料（IncidentTable）"""
+        return self.table.take(self.select(**predicates).to_indices())
+
+
+if __name__ == '__main__':
+    import time
+
+    import incident_data
+
+    table = incident_data.load_years()
+    start = time.perf_counter()
+    index = BitmapIndex(table)
+    print(f"建立索引 {time.perf_counter() - start:.2f} 秒，{index.nbytes / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    n = index.count(type='毒品', oc_county='臺中市', year=112)
+    print(f"毒品／臺中市／112 年：{n} 筆，{(time.perf_counter() - start) * 1000:.2f} ms")
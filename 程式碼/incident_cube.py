@@ -0,0 +1,311 @@
+"""
+犯罪資料預先彙總的 OLAP 立方體
+
+在轉入資料時一次算好「案類 × 年 × 月 × 鄉鎮市區」的件數陣列，
+之後的切片與彙總（例如「機車竊盜、110–113 年、新北市、按月」）只是
+陣列索引與加總，不必再掃描整份資料。
+
+鄉鎮維度以「槽位」表示：每個縣市依序為其所有鄉鎮，再加一個
+「縣市內未註明鄉鎮」的槽位，最後一個槽位為無法辨識的縣市。
+另外保存縣市層級的立方體，縣市查詢不必加總鄉鎮。
+"""
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+import geo_index
+import incident_data
+from incident_data import MISSING
+
+CUBE_PATH = os.path.join(incident_data.BASE_DIR, '.cache', 'incident_cube.npz')
+
+# 月份維度：0 為日期無效，1–12 為各月
+MONTHS = np.arange(13)
+
+DIMENSIONS = ('type', 'year', 'month', 'county', 'township')
+
+
+def _build_slots():
+    """建立鄉鎮槽位：回傳（各槽位的縣市索引, 各槽位的鄉鎮代碼）"""
+    slot_county, slot_township = [], []
+    for i, (code, _, _) in enumerate(geo_index.COUNTIES):
+        for town in geo_index.children(code):
+            slot_county.append(i)
+            slot_township.append(town)
+        # 縣市內未註明鄉鎮
+        slot_county.append(i)
+        slot_township.append(MISSING)
+    # 無法辨識的縣市
+    slot_county.append(len(geo_index.COUNTIES))
+    slot_township.append(MISSING)
+    return np.array(slot_county), np.array(slot_township)
+
+
+SLOT_COUNTY, SLOT_TOWNSHIP = _build_slots()
+COUNTY_CODES = np.array([code for code, _, _ in geo_index.COUNTIES] + [MISSING])
+COUNTY_NAMES = [name for _, name, _ in geo_index.COUNTIES] + ['未知']
+# 縣市代碼 -> 縣市維度索引（未知縣市為最後一個）
+_COUNTY_POSITION = {code: i for i, code in enumerate(COUNTY_CODES)}
+
+
+def _sorted_index(axis, values):
+    """已排序的維度標籤中各值的位置；找不到時拋出 KeyError"""
+    idx = np.searchsorted(axis, values)
+    for i, value in zip(idx.tolist(), values):
+        if i >= len(axis) or axis[i] != value:
+            raise KeyError(value)
+    return idx
+
+
+class IncidentCube:
+    """
+    件數立方體
+
+    counts[type, year, month, slot] 為各鄉鎮槽位件數；
+    county_counts[type, year, month, county] 為縣市層級件數。
+    """
+
+    def __init__(self, counts, types, years):
+        self.counts = counts
+        self.types = np.asarray(types, dtype=str)
+        self.years = np.asarray(years)
+        # 槽位依縣市排序，可用 reduceat 彙總到縣市
+        starts = np.flatnonzero(np.r_[True, SLOT_COUNTY[1:] != SLOT_COUNTY[:-1]])
+        self.county_counts = np.add.reduceat(counts, starts, axis=3)
+        self._slot_of = _slot_lookup()
+
+    @classmethod
+    def build(cls, table):
+        """由 IncidentTable 建立立方體"""
+        types = table.categories['type']
+        years = np.unique(np.asarray(table.oc_year))
+        years = years[years != MISSING]
+
+        type_idx = np.asarray(table.codes['type']).astype(np.int64)
+        year_idx = np.searchsorted(years, np.asarray(table.oc_year)).astype(np.int64)
+        dates = incident_data.decode_dates(table.oc_year, table.oc_data)
+        month_idx = np.where(dates['valid'], np.asarray(table.oc_data) // 100, 0).astype(np.int64)
+        slot_idx = _slot_index(table)
+
+        # 案類或年度缺值的資料無法放進立方體
+        keep = (type_idx >= 0) & (np.asarray(table.oc_year) != MISSING)
+        shape = (len(types), len(years), len(MONTHS), len(SLOT_COUNTY))
+        flat = np.ravel_multi_index(
+            (type_idx[keep], year_idx[keep], month_idx[keep], slot_idx[keep]), shape)
+        counts = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(counts.astype(np.int32), types, years)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def _axis_index(self, dim, value):
+        """
+        將篩選條件轉成該維度的索引陣列
+
+        不在維度上的值（不存在的案類、年度、月份或縣市）拋出 KeyError，
+        不會默默地取到相鄰的資料。
+        """
+        if value is None:
+            return None
+        values = [value] if isinstance(value, (str, int, np.integer, tuple)) else list(value)
+        if dim == 'type':
+            return _sorted_index(self.types, values)
+        if dim == 'year':
+            return _sorted_index(self.years, values)
+        if dim == 'month':
+            return _sorted_index(MONTHS, values)
+        if dim == 'county':
+            positions = []
+            for v in values:
+                code = v
+                if isinstance(v, str):
+                    # 「未知」為無法辨識縣市的槽位，其他查不到的名稱視為錯誤
+                    code = MISSING if v == COUNTY_NAMES[-1] else geo_index.county_code(v, None)
+                if code not in _COUNTY_POSITION:
+                    raise KeyError(v)
+                positions.append(_COUNTY_POSITION[code])
+            return np.array(positions, dtype=np.int64)
+        if dim == 'township':
+            slots = []
+            for v in values:
+                code = geo_index.township_code(*v) if isinstance(v, tuple) else v
+                if code not in self._slot_of:
+                    raise KeyError(v)
+                slots.append(self._slot_of[code])
+            return np.asarray(slots)
+        raise ValueError(f"不支援的維度: {dim}")
+
+    def query(self, by=(), **filters):
+        """
+        切片並彙總，回傳依 by 順序排列維度的 ndarray（by 為空時回傳整數）
+
+        filters 可指定 type、year、month、county、township，值可為單一值
+        或清單／range；township 為（縣市, 鄉鎮）或鄉鎮代碼。
+        例：cube.query(by=['month'], type='機車竊盜', year=range(110, 114), county='新北市')
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = (set(by) | set(filters)) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"不支援的維度: {sorted(unknown)}")
+
+        use_township = 'township' in by or filters.get('township') is not None
+        if use_township:
+            data = self.counts
+            axes = ['type', 'year', 'month', 'township']
+            if filters.get('county') is not None:
+                # 縣市篩選轉成該縣市所有槽位
+                county_idx = self._axis_index('county', filters['county'])
+                mask = np.isin(SLOT_COUNTY, county_idx)
+                if filters.get('township') is not None:
+                    mask &= np.isin(np.arange(len(SLOT_COUNTY)),
+                                    self._axis_index('township', filters['township']))
+                index = {'township': np.flatnonzero(mask)}
+            else:
+                index = {'township': self._axis_index('township', filters.get('township'))}
+            if 'county' in by:
+                raise ValueError("county 與 township 請擇一作為 by 維度")
+        else:
+            data = self.county_counts
+            axes = ['type', 'year', 'month', 'county']
+            index = {'county': self._axis_index('county', filters.get('county'))}
+        for dim in ('type', 'year', 'month'):
+            index[dim] = self._axis_index(dim, filters.get(dim))
+
+        for axis, dim in enumerate(axes):
+            if index[dim] is not None:
+                data = np.take(data, index[dim], axis=axis)
+
+        drop = tuple(i for i, dim in enumerate(axes) if dim not in by)
+        data = data.sum(axis=drop)
+        if not by:
+            return int(data)
+        kept = [dim for dim in axes if dim in by]
+        return np.moveaxis(data, [kept.index(d) for d in by], range(len(by)))
+
+    def labels(self, dim, **filters):
+        """回傳 query() 結果在該維度的標籤（考慮相同的篩選條件）"""
+        if dim == 'type':
+            labels = list(self.types)
+        elif dim == 'year':
+            labels = self.years.tolist()
+        elif dim == 'month':
+            labels = MONTHS.tolist()
+        elif dim == 'county':
+            labels = COUNTY_NAMES
+        elif dim == 'township':
+            labels = [geo_index.township_name(int(t)) if t != MISSING
+                      else (COUNTY_NAMES[c], '') for t, c in zip(SLOT_TOWNSHIP, SLOT_COUNTY)]
+        else:
+            raise ValueError(f"不支援的維度: {dim}")
+
+        value = filters.get(dim)
+        if dim == 'township' and filters.get('county') is not None:
+            county_idx = self._axis_index('county', filters['county'])
+            slots = np.flatnonzero(np.isin(SLOT_COUNTY, county_idx))
+            if value is not None:
+                slots = slots[np.isin(slots, self._axis_index('township', value))]
+            return [labels[i] for i in slots]
+        if value is None:
+            return labels
+        return [labels[i] for i in self._axis_index(dim, value)]
+
+    def query_series(self, by, **filters):
+        """query() 的 pandas 版本，方便直接交給既有的繪圖程式"""
+        by = [by] if isinstance(by, str) else list(by)
+        data = self.query(by, **filters)
+        index = pd.MultiIndex.from_product([self.labels(d, **filters) for d in by], names=by)
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.Series(data.ravel(), index=index, name='count')
+
+    def save(self, path=CUBE_PATH, key=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, counts=self.counts, types=self.types, years=self.years,
+                 key=json.dumps(key, ensure_ascii=False))
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with np.load(path) as data:
+            cube = cls(data['counts'], data['types'], data['years'])
+            cube.key = json.loads(str(data['key']))
+        return cube
+
+
+def _slot_index(table):
+    """計算每筆資料的鄉鎮槽位（只對不重複的 縣市 × 鄉鎮 組合查表）"""
+    county_cats = table.categories['oc_county']
+    region_cats = table.categories['oc_region']
+    county_codes = np.asarray(table.codes['oc_county']).astype(np.int64)
+    region_codes = np.asarray(table.codes['oc_region']).astype(np.int64)
+
+    # 縣市對照表 -> 縣市索引（-1 與無法辨識者歸入最後一個「未知」）
+    unknown_county = len(geo_index.COUNTIES)
+    county_of_cat = np.array(
+        [_county_index(c) for c in county_cats] + [unknown_county], dtype=np.int64)
+    county_idx = county_of_cat[county_codes]
+
+    # 各縣市「未註明鄉鎮」槽位
+    county_slot = np.flatnonzero(SLOT_TOWNSHIP == MISSING)
+    slot_of = _slot_lookup()
+
+    n_regions = len(region_cats) + 1
+    pair = county_idx * n_regions + np.where(region_codes < 0, len(region_cats), region_codes)
+    uniques, inverse = np.unique(pair, return_inverse=True)
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for i, key in enumerate(uniques):
+        c, r = divmod(int(key), n_regions)
+        slot = county_slot[c]
+        if c != unknown_county and r < len(region_cats):
+            town = geo_index.township_code(int(COUNTY_CODES[c]), region_cats[r])
+            slot = slot_of.get(town, slot)
+        lookup[i] = slot
+    return lookup[inverse]
+
+
+def _slot_lookup():
+    """鄉鎮代碼 -> 槽位"""
+    return {int(t): i for i, t in enumerate(SLOT_TOWNSHIP) if t != MISSING}
+
+
+def _county_index(name):
+    code = geo_index.county_code(name)
+    return _COUNTY_POSITION[code] if code != MISSING else len(geo_index.COUNTIES)
+
+
+def _cache_key(years):
+    """以各年度快取記錄的來源雜湊（與解析版本）作為立方體的鍵"""
+    key = {}
+    for year in years:
+        meta = incident_data._read_meta(year)
+        key[str(year)] = {kind: f['sha1'] for kind, f in meta['files'].items()}
+        key[str(year)]['version'] = meta['version']
+    return key
+
+
+def load_cube(years=incident_data.YEARS, rebuild=False):
+    """讀取（必要時重建）立方體；來源資料未變更時直接載入快取"""
+    years = list(years)
+    incident_data.ingest(years)
+    key = _cache_key(years)
+    if not rebuild and os.path.exists(CUBE_PATH):
+        cube = IncidentCube.load()
+        if cube.key == key:
+            return cube
+    cube = IncidentCube.build(incident_data.load_years(years))
+    cube.save(key=key)
+    cube.key = key
+    return cube
+
+
+if __name__ == '__main__':
+    import time
+
+    cube = load_cube()
+    start = time.perf_counter()
+    series = cube.query_series('month', type='機車竊盜', year=range(110, 114), county='新北市')
+    elapsed = time.perf_counter() - start
+    print(series)
+    print(f"總件數 {cube.total:,}，查詢 {elapsed * 1000:.2f} ms")
@@ -0,0 +1,183 @@
+"""
+大型犯罪資料匯出檔的串流讀取與彙總
+
+與年度檔相同欄位（type, oc_year, oc_data, oc_county, oc_region）的 CSV
+以固定筆數分批讀入，每批立即折算成「案類 × 縣市 × 年 × 月」的件數，
+記憶體用量只與不同組合的數量有關，與檔案大小無關。
+
+count_by() 等彙總函式同時接受完整資料（DataFrame / IncidentTable）
+或串流彙總結果（IncidentCounts）。
+"""
+import numpy as np
+import pandas as pd
+
+from incident_data import IncidentTable, clean_frame, decode_dates
+from geo_index import normalize_name
+
+DEFAULT_CHUNKSIZE = 500_000
+
+# 彙總的維度
+DIMENSIONS = ['type', 'oc_county', 'oc_year', 'month']
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE, encoding='utf-8-sig'):
+    """
+    逐批讀取 CSV，每批為型別固定的 DataFrame（格式同 read_incident_csv()）
+
+    若第二列為中文標題（案類, 發生年度, ...）會自動略過。
+    """
+    reader = pd.read_csv(path, encoding=encoding, dtype=str, keep_default_na=False,
+                         chunksize=chunksize)
+    for i, chunk in enumerate(reader):
+        if i == 0 and len(chunk) and chunk.iloc[0]['type'] == '案類':
+            chunk = chunk.iloc[1:]
+        yield clean_frame(chunk)
+
+
+class _Vocabulary:
+    """串流過程中逐步擴充的 字串 -> 代碼 對照表"""
+
+    def __init__(self, normalize=None):
+        self.normalize = normalize
+        self.index = {}
+        self.values = []
+
+    def encode(self, values):
+        # 只對每批中不重複的值查表（與正規化），再以陣列索引展開
+        positions, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        for i, value in enumerate(uniques):
+            if self.normalize is not None:
+                value = self.normalize(value)
+            code = self.index.get(value)
+            if code is None:
+                code = self.index[value] = len(self.values)
+                self.values.append(value)
+            lookup[i] = code
+        return lookup[positions]
+
+
+class IncidentCounts:
+    """
+    串流彙總結果：每個（案類, 縣市, 年, 月）組合的件數
+
+    types、counties 為對照表；type_code、county_code、oc_year、month、
+    count 為等長陣列。月份無效時 month 為 0。
+    """
+
+    def __init__(self, types, counties, type_code, county_code, oc_year, month, count):
+        self.types = np.asarray(types, dtype=str)
+        self.counties = np.asarray(counties, dtype=str)
+        self.type_code = type_code
+        self.county_code = county_code
+        self.oc_year = oc_year
+        self.month = month
+        self.count = count
+
+    @property
+    def total(self):
+        return int(self.count.sum())
+
+    def to_frame(self):
+        """轉成長表 DataFrame（type, oc_county, oc_year, month, count）"""
+        return pd.DataFrame({
+            'type': pd.Categorical.from_codes(self.type_code, categories=self.types),
+            'oc_county': pd.Categorical.from_codes(self.county_code, categories=self.counties),
+            'oc_year': self.oc_year,
+            'month': self.month,
+            'count': self.count,
+        })
+
+
+class _Accumulator:
+    """以 64 位元複合鍵累加件數，只保留不同組合"""
+
+    def __init__(self):
+        self.types = _Vocabulary()
+        # 縣市名稱統一為「臺」的寫法
+        self.counties = _Vocabulary(normalize_name)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def add(self, oc_type, county, oc_year, oc_data):
+        type_code = self.types.encode(oc_type)
+        county_code = self.counties.encode(county)
+        dates = decode_dates(oc_year, oc_data)
+        month = np.where(dates['valid'], np.asarray(oc_data) // 100, 0)
+        year = np.asarray(oc_year, dtype=np.int64) & 0xFFFF
+
+        # 鍵：案類 16 位元 | 縣市 16 位元 | 年 16 位元 | 月 16 位元
+        keys = (type_code << 48) | (county_code << 32) | (year << 16) | month
+        keys, counts = np.unique(keys, return_counts=True)
+
+        merged, inverse = np.unique(np.concatenate([self.keys, keys]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]),
+                                  minlength=len(merged)).astype(np.int64)
+        self.keys = merged
+
+    def result(self):
+        keys = self.keys
+        year = ((keys >> 16) & 0xFFFF).astype(np.int16)
+        return IncidentCounts(
+            self.types.values, self.counties.values,
+            (keys >> 48).astype(np.int16), ((keys >> 32) & 0xFFFF).astype(np.int16),
+            year, (keys & 0xFFFF).astype(np.int8), self.counts.copy())
+
+
+def aggregate_chunks(chunks):
+    """將 iter_chunks() 產生的各批資料（DataFrame 或 IncidentTable）折算為 IncidentCounts"""
+    acc = _Accumulator()
+    for chunk in chunks:
+        if isinstance(chunk, IncidentTable):
+            acc.add(chunk.decode('type'), chunk.decode('oc_county'),
+                    chunk.oc_year, chunk.oc_data)
+        else:
+            acc.add(chunk['type'].astype(object).fillna('').to_numpy(),
+                    chunk['oc_county'].astype(object).fillna('').to_numpy(),
+                    chunk['oc_year'].to_numpy(), chunk['oc_data'].to_numpy())
+    return acc.result()
+
+
+def aggregate_file(path, chunksize=DEFAULT_CHUNKSIZE):
+    """串流讀取單一 CSV 並回傳 IncidentCounts"""
+    return aggregate_chunks(iter_chunks(path, chunksize))
+
+
+def _to_counts_frame(data):
+    """將各種輸入統一轉成（DIMENSIONS + count）的長表"""
+    if isinstance(data, IncidentCounts):
+        return data.to_frame()
+    if isinstance(data, (IncidentTable, pd.DataFrame)):
+        return aggregate_chunks([data]).to_frame()
+    raise TypeError(f"不支援的資料型別: {type(data).__name__}")
+
+
+def count_by(data, by):
+    """
+    依指定維度計算件數
+
+    data 可為完整資料（DataFrame、IncidentTable）或 IncidentCounts；
+    by 為 DIMENSIONS 中的欄位名稱（或其清單）。
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    unknown = set(by) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"不支援的維度: {sorted(unknown)}")
+    frame = _to_counts_frame(data)
+    return frame.groupby(by, observed=True)['count'].sum().sort_index()
+
+
+def counts_by_type(data):
+    """各案類件數"""
+    return count_by(data, 'type').sort_values(ascending=False)
+
+
+def counts_by_county(data):
+    """各縣市件數"""
+    return count_by(data, 'oc_county').sort_values(ascending=False)
+
+
+def monthly_counts(data):
+    """案類 × 年 × 月 件數（不含月份無效的資料）"""
+    counts = count_by(data, ['type', 'oc_year', 'month'])
+    return counts[counts.index.get_level_values('month') > 0]
@@ -0,0 +1,93 @@
+"""
+地圖標籤的配置
+
+給定各區域的標籤位置（boundary_store.label_points()）與文字，一次算出
+所有候選位置（置中、右、左、上、下、四個斜角）的外框與彼此的衝突矩陣，
+再依優先順序逐一挑第一個不衝突的候選位置；放不下的標籤不顯示。
+
+    x, y, visible = place_labels(ax, px, py, texts, fontsize=8)
+    draw_labels(ax, px, py, texts, fontsize=8, priority=values)
+"""
+import unicodedata
+
+import numpy as np
+
+# 候選位置：以標籤寬、高為單位的位移，依序嘗試
+OFFSETS = np.array([
+    (0, 0), (0.6, 0), (-0.6, 0), (0, 0.7), (0, -0.7),
+    (0.6, 0.7), (-0.6, 0.7), (0.6, -0.7), (-0.6, -0.7),
+])
+
+LINE_HEIGHT = 1.2
+
+
+def _text_extent(text):
+    """以字寬（em）估計文字的寬與高：全形字 1 em，其他 0.6 em"""
+    lines = str(text).split('\n')
+    width = max(sum(1.0 if unicodedata.east_asian_width(ch) in 'WF' else 0.6 for ch in line)
+                for line in lines)
+    return width, len(lines) * LINE_HEIGHT
+
+
+def _data_per_pixel(ax):
+    """目前座標範圍下，每像素對應的資料單位（x, y）"""
+    inverse = ax.transData.inverted()
+    (x0, y0), (x1, y1) = inverse.transform([(0, 0), (1, 1)])
+    return abs(x1 - x0), abs(y1 - y0)
+
+
+def label_boxes(ax, x, y, texts, fontsize=8, padding=2, offsets=OFFSETS):
+    """所有標籤、所有候選位置的外框，形狀為 (標籤數, 候選數, 4)：x0, y0, x1, y1"""
+    extents = np.array([_text_extent(t) for t in texts]).reshape(-1, 2)
+    px = fontsize * ax.figure.dpi / 72
+    sx, sy = _data_per_pixel(ax)
+    w = (extents[:, 0] * px + 2 * padding) * sx
+    h = (extents[:, 1] * px + 2 * padding) * sy
+
+    cx = np.asarray(x, dtype=float)[:, None] + offsets[None, :, 0] * w[:, None]
+    cy = np.asarray(y, dtype=float)[:, None] + offsets[None, :, 1] * h[:, None]
+    return np.stack([cx - w[:, None] / 2, cy - h[:, None] / 2,
+                     cx + w[:, None] / 2, cy + h[:, None] / 2], axis=-1)
+
+
+def place_labels(ax, x, y, texts, fontsize=8, priority=None, padding=2, offsets=OFFSETS):
+    """
+    配置不重疊的標籤，回傳（標籤中心 x, 標籤中心 y, 是否顯示）
+
+    priority 越大越先配置（預設依傳入順序）。需在座標範圍確定後呼叫。
+    """
+    n = len(texts)
+    boxes = label_boxes(ax, x, y, texts, fontsize, padding, offsets)
+    k = boxes.shape[1]
+    flat = boxes.reshape(-1, 4)
+
+    # 所有候選外框兩兩之間是否重疊（同一標籤的候選彼此不算）
+    conflict = ((flat[:, None, 0] < flat[None, :, 2]) & (flat[None, :, 0] < flat[:, None, 2]) &
+                (flat[:, None, 1] < flat[None, :, 3]) & (flat[None, :, 1] < flat[:, None, 3]))
+    owner = np.repeat(np.arange(n), k)
+    conflict &= owner[:, None] != owner[None, :]
+
+    order = np.arange(n) if priority is None else np.argsort(-np.asarray(priority), kind='stable')
+    blocked = np.zeros(n * k, dtype=bool)
+    chosen = np.full(n, -1)
+    for i in order:
+        free = np.flatnonzero(~blocked[i * k:(i + 1) * k])
+        if len(free):
+            c = i * k + free[0]
+            chosen[i] = free[0]
+            blocked |= conflict[c]
+
+    visible = chosen >= 0
+    pick = np.where(visible, chosen, 0)
+    centers = boxes[np.arange(n), pick]
+    return ((centers[:, 0] + centers[:, 2]) / 2, (centers[:, 1] + centers[:, 3]) / 2, visible)
+
+
+def draw_labels(ax, x, y, texts, fontsize=8, priority=None, bbox=None, **text_kwargs):
+    """配置並繪製標籤，回傳 Text 物件清單（只含顯示的標籤）"""
+    if bbox is None:
+        bbox = dict(boxstyle='round,pad=0.2', fc='white', ec='none', alpha=0.7)
+    lx, ly, visible = place_labels(ax, x, y, texts, fontsize, priority)
+    return [ax.text(lx[i], ly[i], texts[i], ha='center', va='center', fontsize=fontsize,
+                    bbox=bbox, **text_kwargs)
+            for i in np.flatnonzero(visible)]
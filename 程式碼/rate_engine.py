@@ -0,0 +1,283 @@
+"""
+以人口數標準化的犯罪率（每十萬人）與信賴區間
+
+人口表依年度放在 人口統計V/（例如 112年鄉鎮市區人口數.csv，內政部戶政司
+的鄉鎮市區或村里人口統計），讀入後排成與 incident_cube 相同的
+「年 × 鄉鎮槽位」陣列。任何立方體切片的分母都以同一套 query() 彙總，
+因此所有圖表的犯罪率口徑一致：
+
+    engine = RateEngine(incident_cube.load_cube())
+    result = engine.rates(by=['county'], type='住宅竊盜', year=112)
+    result['rate'], result['lower'], result['upper']
+
+未指定的年度會加總人口（人年），得到的是期間內的平均年犯罪率；
+只計入有人口表的年度（分子與分母的年度相同），明確指定沒有人口表的
+年度時拋出 ValueError。信賴區間以 Byar 近似計算 Poisson 件數的區間，
+件數很少時仍然適用。
+
+專案附上的 112年縣市人口數.csv 只有縣市層級，由 主要警政統計指標2V
+的全般刑案發生數除以犯罪率推得（derive_county_population()）；有戶政司
+的鄉鎮市區人口表時，放進 人口統計V/ 即可取代。
+"""
+import csv
+import functools
+import glob
+import io
+import os
+import re
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import geo_index
+import incident_cube
+from gov_tables import NA_VALUES, _read_text
+from incident_data import BASE_DIR, MISSING
+
+POPULATION_DIR = os.path.join(BASE_DIR, '人口統計V')
+PER = 100_000
+CONFIDENCE = 0.95
+
+# 人口表可能的欄位名稱（戶政司各年度的開放資料欄名不盡相同）
+COUNTY_COLUMNS = ('縣市名稱', '縣市', 'county')
+TOWNSHIP_COLUMNS = ('鄉鎮市區名稱', '鄉鎮市區', 'town')
+SITE_COLUMNS = ('區域別', 'site_id')
+POPULATION_COLUMNS = ('人口數', '總人口數', 'people_total')
+
+# 只和人口有關的維度
+POPULATION_DIMENSIONS = ('year', 'county', 'township')
+
+
+def _find(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def _parse_population(text):
+    """一個年度檔 -> 各鄉鎮槽位的人口數"""
+    rows = list(csv.reader(io.StringIO(text)))
+    for h, header in enumerate(rows):
+        header = [cell.strip() for cell in header]
+        value_col = _find(header, POPULATION_COLUMNS)
+        if value_col is not None:
+            break
+    else:
+        raise ValueError(f"找不到人口數欄位（{'、'.join(POPULATION_COLUMNS)}）")
+    site_col = _find(header, SITE_COLUMNS)
+    county_col = _find(header, COUNTY_COLUMNS)
+    town_col = _find(header, TOWNSHIP_COLUMNS)
+
+    counties, towns, values = [], [], []
+    for row in rows[h + 1:]:
+        if len(row) <= value_col:
+            continue
+        value = row[value_col].strip().replace(',', '')
+        if value in NA_VALUES or not value.replace('.', '', 1).isdigit():
+            # 中文標題列、合計列的註記等
+            continue
+        if site_col is not None:
+            # 區域別為「臺北市松山區」，縣市名稱都是三個字
+            site = geo_index.normalize_name(row[site_col])
+            county, town = site[:3], site[3:]
+        else:
+            county = row[county_col].strip()
+            town = row[town_col].strip() if town_col is not None else ''
+        counties.append(county)
+        towns.append(town)
+        values.append(float(value))
+
+    # 鄉鎮無法辨識（或只有縣市層級的人口）時歸到該縣市的「未註明鄉鎮」槽位
+    county_idx = geo_index.county_positions(geo_index.county_codes(counties))
+    town_codes = geo_index.township_codes(counties, towns)
+    values = np.asarray(values)
+    slot_of = incident_cube._slot_lookup()
+    county_slot = np.flatnonzero(incident_cube.SLOT_TOWNSHIP == MISSING)
+    slots = np.array([slot_of.get(int(t), county_slot[c]) if c >= 0 else -1
+                      for c, t in zip(county_idx, town_codes)], dtype=np.int64)
+
+    # 同一縣市同時有鄉鎮列與縣市小計列時，小計只用來核對，不再計入人口
+    subtotal = np.array([not town or town == county for county, town in zip(counties, towns)],
+                        dtype=bool) & (county_idx >= 0)
+    has_towns = np.zeros(len(geo_index.COUNTIES) + 1, dtype=bool)
+    has_towns[county_idx[~subtotal & (county_idx >= 0)]] = True
+    drop = subtotal & has_towns[county_idx]
+    for c in np.unique(county_idx[drop]):
+        total = values[drop & (county_idx == c)].sum()
+        parts = values[~subtotal & (county_idx == c)].sum()
+        if not np.isclose(total, parts, rtol=0.01):
+            warnings.warn(f"{geo_index.COUNTIES[c][1]} 縣市小計 {total:,.0f} 與各鄉鎮合計 "
+                          f"{parts:,.0f} 不一致，以鄉鎮為準")
+
+    keep = (slots >= 0) & ~drop
+    return np.bincount(slots[keep], weights=values[keep],
+                       minlength=len(incident_cube.SLOT_TOWNSHIP))
+
+
+class Population:
+    """values[year, slot]：各年度、各鄉鎮槽位的人口數（無資料為 0）"""
+
+    def __init__(self, years, values):
+        self.years = np.asarray(years)
+        self.values = np.asarray(values, dtype=np.float64)
+
+    def covers(self, years):
+        """各年度是否有人口表"""
+        return np.isin(np.asarray(years), self.years)
+
+    def aligned(self, years):
+        """依指定的年度排列；沒有人口資料的年度為 0（見 covers()）"""
+        out = np.zeros((len(years), self.values.shape[1]))
+        for i, year in enumerate(np.asarray(years).tolist()):
+            match = np.flatnonzero(self.years == year)
+            if len(match):
+                out[i] = self.values[match[0]]
+        return out
+
+
+@functools.lru_cache(maxsize=None)
+def load_population(directory=POPULATION_DIR):
+    """讀取人口統計V 的所有年度檔（同一行程內只讀一次）"""
+    paths = sorted(glob.glob(os.path.join(directory, '*年*人口*.csv')))
+    if not paths:
+        raise FileNotFoundError(
+            f"找不到人口統計檔，請將各年度的鄉鎮市區人口數 CSV 放在 {directory}")
+    years = [int(re.match(r'(\d+)年', os.path.basename(p)).group(1)) for p in paths]
+    values = np.vstack([_parse_population(_read_text(p)) for p in paths])
+    return Population(years, values)
+
+
+def derive_county_population(directory=POPULATION_DIR, year=112):
+    """
+    由 主要警政統計指標2V 推算各縣市人口數（全般刑案發生數 ÷ 犯罪率 × 十萬），
+    寫成 人口統計V/{year}年縣市人口數.csv，回傳檔案路徑
+    """
+    import gov_tables
+
+    df = gov_tables.load('主要警政統計指標2')
+    population = (df['全般刑案_發生數'] / df['全般刑案_犯罪率'] * PER).round().astype(np.int64)
+    path = os.path.join(directory, f'{year}年縣市人口數.csv')
+    os.makedirs(directory, exist_ok=True)
+    pd.DataFrame({'縣市名稱': df['機關別'], '人口數': population}).to_csv(
+        path, index=False, encoding='utf-8')
+    return path
+
+
+def poisson_interval(counts, confidence=CONFIDENCE):
+    """Poisson 件數的信賴區間（Byar 近似），回傳（下限, 上限）"""
+    x = np.asarray(counts, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lower = x * (1 - 1 / (9 * x) - z / (3 * np.sqrt(x))) ** 3
+        upper = (x + 1) * (1 - 1 / (9 * (x + 1)) + z / (3 * np.sqrt(x + 1))) ** 3
+    return np.where(x > 0, np.maximum(lower, 0), 0.0), upper
+
+
+def _to_rates(counts, population, per, confidence):
+    counts = np.asarray(counts, dtype=np.float64)
+    population = np.asarray(population, dtype=np.float64)
+    lower, upper = poisson_interval(counts, confidence)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.where(population > 0, per / population, np.nan)
+    return {'count': counts, 'population': population, 'rate': counts * scale,
+            'lower': lower * scale, 'upper': upper * scale}
+
+
+class RateEngine:
+    """
+    incident_cube 的件數除以人口數
+
+    人口表排成只有一個案類、一個月份的立方體，分母與分子使用相同的
+    query() 彙總；案類與月份不影響人口，以廣播對齊。
+    """
+
+    def __init__(self, cube, population=None, per=PER):
+        self.cube = cube
+        self.per = per
+        population = load_population() if population is None else population
+        # 有人口表的年度；其他年度的件數不計入犯罪率
+        self.years = cube.years[population.covers(cube.years)]
+        if not len(self.years):
+            raise ValueError(f"立方體的年度（{cube.years.tolist()}）都沒有人口表")
+        self.population = population.aligned(cube.years)
+        self._population_cube = incident_cube.IncidentCube(
+            self.population[None, :, None, :], ['人口'], cube.years)
+
+    def _with_years(self, filters):
+        """
+        把年度篩選限制在有人口表的年度：未指定時改為這些年度，
+        指定了沒有人口表的年度時拋出 ValueError
+        """
+        filters = dict(filters)
+        year = filters.get('year')
+        if year is None:
+            filters['year'] = self.years.tolist()
+            return filters
+        requested = [year] if np.isscalar(year) else list(year)
+        uncovered = sorted(set(requested) - set(self.years.tolist()))
+        if uncovered:
+            raise ValueError(f"{uncovered} 年沒有人口表，無法計算犯罪率"
+                             f"（有人口表的年度：{self.years.tolist()}）")
+        return filters
+
+    def population_of(self, by=(), **filters):
+        """與 cube.query(by, **filters) 對齊的人口數（可直接相除的形狀）"""
+        by = [by] if isinstance(by, str) else list(by)
+        pop_by = [d for d in by if d in POPULATION_DIMENSIONS]
+        pop_filters = {k: v for k, v in filters.items() if k in POPULATION_DIMENSIONS}
+        population = self._population_cube.query(pop_by, **pop_filters)
+        if not by:
+            return float(population)
+        # 案類、月份維度長度為 1，與件數廣播
+        missing = [i for i, d in enumerate(by) if d not in POPULATION_DIMENSIONS]
+        return np.expand_dims(np.asarray(population, dtype=np.float64), missing)
+
+    def rates(self, by=(), confidence=CONFIDENCE, **filters):
+        """
+        每 per 人的犯罪率與信賴區間
+
+        參數同 IncidentCube.query()；回傳 dict：count、population、rate、
+        lower、upper，形狀與 query() 相同。人口為 0 的格子為 NaN。
+        未指定年度時只計入有人口表的年度。
+        """
+        filters = self._with_years(filters)
+        counts = self.cube.query(by, **filters)
+        population = self.population_of(by, **filters)
+        return _to_rates(counts, population, self.per, confidence)
+
+    def rate_frame(self, by, confidence=CONFIDENCE, **filters):
+        """rates() 的 DataFrame 版本（索引同 IncidentCube.query_series()）"""
+        by = [by] if isinstance(by, str) else list(by)
+        filters = self._with_years(filters)
+        result = self.rates(by, confidence, **filters)
+        index = pd.MultiIndex.from_product([self.cube.labels(d, **filters) for d in by], names=by)
+        if len(by) == 1:
+            index = index.get_level_values(0)
+        return pd.DataFrame({key: np.broadcast_to(value, result['count'].shape).ravel()
+                             for key, value in result.items()}, index=index)
+
+    def cell_rates(self, level='township', confidence=CONFIDENCE):
+        """
+        整個立方體每一格（案類 × 年 × 月 × 鄉鎮槽位或縣市）的犯罪率
+
+        一次陣列運算，供需要大量切片的批次輸出使用。沒有人口表的年度
+        人口為 0，犯罪率為 NaN。
+        """
+        if level == 'township':
+            counts, population = self.cube.counts, self.population
+        else:
+            counts = self.cube.county_counts
+            population = self._population_cube.county_counts[0, :, 0, :]
+        return _to_rates(counts, population[None, :, None, :], self.per, confidence)
+
+
+if __name__ == '__main__':
+    cube = incident_cube.load_cube()
+    engine = RateEngine(cube)
+    year = int(engine.years[-1])
+    frame = engine.rate_frame('county', year=year)
+    print(f"{year} 年各縣市犯罪率（每十萬人）")
+    print(frame.round(1).to_string())
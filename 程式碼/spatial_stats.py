@@ -0,0 +1,277 @@
+"""
+鄉鎮層級的空間熱點分析（Getis-Ord Gi*、局部 Moran's I）
+
+鄉鎮相鄰關係（共用任一頂點即相鄰，queen contiguity）由鄉鎮邊界檔
+建立一次，以 CSR 格式（indptr, indices）快取在 .cache/spatial/。
+空間落差 W @ x 以 np.bincount 完成，不需 scipy。
+
+顯著性以條件隨機排列檢定：每個鄉鎮固定自身的值，從其他鄉鎮中隨機
+抽出與鄰居數相同的值，重複 permutations 次。所有鄉鎮共用同一組隨機
+序號，整個檢定是一次陣列運算；hotspot_batch() 再把多個
+（年 × 案類）切片分給多個行程平行計算。
+
+    w = contiguity_weights()
+    result = hotspots(township_values(cube, layer, type='毒品', year=112), w)
+"""
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import boundary_store
+from incident_data import BASE_DIR
+
+SPATIAL_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'spatial')
+PERMUTATIONS = 999
+
+# 熱點分類：-3..3 依序為 冷點 99%、95%、90%、不顯著、熱點 90%、95%、99%
+SIGNIFICANCE = (0.10, 0.05, 0.01)
+HOTSPOT_COLORS = ['#4575b4', '#91bfdb', '#e0f3f8', '#f0f0f0', '#fee090', '#fc8d59', '#d73027']
+HOTSPOT_LABELS = ['冷點 99%', '冷點 95%', '冷點 90%', '不顯著', '熱點 90%', '熱點 95%', '熱點 99%']
+
+
+class SpatialWeights:
+    """CSR 格式的二元相鄰矩陣（對角線為 0）"""
+
+    def __init__(self, indptr, indices):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.n = len(self.indptr) - 1
+        self.cardinalities = np.diff(self.indptr)
+        self.rows = np.repeat(np.arange(self.n), self.cardinalities)
+
+    def lag(self, x, standardize=False):
+        """空間落差：各區域鄰居值的總和（standardize=True 時為平均）"""
+        lag = np.bincount(self.rows, weights=np.asarray(x, dtype=float)[self.indices],
+                          minlength=self.n)
+        if standardize:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                lag = lag / self.cardinalities
+        return lag
+
+    def subset(self, keep):
+        """只保留 keep 為 True 的區域（與其間的相鄰關係），區域依原順序重新編號"""
+        keep = np.asarray(keep, dtype=bool)
+        position = np.cumsum(keep) - 1
+        edge = keep[self.rows] & keep[self.indices]
+        rows = position[self.rows[edge]]
+        indptr = np.searchsorted(rows, np.arange(int(keep.sum()) + 1))
+        return SpatialWeights(indptr, position[self.indices[edge]])
+
+    @property
+    def islands(self):
+        return np.flatnonzero(self.cardinalities == 0)
+
+
+def _contiguity(geometry):
+    """共用頂點的區域互為鄰居"""
+    coords = geometry['coords']
+    ring_offsets = geometry['ring_offsets']
+    starts = ring_offsets[geometry['polygon_offsets'][geometry['feature_offsets']]]
+    n = len(starts) - 1
+    feature = np.repeat(np.arange(n), np.diff(starts))
+
+    _, vertex = np.unique(coords, axis=0, return_inverse=True)
+    pairs = np.unique(np.stack([vertex.ravel(), feature], axis=1), axis=0)
+    # 依頂點排序後，相同頂點的不同區域兩兩成為鄰居
+    src, dst = [], []
+    for d in range(1, len(pairs)):
+        same = pairs[d:, 0] == pairs[:-d, 0]
+        if not same.any():
+            break
+        a, b = pairs[:-d, 1][same], pairs[d:, 1][same]
+        src += [a, b]
+        dst += [b, a]
+    edges = np.unique(np.stack([np.concatenate(src or [[]]), np.concatenate(dst or [[]])],
+                               axis=1).astype(np.int64), axis=0)
+    indptr = np.searchsorted(edges[:, 0], np.arange(n + 1))
+    return indptr, edges[:, 1]
+
+
+def contiguity_weights(path=boundary_store.TOWNSHIP_STORE_PATH, use_cache=True):
+    """讀取（必要時建立）鄉鎮相鄰矩陣；以邊界檔的雜湊值作為快取鍵"""
+    store = boundary_store.load_store(path)
+    key = store['meta']['sha1']
+    cache = os.path.join(SPATIAL_CACHE_DIR, f'contiguity_{os.path.basename(path)}.npz')
+    if use_cache and os.path.exists(cache):
+        with np.load(cache) as data:
+            if str(data['key']) == key:
+                return SpatialWeights(data['indptr'], data['indices'])
+
+    indptr, indices = _contiguity(store['levels'][0])
+    if use_cache:
+        os.makedirs(SPATIAL_CACHE_DIR, exist_ok=True)
+        np.savez(cache, indptr=indptr, indices=indices, key=key)
+    return SpatialWeights(indptr, indices)
+
+
+def _permuted_sums(x, w, permutations, seed, chunk_size=4_000_000):
+    """
+    條件隨機排列下，各區域「隨機鄰居」值的總和，形狀為 (n, permutations)
+
+    所有區域共用同一組隨機序號（從 n - 1 個其他區域中抽取），
+    序號 >= i 者加一以跳過區域 i 本身。
+    """
+    n = w.n
+    k = w.cardinalities
+    kmax = int(k.max()) if n else 0
+    out = np.zeros((n, permutations))
+    if kmax == 0:
+        return out
+    rng = np.random.default_rng(seed)
+    ids = np.stack([rng.permutation(n - 1)[:kmax] for _ in range(permutations)])
+    mask = np.arange(kmax) < k[:, None]
+
+    step = max(1, chunk_size // (permutations * kmax))
+    for lo in range(0, n, step):
+        hi = min(lo + step, n)
+        i = np.arange(lo, hi)[:, None, None]
+        draw = ids[None] + (ids[None] >= i)
+        out[lo:hi] = (x[draw] * mask[lo:hi, None, :]).sum(axis=2)
+    return out
+
+
+def _pseudo_p(observed, simulated):
+    """雙尾的偽 p 值：(較極端的模擬次數 + 1) / (次數 + 1)"""
+    permutations = simulated.shape[1]
+    larger = (simulated >= observed[:, None]).sum(axis=1)
+    larger = np.minimum(larger, permutations - larger)
+    return (larger + 1) / (permutations + 1)
+
+
+def getis_ord_gi_star(x, w, sums=None):
+    """
+    Gi* 的 z 值（含自身，權重為二元）
+
+    sums 為 _permuted_sums() 的結果時，另外回傳各排列下的 Gi*。
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    mean = x.mean()
+    s = np.sqrt((x ** 2).mean() - mean ** 2)
+    weight = w.cardinalities + 1.0
+    denominator = s * np.sqrt((n * weight - weight ** 2) / (n - 1))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        gi = (x + w.lag(x) - mean * weight) / denominator
+        if sums is None:
+            return gi
+        simulated = (x[:, None] + sums - (mean * weight)[:, None]) / denominator[:, None]
+    return gi, simulated
+
+
+def local_morans_i(x, w, sums=None):
+    """局部 Moran's I（列標準化權重）；sums 同 getis_ord_gi_star()"""
+    x = np.asarray(x, dtype=float)
+    z = x - x.mean()
+    m2 = (z ** 2).mean()
+    k = w.cardinalities
+    with np.errstate(invalid='ignore', divide='ignore'):
+        local = z / m2 * w.lag(z, standardize=True)
+        if sums is None:
+            return local
+        # 隨機鄰居的 z 值總和 = x 總和 - k * 平均
+        lag = (sums - (k * x.mean())[:, None]) / k[:, None]
+        simulated = (z / m2)[:, None] * lag
+    return local, simulated
+
+
+def hotspot_classes(gi, p):
+    """依 Gi* 方向與偽 p 值分成 -3..3 七類"""
+    level = sum((p <= alpha).astype(int) for alpha in SIGNIFICANCE)
+    return (np.sign(np.nan_to_num(gi)) * np.nan_to_num(level)).astype(int)
+
+
+def hotspots(x, w, permutations=PERMUTATIONS, seed=0):
+    """
+    對一個切片計算 Gi* 與局部 Moran's I 及其排列檢定的偽 p 值
+
+    回傳 dict：gi、gi_p、hotspot（-3..3 的分類，見 HOTSPOT_LABELS）、
+    moran、moran_p、quadrant（1 HH、2 LH、3 LL、4 HL，0 為不顯著）。
+    缺值（NaN，例如無資料或篩選掉的鄉鎮）不參與計算：平均、變異數與
+    隨機排列都只用有值的鄉鎮，缺值鄉鎮的統計量與 p 值為 NaN、分類為 0。
+    """
+    x = np.asarray(x, dtype=float)
+    valid = np.isfinite(x)
+    if valid.all():
+        return _hotspots(x, w, permutations, seed)
+    partial = _hotspots(x[valid], w.subset(valid), permutations, seed)
+    result = {}
+    for name, values in partial.items():
+        fill = np.nan if np.issubdtype(values.dtype, np.floating) else 0
+        result[name] = np.full(len(x), fill, dtype=values.dtype)
+        result[name][valid] = values
+    return result
+
+
+def _hotspots(x, w, permutations, seed):
+    """hotspots() 的本體；x 沒有缺值"""
+    sums = _permuted_sums(x, w, permutations, seed)
+    gi, gi_sim = getis_ord_gi_star(x, w, sums)
+    moran, moran_sim = local_morans_i(x, w, sums)
+    gi_p = _pseudo_p(gi, gi_sim)
+    moran_p = _pseudo_p(moran, moran_sim)
+    # 沒有鄰居的區域、全為同一值的切片（例如全為 0 件）無法檢定
+    constant = len(x) < 2 or x.std() == 0
+    gi_p[(w.cardinalities == 0) | ~np.isfinite(gi) | constant] = np.nan
+    moran_p[(w.cardinalities == 0) | ~np.isfinite(moran) | constant] = np.nan
+
+    z = x - x.mean()
+    lag = w.lag(z, standardize=True)
+    quadrant = np.select([(z > 0) & (lag > 0), (z <= 0) & (lag > 0),
+                          (z <= 0) & (lag <= 0), (z > 0) & (lag <= 0)], [1, 2, 3, 4])
+    quadrant = np.where(moran_p <= 0.05, quadrant, 0)
+    return {'gi': gi, 'gi_p': gi_p, 'hotspot': hotspot_classes(gi, gi_p),
+            'moran': moran, 'moran_p': moran_p, 'quadrant': quadrant}
+
+
+def _hotspot_task(args):
+    x, indptr, indices, permutations, seed = args
+    return hotspots(x, SpatialWeights(indptr, indices), permutations, seed)
+
+
+def hotspot_batch(slices, w, permutations=PERMUTATIONS, workers=None, seed=0):
+    """
+    對多個切片（每個為與 w 同順序的數值陣列）平行計算 hotspots()
+
+    第 i 個切片使用 seed + i 作為亂數種子，結果可重現。
+    """
+    slices = list(slices)
+    tasks = [(np.asarray(x, dtype=float), w.indptr, w.indices, permutations, seed + i)
+             for i, x in enumerate(slices)]
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1:
+        return [_hotspot_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hotspot_task, tasks))
+
+
+def draw_hotspots(ax, layer, classes, **kwargs):
+    """以既有的面量圖樣式繪製熱點分類（layer 為 choropleth 的鄉鎮圖層）"""
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+
+    cmap = ListedColormap(HOTSPOT_COLORS)
+    norm = BoundaryNorm(np.arange(-3.5, 4), cmap.N)
+    return layer.draw(ax, classes, cmap=cmap, norm=norm, **kwargs)
+
+
+if __name__ == '__main__':
+    import time
+
+    import choropleth
+    import incident_cube
+
+    cube = incident_cube.load_cube()
+    layer = choropleth.township_layer()
+    w = contiguity_weights()
+    keys = [(year, crime) for year in cube.years.tolist() for crime in cube.types.tolist()]
+    slices = [choropleth.township_values(cube, layer, type=crime, year=year)
+              for year, crime in keys]
+
+    start = time.perf_counter()
+    results = hotspot_batch(slices, w)
+    print(f"{len(keys)} 個切片 × {PERMUTATIONS} 次排列：{time.perf_counter() - start:.1f} 秒")
+
+    summary = {f'{year}_{crime}': int((r['hotspot'] >= 2).sum())
+               for (year, crime), r in zip(keys, results)}
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
@@ -2,11 +2,11 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import warnings
+import cjk_fonts
 warnings.filterwarnings('ignore')
 
 # 設置中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 直接在程式碼中定義數據
 suspect_data = [
@@ -0,0 +1,478 @@
+"""
+縣市／鄉鎮統計的向量圖磚（Mapbox Vector Tile，打包成單一 PMTiles 檔）
+
+網站原本每個 年 × 案類 × 地區層級 都要一張預先繪好的 PNG。這裡改把
+邊界與所有年度、案類的件數一次寫成向量圖磚：
+
+    地圖資料/taiwan_crime.pmtiles
+      counties   圖層：code、name、county、{年}_{案類}、{年}_總計、{年}_犯罪人口率
+      townships  圖層：code、name、county、{年}_{案類}、{年}_總計（TOWNSHIP_MINZOOM 起）
+
+PMTiles（v3）是單一靜態檔，瀏覽器以 HTTP Range 只讀取畫面需要的圖磚，
+不需要圖磚伺服器；前端可用 MapLibre GL 加上 pmtiles 的 protocol，
+以 ['get', '112_住宅竊盜'] 之類的運算式在瀏覽器端著色。
+
+各縮放層級使用 boundary_store 中容許誤差不超過一個像素的簡化層級，
+多邊形在圖磚邊界（含緩衝區）裁切。Protobuf 與 PMTiles 目錄的編碼都
+直接以 NumPy 完成，不需額外套件。
+
+    python 程式碼/vector_tiles.py [輸出檔]
+"""
+import gzip
+import hashlib
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+import boundary_store
+import geo_index
+
+TILES_PATH = os.path.join(boundary_store.STORE_DIR, 'taiwan_crime.pmtiles')
+EXTENT = 4096
+BUFFER = 64
+TILE_SIZE = 256
+MINZOOM = 0
+MAXZOOM = 10
+TOWNSHIP_MINZOOM = 7
+
+# PMTiles 常數
+HEADER_SIZE = 127
+ROOT_LIMIT = 16384 - HEADER_SIZE
+COMPRESSION_GZIP = 2
+TILE_TYPE_MVT = 1
+
+# MVT 幾何指令
+MOVE_TO, LINE_TO, CLOSE_PATH = 1, 2, 7
+POLYGON = 3
+
+
+# ---- Protobuf 編碼 ----
+
+def _varints(values):
+    """無號整數陣列 -> 連續的 varint 位元組"""
+    v = np.asarray(values, dtype=np.uint64).ravel()
+    if not len(v):
+        return b''
+    nbytes = np.ones(len(v), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += v >= np.uint64(1 << (7 * k))
+    k = np.arange(nbytes.sum()) - np.repeat(np.cumsum(nbytes) - nbytes, nbytes)
+    out = (np.repeat(v, nbytes) >> (7 * k).astype(np.uint64)) & np.uint64(0x7f)
+    out |= np.where(k < np.repeat(nbytes, nbytes) - 1, 0x80, 0).astype(np.uint64)
+    return out.astype(np.uint8).tobytes()
+
+
+def _zigzag(values):
+    v = np.asarray(values, dtype=np.int64)
+    return ((v << 1) ^ (v >> 63)).astype(np.uint64)
+
+
+def _key(field, wire):
+    return _varints([(field << 3) | wire])
+
+
+def _bytes_field(field, payload):
+    return _key(field, 2) + _varints([len(payload)]) + payload
+
+
+def _varint_field(field, value):
+    return _key(field, 0) + _varints([value])
+
+
+def _encode_value(value):
+    """MVT 的 Value 訊息：字串、整數或浮點數"""
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode('utf-8'))
+    if isinstance(value, (int, np.integer)):
+        if value >= 0:
+            return _varint_field(5, int(value))
+        return _key(6, 0) + _varints(_zigzag([value]))
+    return _key(3, 1) + struct.pack('<d', float(value))
+
+
+def _encode_geometry(rings):
+    """已量化的環（各為 k × 2 的整數陣列，不含重複的終點） -> 幾何指令串"""
+    parts = []
+    cursor = np.zeros(2, dtype=np.int64)
+    for ring in rings:
+        deltas = np.diff(np.vstack([cursor, ring]), axis=0)
+        cursor = ring[-1]
+        parts.append(np.concatenate([
+            [(1 << 3) | MOVE_TO], _zigzag(deltas[0]),
+            [((len(ring) - 1) << 3) | LINE_TO], _zigzag(deltas[1:].ravel()),
+            [(1 << 3) | CLOSE_PATH]]).astype(np.uint64))
+    return _varints(np.concatenate(parts))
+
+
+def _encode_layer(name, features):
+    """features 為 [(id, properties, rings), ...]"""
+    keys, values = {}, {}
+    body = []
+    for fid, properties, rings in features:
+        tags = []
+        for k, v in properties.items():
+            value = _encode_value(v)
+            tags += [keys.setdefault(k, len(keys)), values.setdefault(value, len(values))]
+        feature = (_varint_field(1, int(fid)) + _bytes_field(2, _varints(tags)) +
+                   _varint_field(3, POLYGON) + _bytes_field(4, _encode_geometry(rings)))
+        body.append(_bytes_field(2, feature))
+    layer = (_varint_field(15, 2) + _bytes_field(1, name.encode('utf-8')) + b''.join(body) +
+             b''.join(_bytes_field(3, k.encode('utf-8')) for k in keys) +
+             b''.join(_bytes_field(4, v) for v in values) +
+             _varint_field(5, EXTENT))
+    return _bytes_field(3, layer)
+
+
+# ---- 投影與裁切 ----
+
+def _mercator(coords):
+    """經緯度 -> Web Mercator 的世界座標（0–1，y 向下）"""
+    lon, lat = coords[:, 0], np.clip(coords[:, 1], -85.0511, 85.0511)
+    x = (lon + 180) / 360
+    y = (1 - np.log(np.tan(np.radians(lat)) + 1 / np.cos(np.radians(lat))) / np.pi) / 2
+    return np.column_stack([x, y])
+
+
+def _clip_edge(points, axis, bound, keep_above):
+    """Sutherland–Hodgman 的一個邊：保留 axis 座標在 bound 一側的部分"""
+    inside = points[:, axis] >= bound if keep_above else points[:, axis] <= bound
+    if inside.all():
+        return points
+    if not inside.any():
+        return points[:0]
+    nxt = np.roll(points, -1, axis=0)
+    crosses = inside != np.roll(inside, -1)
+    d = nxt[:, axis] - points[:, axis]
+    t = np.divide(bound - points[:, axis], d, out=np.zeros_like(d), where=d != 0)
+    cut = points + t[:, None] * (nxt - points)
+    # 每條邊依序輸出：起點（在內側時）、與邊界的交點（跨越時）
+    out = np.stack([points, cut], axis=1).reshape(-1, 2)
+    keep = np.stack([inside, crosses], axis=1).ravel()
+    return out[keep]
+
+
+def _clip_ring(points, lo, hi):
+    for axis in (0, 1):
+        points = _clip_edge(points, axis, lo, True)
+        points = _clip_edge(points, axis, hi, False)
+        if not len(points):
+            break
+    return points
+
+
+def _quantize(points, exterior):
+    """取整數座標、去除連續重複點，並調整方向（外環面積為正、內環為負）"""
+    q = np.rint(points).astype(np.int64)
+    keep = np.any(q != np.roll(q, 1, axis=0), axis=1)
+    q = q[keep] if keep.any() else q[:1]
+    if len(q) < 3:
+        return None
+    area = np.sum(q[:, 0] * np.roll(q[:, 1], -1) - np.roll(q[:, 0], -1) * q[:, 1])
+    if area == 0:
+        return None
+    if (area > 0) != exterior:
+        q = q[::-1]
+    return q
+
+
+class _TileSource:
+    """一個邊界檔在各簡化層級的世界座標、各環的外框與所屬區域"""
+
+    def __init__(self, path):
+        store = boundary_store.load_store(path)
+        self.store = store
+        self.tolerances = store['tolerances']
+        self.levels = []
+        for geometry in store['levels']:
+            world = _mercator(geometry['coords'])
+            ring_offsets = geometry['ring_offsets']
+            polygon_offsets = geometry['polygon_offsets']
+            n_rings = len(ring_offsets) - 1
+            ring_polygon = np.repeat(np.arange(len(polygon_offsets) - 1), np.diff(polygon_offsets))
+            ring_feature = np.repeat(np.arange(len(geometry['feature_offsets']) - 1),
+                                     np.diff(geometry['feature_offsets']))[ring_polygon]
+            exterior = np.zeros(n_rings, dtype=bool)
+            exterior[polygon_offsets[:-1]] = True
+            starts = ring_offsets[:-1]
+            bbox = np.column_stack([np.minimum.reduceat(world, starts),
+                                    np.maximum.reduceat(world, starts)])
+            self.levels.append({'world': world, 'ring_offsets': ring_offsets,
+                                'ring_feature': ring_feature, 'exterior': exterior,
+                                'bbox': bbox})
+        self.bounds = store['bounds']
+
+    def level_for_zoom(self, z):
+        """容許誤差不超過一個像素（256 像素圖磚）的最粗層級"""
+        pixel = 360 / (TILE_SIZE * 2 ** z)
+        return int(np.flatnonzero(self.tolerances <= pixel)[-1])
+
+    def tile_rings(self, z, x, y):
+        """某圖磚內各區域的已量化環：{區域列號: [環, ...]}"""
+        level = self.levels[self.level_for_zoom(z)]
+        scale = 2 ** z
+        pad = BUFFER / EXTENT
+        lo = np.array([x - pad, y - pad]) / scale
+        hi = np.array([x + 1 + pad, y + 1 + pad]) / scale
+        bbox = level['bbox']
+        hit = np.flatnonzero(np.all(bbox[:, :2] <= hi, axis=1) & np.all(bbox[:, 2:] >= lo, axis=1))
+
+        rings = {}
+        offsets = level['ring_offsets']
+        for r in hit:
+            # 轉成圖磚座標後裁切（環的終點與起點相同，先去掉）
+            points = level['world'][offsets[r]:offsets[r + 1] - 1] * scale
+            points = (points - [x, y]) * EXTENT
+            points = _clip_ring(points, -BUFFER, EXTENT + BUFFER)
+            if len(points) < 3:
+                continue
+            q = _quantize(points, level['exterior'][r])
+            if q is not None:
+                rings.setdefault(int(level['ring_feature'][r]), []).append(q)
+        return rings
+
+    def tiles(self, z):
+        """區域外框涵蓋的所有圖磚 (x, y)"""
+        world = _mercator(self.bounds.reshape(2, 2))
+        scale = 2 ** z
+        x0, x1 = (np.clip(world[:, 0] * scale, 0, scale - 1)).astype(int)
+        y1, y0 = (np.clip(world[:, 1] * scale, 0, scale - 1)).astype(int)
+        return [(x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+
+# ---- 屬性 ----
+
+def _statistics(cube, rows, by):
+    """
+    各年度、各案類的件數 -> {欄位名稱: 與邊界列同順序的陣列}
+
+    by 為 'county' 或 'township'；rows 為邊界列在該維度的位置。
+    """
+    counts = cube.query(['type', 'year', by])
+    columns = {}
+    for y, year in enumerate(cube.years.tolist()):
+        for t, crime in enumerate(cube.types.tolist()):
+            columns[f'{year}_{crime}'] = counts[t, y][rows]
+        columns[f'{year}_總計'] = counts[:, y].sum(axis=0)[rows]
+    return columns
+
+
+def county_properties(cube, path=None):
+    """縣市圖層各列的屬性；path 預設為 boundary_store.STORE_PATH"""
+    import gov_tables
+
+    path = path or boundary_store.STORE_PATH
+    store = boundary_store.load_store(path)
+    codes = store['county_code']
+    # 立方體的縣市維度依 geo_index.COUNTIES 排列，最後一格為未知縣市
+    columns = _statistics(cube, store['county_index'], 'county')
+    rates = gov_tables.county_rates()
+    for y, year in enumerate(rates.years.tolist()):
+        columns[f'{year}_犯罪人口率'] = boundary_store.bind(rates.vector(year), path=path)
+
+    properties = []
+    for i, code in enumerate(codes):
+        row = {'code': int(code), 'name': str(store['name'][i]),
+               'county': geo_index.county_name(code)}
+        row.update(_clean(columns, i))
+        properties.append(row)
+    return codes, properties
+
+
+def township_properties(cube, path=None):
+    """鄉鎮圖層各列的屬性；path 預設為 boundary_store.TOWNSHIP_STORE_PATH"""
+    from choropleth import _slot_rows
+
+    path = path or boundary_store.TOWNSHIP_STORE_PATH
+    store = boundary_store.load_store(path)
+    codes = store['township_code']
+    rows = _slot_rows(tuple(codes.tolist()))
+    columns = _statistics(cube, rows, 'township')
+    properties = []
+    for i, code in enumerate(codes):
+        row = {'code': int(code), 'name': str(store['name'][i]),
+               'county': geo_index.county_name(store['county_code'][i])}
+        # 立方體沒有的鄉鎮不寫件數（無資料）
+        if rows[i] >= 0:
+            row.update(_clean(columns, i))
+        properties.append(row)
+    return codes, properties
+
+
+def _clean(columns, i):
+    """整數值存成整數，缺值不寫"""
+    row = {}
+    for key, values in columns.items():
+        v = values[i]
+        if np.issubdtype(values.dtype, np.integer):
+            row[key] = int(v)
+        elif np.isfinite(v):
+            row[key] = float(v)
+    return row
+
+
+def _fields(properties):
+    """TileJSON vector_layers 的欄位型別（所有區域的欄位聯集；缺值的欄位不會寫入個別區域）"""
+    fields = {}
+    for row in properties:
+        for key, value in row.items():
+            fields.setdefault(key, 'String' if isinstance(value, str) else 'Number')
+    return fields
+
+
+# ---- PMTiles ----
+
+def tile_id(z, x, y):
+    """PMTiles 的圖磚編號：較低層級的圖磚總數 + 該層級的 Hilbert 曲線序號"""
+    acc = ((1 << (2 * z)) - 1) // 3
+    n = 1 << z
+    d = 0
+    s = n // 2
+    while s > 0:
+        rx = int(x & s > 0)
+        ry = int(y & s > 0)
+        d += s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x, y = n - 1 - x, n - 1 - y
+            x, y = y, x
+        s //= 2
+    return acc + d
+
+
+def _serialize_directory(entries):
+    """entries 為 [(tile_id, offset, length, run_length), ...]（依 tile_id 排序）"""
+    ids = np.array([e[0] for e in entries], dtype=np.uint64)
+    offsets = np.array([e[1] for e in entries], dtype=np.uint64)
+    lengths = np.array([e[2] for e in entries], dtype=np.uint64)
+    runs = np.array([e[3] for e in entries], dtype=np.uint64)
+    deltas = np.diff(ids, prepend=np.uint64(0))
+    # 緊接在前一筆之後的位移寫 0，其他寫 位移 + 1
+    follows = np.zeros(len(entries), dtype=bool)
+    follows[1:] = offsets[1:] == offsets[:-1] + lengths[:-1]
+    offsets = np.where(follows, 0, offsets + 1)
+    raw = _varints([len(entries)]) + b''.join(_varints(a) for a in (deltas, runs, lengths, offsets))
+    return gzip.compress(raw, mtime=0)
+
+
+def _build_directories(entries):
+    """根目錄放不下時，分成數個葉目錄，回傳（根目錄, 葉目錄區段）"""
+    root = _serialize_directory(entries)
+    if len(root) <= ROOT_LIMIT:
+        return root, b''
+    leaf_size = 4096
+    while True:
+        leaves, root_entries = [], []
+        offset = 0
+        for i in range(0, len(entries), leaf_size):
+            leaf = _serialize_directory(entries[i:i + leaf_size])
+            root_entries.append((entries[i][0], offset, len(leaf), 0))
+            leaves.append(leaf)
+            offset += len(leaf)
+        root = _serialize_directory(root_entries)
+        if len(root) <= ROOT_LIMIT:
+            return root, b''.join(leaves)
+        leaf_size *= 2
+
+
+def write_pmtiles(path, tiles, metadata, bounds, minzoom, maxzoom):
+    """
+    寫出 PMTiles v3 檔
+
+    tiles 為 {(z, x, y): 已 gzip 的圖磚}；內容相同的圖磚只存一份，
+    連續編號且內容相同者合併成一筆（run_length）。
+    """
+    entries, data, seen = [], [], {}
+    offset = 0
+    for tid, blob in sorted((tile_id(*zxy), blob) for zxy, blob in tiles.items()):
+        digest = hashlib.sha1(blob).digest()
+        if digest in seen:
+            prev = entries[-1]
+            if prev[1] == seen[digest] and prev[0] + prev[3] == tid:
+                entries[-1] = (prev[0], prev[1], prev[2], prev[3] + 1)
+            else:
+                entries.append((tid, seen[digest], len(blob), 1))
+            continue
+        seen[digest] = offset
+        entries.append((tid, offset, len(blob), 1))
+        data.append(blob)
+        offset += len(blob)
+
+    root, leaves = _build_directories(entries)
+    meta = gzip.compress(json.dumps(metadata, ensure_ascii=False).encode('utf-8'), mtime=0)
+    tile_data = b''.join(data)
+
+    root_offset = HEADER_SIZE
+    meta_offset = root_offset + len(root)
+    leaf_offset = meta_offset + len(meta)
+    data_offset = leaf_offset + len(leaves)
+    minx, miny, maxx, maxy = bounds
+    e7 = lambda v: int(round(v * 1e7))
+    header = struct.pack(
+        '<7sB8Q3QBBBBBB4iB2i', b'PMTiles', 3,
+        root_offset, len(root), meta_offset, len(meta), leaf_offset, len(leaves),
+        data_offset, len(tile_data),
+        sum(e[3] for e in entries), len(entries), len(data),
+        1, COMPRESSION_GZIP, COMPRESSION_GZIP, TILE_TYPE_MVT, minzoom, maxzoom,
+        e7(minx), e7(miny), e7(maxx), e7(maxy),
+        min(maxzoom, 7), e7((minx + maxx) / 2), e7((miny + maxy) / 2))
+    assert len(header) == HEADER_SIZE
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'wb') as f:
+        f.write(header + root + meta + leaves + tile_data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def export(cube, path=TILES_PATH, minzoom=MINZOOM, maxzoom=MAXZOOM,
+           township_minzoom=TOWNSHIP_MINZOOM):
+    """輸出縣市與鄉鎮圖層的 PMTiles 檔，回傳圖磚數"""
+    layers = [('counties', _TileSource(boundary_store.STORE_PATH),
+               county_properties(cube), minzoom)]
+    if os.path.exists(boundary_store.TOWNSHIP_STORE_PATH):
+        layers.append(('townships', _TileSource(boundary_store.TOWNSHIP_STORE_PATH),
+                       township_properties(cube), township_minzoom))
+
+    tiles = {}
+    for z in range(minzoom, maxzoom + 1):
+        for x, y in layers[0][1].tiles(z):
+            body = b''
+            for name, source, (codes, properties), first_zoom in layers:
+                if z < first_zoom:
+                    continue
+                rings = source.tile_rings(z, x, y)
+                features = [(codes[i], properties[i], rings[i]) for i in sorted(rings)]
+                if features:
+                    body += _encode_layer(name, features)
+            if body:
+                tiles[(z, x, y)] = gzip.compress(body, mtime=0)
+
+    metadata = {
+        'name': '台灣犯罪統計',
+        'format': 'pbf',
+        'attribution': '資料來源：內政部警政署統計資料',
+        'years': cube.years.tolist(),
+        'types': cube.types.tolist(),
+        'vector_layers': [{'id': name, 'minzoom': first_zoom, 'maxzoom': maxzoom,
+                           'fields': _fields(properties)}
+                          for name, _, (_, properties), first_zoom in layers],
+    }
+    bounds = layers[0][1].bounds
+    write_pmtiles(path, tiles, metadata, bounds, minzoom, maxzoom)
+    return len(tiles)
+
+
+if __name__ == '__main__':
+    import time
+
+    import incident_cube
+
+    out = sys.argv[1] if len(sys.argv) >= 2 else TILES_PATH
+    start = time.perf_counter()
+    n = export(incident_cube.load_cube(), out)
+    size = os.path.getsize(out) / 1e6
+    print(f"已輸出 {out}（{n} 個圖磚，{size:.1f} MB，{time.perf_counter() - start:.1f} 秒）")
@@ -4,40 +4,17 @@ import seaborn as sns
 import numpy as np
 from matplotlib import rcParams
 import warnings
+import gov_tables
+import cjk_fonts
 warnings.filterwarnings('ignore')
 
 # 設定中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 def load_and_clean_data(filename):
     """讀取並清理警政統計資料"""
-    # 讀取CSV檔案，跳過前兩行標題
-    df = pd.read_csv(filename, encoding='utf-8', skiprows=2)
-    
-    # 移除空行和無效資料
-    df = df.dropna(subset=[df.columns[0]])
-    df = df[df.iloc[:, 0].str.contains('民國', na=False)]
-    
-    # 重新命名欄位
-    columns = [
-        '年別', '西元年', '全般刑案_發生數', '全般刑案_破獲數', '全般刑案_破獲率', 
-        '全般刑案_嫌疑犯', '全般刑案_犯罪率', '全般刑案_犯罪人口率',
-        '暴力犯罪_發生數', '暴力犯罪_破獲數', '暴力犯罪_破獲率', 
-        '暴力犯罪_嫌疑犯', '暴力犯罪_犯罪率',
-        '竊盜_發生數', '竊盜_破獲數', '竊盜_破獲率', '竊盜_嫌疑犯', '竊盜_犯罪率'
-    ]
-    
-    df.columns = columns
-    
-    # 資料型別轉換
-    numeric_columns = [col for col in columns if col not in ['年別']]
-    for col in numeric_columns:
-        if col in df.columns:
-            # 移除千分位逗號並轉換為數值
-            df[col] = pd.to_numeric(df[col].astype(str).str.replace(',', ''), errors='coerce')
-    
-    return df
+    # 版面定義、千分位與型別轉換見 gov_tables.py
+    return gov_tables.load('主要警政統計指標1')
 
 def create_crime_trend_analysis(df):
     """製作犯罪趨勢分析圖表"""
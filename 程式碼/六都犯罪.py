@@ -1,5 +1,9 @@
 import matplotlib.pyplot as plt
 import pandas as pd
+import cjk_fonts
+
+# 設定中文字型
+cjk_fonts.setup()
 
 
 # 創建 DataFrame
@@ -1,10 +1,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
+import cjk_fonts
 
 # 設定中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 2022年犯罪數據（從CSV提取）
 crime_data = {
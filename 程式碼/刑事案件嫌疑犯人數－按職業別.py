@@ -4,11 +4,11 @@ import seaborn as sns
 import numpy as np
 from matplotlib import font_manager
 import warnings
+import cjk_fonts
 warnings.filterwarnings('ignore')
 
 # 設置中文字體
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft JhengHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 讀取並處理數據
 def load_and_process_data():
@@ -6,39 +6,21 @@ from matplotlib.patches import Rectangle
 import warnings
 import matplotlib.font_manager as fm
 import os
+import cjk_fonts
+import gov_tables
 
 warnings.filterwarnings('ignore')
 
 # 解決中文顯示問題的多種方法
 def setup_chinese_font():
-    """設定中文字體的函數"""
-    
-    # 方法1: 嘗試系統內建字體
-    font_list = [
-        'Microsoft JhengHei',  # Windows 繁體中文
-        'Microsoft YaHei',     # Windows 簡體中文
-        'SimHei',              # Windows 黑體
-        'Arial Unicode MS',    # Mac/Windows
-        'Heiti TC',            # Mac 繁體中文
-        'PingFang TC',         # Mac 繁體中文
-        'WenQuanYi Micro Hei', # Linux
-        'DejaVu Sans'          # Linux 備用
-    ]
-    
-    # 檢查可用字體
-    available_fonts = [f.name for f in fm.fontManager.ttflist]
-    
-    for font in font_list:
-        if font in available_fonts:
-            plt.rcParams['font.sans-serif'] = [font]
-            plt.rcParams['axes.unicode_minus'] = False
-            print(f"使用字體: {font}")
-            return True
-    
-    # 方法2: 如果沒有中文字體，使用英文標籤
+    """設定中文字體（見 cjk_fonts.py），回傳是否找到中文字型"""
+    font = cjk_fonts.setup()
+    if font is not None:
+        print(f"使用字體: {font.family}")
+        return True
+
+    # 如果沒有中文字體，使用英文標籤
     print("警告: 沒有找到合適的中文字體，將使用英文標籤")
-    plt.rcParams['font.sans-serif'] = ['DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
     return False
 
 # 設定字體
@@ -72,33 +54,19 @@ def get_display_label(chinese_label):
     else:
         return label_mapping.get(chinese_label, chinese_label)
 
+# 分析的犯罪類型
+CRIMES = ['竊盜', '詐欺背信', '違反毒品危害防制條例', '駕駛過失', '傷害', '妨害自由', '賭博',
+          '侵占', '毀棄損壞', '妨害性自主罪']
+
 # 讀取和處理數據的函數
 def read_and_process_data():
-    """讀取並處理犯罪數據"""
-    crime_data = {
-        '年份': [2015, 2016, 2017, 2018, 2019, 2020, 2021, 2022],
-        '竊盜_發生數': [66255, 57606, 52025, 47591, 42272, 37016, 35067, 37670],
-        '竊盜_破獲數': [55055, 48898, 46022, 43262, 40406, 36597, 34826, 36603],
-        '詐欺背信_發生數': [21825, 23994, 23623, 24585, 24642, 24607, 26068, 30876],
-        '詐欺背信_破獲數': [18520, 20565, 21667, 22697, 22883, 24122, 25815, 30026],
-        '違反毒品危害防制條例_發生數': [49576, 54873, 58515, 55480, 47035, 45489, 38644, 38088],
-        '違反毒品危害防制條例_破獲數': [49576, 54873, 58515, 55480, 47035, 45489, 38644, 38088],
-        '駕駛過失_發生數': [13431, 13755, 13820, 15099, 16588, 16578, 18695, 21172],
-        '駕駛過失_破獲數': [13389, 13648, 13711, 14969, 16426, 16369, 18723, 20479],
-        '傷害_發生數': [11141, 11790, 11709, 12256, 13213, 12666, 12717, 13972],
-        '傷害_破獲數': [10476, 11118, 11152, 11674, 12856, 12355, 12620, 13435],
-        '妨害自由_發生數': [6361, 7136, 7391, 8206, 8990, 9994, 11950, 14438],
-        '妨害自由_破獲數': [5816, 6601, 6904, 7704, 8553, 9459, 11809, 13669],
-        '賭博_發生數': [6969, 6798, 6447, 4542, 4858, 3175, 2513, 3135],
-        '賭博_破獲數': [6969, 6798, 6447, 4542, 4858, 3175, 2513, 3135],
-        '侵占_發生數': [5671, 6147, 6439, 7382, 7801, 8160, 8420, 10067],
-        '侵占_破獲數': [4056, 4686, 5090, 6079, 6718, 7268, 8008, 9385],
-        '毀棄損壞_發生數': [5304, 5335, 5298, 5439, 5403, 5232, 5879, 6791],
-        '毀棄損壞_破獲數': [2955, 3410, 3687, 4099, 4483, 4687, 5520, 6177],
-        '妨害性自主罪_發生數': [3648, 3642, 3353, 3263, 3384, 4217, 4081, 4520],
-        '妨害性自主罪_破獲數': [3637, 3558, 3244, 3215, 3310, 4129, 3929, 4324],
-    }
-    return pd.DataFrame(crime_data)
+    """讀取並處理犯罪數據（版面定義與數值轉換見 gov_tables.py）"""
+    table = gov_tables.load('刑事案件按案類別1')
+    table = table[table['項目'].isin(['發生數', '破獲數'])]
+    wide = table.pivot(index='年別', columns='項目', values=CRIMES).astype(int)
+    wide.columns = [f'{crime}_{item}' for crime, item in wide.columns]
+    wide.insert(0, '年份', wide.index.str.extract(r'(\d{4})', expand=False).astype(int))
+    return wide.sort_values('年份').reset_index(drop=True)
 
 # 讀取數據
 df = read_and_process_data()
@@ -3,10 +3,10 @@ import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 from matplotlib import rcParams
+import cjk_fonts
 
 # 設定中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 手動輸入數據（基於CSV檔案內容）
 years = ['2015', '2016', '2017', '2018', '2019', '2020', '2021', '2022']
@@ -4,11 +4,11 @@ import numpy as np
 import seaborn as sns
 from matplotlib import font_manager
 import warnings
+import cjk_fonts
 warnings.filterwarnings('ignore')
 
 # 設定中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'Arial Unicode MS', 'SimHei']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 手動輸入數據（基於CSV內容）
 data = {
@@ -3,10 +3,10 @@ import numpy as np
 import seaborn as sns
 from matplotlib import rcParams
 import pandas as pd
+import cjk_fonts
 
 # 設定中文字體
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'SimHei', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 時間段標籤
 time_periods = ['0-2時', '2-4時', '4-6時', '6-8時', '8-10時', '10-12時', 
@@ -3,10 +3,10 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from matplotlib import rcParams
+import cjk_fonts
 
 # 設定中文字體支持
-plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 # 讀取並處理資料
 def load_and_process_data():
@@ -1,15 +1,15 @@
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 from matplotlib import colormaps
-from matplotlib.font_manager import FontProperties
 import numpy as np
+import geo_index
+import boundary_store
+import gov_tables
+import cjk_fonts
 
 # 設定中文字型
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac系統使用
-# plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei']  # Windows系統使用
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
 def load_and_analyze_data():
     """載入並分析暴力犯罪數據"""
@@ -20,20 +20,8 @@ def load_and_analyze_data():
     # 1. 載入暴力犯罪統計數據
     print("\n正在載入暴力犯罪統計數據...")
     
-    # 先讀取檔案查看實際欄位名稱
-    df = pd.read_csv("暴力犯罪統計2V.csv", skiprows=3, encoding='utf-8')
-    print("原始欄位名稱:", df.columns.tolist())  # 查看實際欄位名稱
-    
-    # 重新讀取並指定正確欄位名稱
-    df = pd.read_csv("暴力犯罪統計2V.csv", skiprows=3, encoding='utf-8')
-    df.columns = ['機關別', '總計_發生數', '總計_破獲率', '故意殺人_發生數', '故意殺人_破獲率', 
-                  '擄人勒贖_發生數', '擄人勒贖_破獲率', '強盜_發生數', '強盜_破獲率',
-                  '搶奪_發生數', '搶奪_破獲率', '重傷害_發生數', '重傷害_破獲率',
-                  '恐嚇取財_發生數', '恐嚇取財_破獲率', '強制性交_發生數', '強制性交_破獲率']
-    
-    # 清理數據 - 移除空行和無效數據
-    df = df.dropna(how='all')
-    df = df[df['機關別'] != '署所屬機關']  # 移除非縣市數據
+    # 版面定義與數值轉換見 gov_tables.py（已移除「署所屬機關」）
+    df = gov_tables.load('暴力犯罪統計2')
     
     return df
 
@@ -217,57 +205,19 @@ def create_visualizations(df):
     viz_df['County'] = viz_df['County'].str.strip()
     
     print("\n正在載入台灣地理數據...")
-    # 3. 載入台灣地理數據
-    geo_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson"
-    gdf = gpd.read_file(geo_url)
-    
-    # 修正GeoJSON中的縣市名稱 (Taitung County有換行符)
-    gdf['name'] = gdf['name'].str.strip()
-    
-    # 4. 創建縣市名稱映射表 (中文到英文)
-    county_mapping = {
-        '新北市': 'New Taipei City',
-        '臺北市': 'Taipei City',
-        '台北市': 'Taipei City',
-        '桃園市': 'Taoyuan City',
-        '臺中市': 'Taichung City',
-        '台中市': 'Taichung City',
-        '臺南市': 'Tainan City',
-        '台南市': 'Tainan City',
-        '高雄市': 'Kaohsiung City',
-        '宜蘭縣': 'Yilan County',
-        '新竹縣': 'Hsinchu County',
-        '苗栗縣': 'Miaoli County',
-        '彰化縣': 'Changhua County',
-        '南投縣': 'Nantou County',
-        '雲林縣': 'Yunlin County',
-        '嘉義縣': 'Chiayi County',
-        '屏東縣': 'Pingtung County',
-        '臺東縣': 'Taitung County',
-        '台東縣': 'Taitung County',
-        '花蓮縣': 'Hualien County',
-        '澎湖縣': 'Penghu County',
-        '基隆市': 'Keelung City',
-        '新竹市': 'Hsinchu City',
-        '嘉義市': 'Chiayi City',
-        '金門縣': 'Kinmen County',
-        '連江縣': 'Lienchiang County'
-    }
-    
-    # 特殊處理桃園市
-    gdf.loc[gdf['name'] == 'Taoyuan County', 'name'] = 'Taoyuan City'
-    
-    # 5. 將中文縣市名轉換為英文
-    viz_df['County_English'] = viz_df['County'].map(county_mapping)
+    # 3. 載入本地的台灣縣市邊界（已含縣市代碼；依圖面大小選擇簡化層級）
+    gdf = boundary_store.load_counties(figsize=(18, 12), fraction=2 / 3)
     
-    # 6. 合併地理數據與統計數據
-    merged = gdf.merge(viz_df, left_on='name', right_on='County_English', how='left')
+    # 4. 以共用的縣市索引轉成縣市代碼（含 台/臺 等別名）
+    codes = geo_index.county_codes(viz_df['County'])
     
-    # 7. 數據清理 - 轉換為數值
-    merged['Total_Violent_Crime'] = pd.to_numeric(merged['Total_Violent_Crime'], errors='coerce')
+    # 5. 以預先建立的縣市索引將統計值排成邊界列的順序（不需合併 DataFrame）
+    merged = gdf
+    merged['County'] = merged['county']
+    merged['Total_Violent_Crime'] = boundary_store.bind(viz_df['Total_Violent_Crime'], codes=codes)
     
     print("\n正在生成地圖視覺化...")
-    # 8. 創建地圖視覺化
+    # 7. 創建地圖視覺化
     fig = plt.figure(figsize=(18, 12))
     gs = fig.add_gridspec(1, 2, width_ratios=[2, 1])  # 分割為左右兩部分
     ax1 = fig.add_subplot(gs[0])  # 左邊放地圖
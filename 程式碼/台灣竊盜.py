@@ -1,80 +1,36 @@
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
 import matplotlib.colors as colors
 from matplotlib import colormaps
-from matplotlib.font_manager import FontProperties
 import numpy as np
+import geo_index
+import boundary_store
+import gov_tables
+import cjk_fonts
 
 # 設定中文字型
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac系統使用
-# plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei']  # Windows系統使用
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
-# 1. 載入竊盜統計數據
-df = pd.read_csv("竊盜統計2.csv", skiprows=3, encoding='utf-8')
-
-# 清理數據 - 移除空行和無效數據
-df = df.dropna(how='all')
-df = df[df['機關別'] != '署所屬機關']  # 移除非縣市數據
+# 1. 載入竊盜統計數據（版面定義與數值轉換見 gov_tables.py，已移除「署所屬機關」）
+df = gov_tables.load('竊盜統計2')
 
 # 2. 選擇需要的列並重命名
-df = df[['機關別', '總          計']]
+df = df[['機關別', '總計_發生數']]
 df.columns = ['County', 'Total_Larceny']
 
-# 清理縣市名稱
-df['County'] = df['County'].str.strip()
-
-# 3. 載入台灣地理數據
-geo_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson"
-gdf = gpd.read_file(geo_url)
-
-# 修正GeoJSON中的縣市名稱 (Taitung County有換行符)
-gdf['name'] = gdf['name'].str.strip()
-
-# 4. 創建縣市名稱映射表 (中文到英文)
-county_mapping = {
-    '新北市': 'New Taipei City',
-    '臺北市': 'Taipei City',
-    '台北市': 'Taipei City',
-    '桃園市': 'Taoyuan City',
-    '臺中市': 'Taichung City',
-    '台中市': 'Taichung City',
-    '臺南市': 'Tainan City',
-    '台南市': 'Tainan City',
-    '高雄市': 'Kaohsiung City',
-    '宜蘭縣': 'Yilan County',
-    '新竹縣': 'Hsinchu County',
-    '苗栗縣': 'Miaoli County',
-    '彰化縣': 'Changhua County',
-    '南投縣': 'Nantou County',
-    '雲林縣': 'Yunlin County',
-    '嘉義縣': 'Chiayi County',
-    '屏東縣': 'Pingtung County',
-    '臺東縣': 'Taitung County',
-    '台東縣': 'Taitung County',
-    '花蓮縣': 'Hualien County',
-    '澎湖縣': 'Penghu County',
-    '基隆市': 'Keelung City',
-    '新竹市': 'Hsinchu City',
-    '嘉義市': 'Chiayi City',
-    '金門縣': 'Kinmen County',
-    '連江縣': 'Lienchiang County'
-}
-
-# 特殊處理桃園市
-gdf.loc[gdf['name'] == 'Taoyuan County', 'name'] = 'Taoyuan City'
-
-# 5. 將中文縣市名轉換為英文
-df['County_English'] = df['County'].map(county_mapping)
-
-# 6. 合併地理數據與統計數據
-merged = gdf.merge(df, left_on='name', right_on='County_English', how='left')
-
-# 7. 數據清理 - 移除千位分隔符並轉換為數值
-merged['Total_Larceny'] = merged['Total_Larceny'].str.replace(',', '').astype(float)
-
-# 8. 創建地圖視覺化
+# 3. 載入本地的台灣縣市邊界（已含縣市代碼；依圖面大小選擇簡化層級）
+gdf = boundary_store.load_counties(figsize=(18, 12), fraction=2 / 3)
+
+# 4. 以共用的縣市索引轉成縣市代碼（含 台/臺 等別名）
+codes = geo_index.county_codes(df['County'])
+larceny = df['Total_Larceny']
+
+# 5. 以預先建立的縣市索引將統計值排成邊界列的順序（不需合併 DataFrame）
+merged = gdf
+merged['County'] = merged['county']
+merged['Total_Larceny'] = boundary_store.bind(larceny, codes=codes)
+
+# 7. 創建地圖視覺化
 fig = plt.figure(figsize=(18, 12))
 gs = fig.add_gridspec(1, 2, width_ratios=[2, 1])  # 分割為左右兩部分
 ax1 = fig.add_subplot(gs[0])  # 左邊放地圖
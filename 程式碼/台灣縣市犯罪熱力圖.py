@@ -1,6 +1,6 @@
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
+import boundary_store
 
 # 1. Load the CSV file
 file_path = "主要警政統計指標2.csv"
@@ -9,10 +9,8 @@ df = pd.read_csv(file_path)
 # Show the first few rows
 print(df.head())
 
-# 2. Load Taiwan shapefile or GeoJSON (example from online)
-# Taiwan county boundaries from public GeoJSON
-geo_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson"
-gdf = gpd.read_file(geo_url)
+# 2. Load Taiwan county boundaries from the local boundary store (no network needed)
+gdf = boundary_store.load_counties(figsize=(10, 12))
 
 # 3. Inspect the county names
 print("GeoJSON counties:", gdf["name"].unique())
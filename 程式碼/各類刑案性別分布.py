@@ -1,11 +1,12 @@
 import matplotlib.pyplot as plt
-from matplotlib.font_manager import FontProperties
 import numpy as np
+import cjk_fonts
 
 
 
-# 選擇適用的中文字體路徑（適用於 Windows）
-chinese_font = FontProperties(fname="C:/Windows/Fonts/msjh.ttc", size=12)
+# 設定中文字體（見 cjk_fonts.py）
+cjk_fonts.setup()
+chinese_font = cjk_fonts.font_properties(size=12)
 
 
 # 資料定義
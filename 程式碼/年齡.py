@@ -1,7 +1,8 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+import cjk_fonts
 
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac使用
+cjk_fonts.setup()
 
 # Load the CSV file
 file_path = '刑事案件嫌疑犯人數－按案類及年齡層別.csv'
@@ -1,11 +1,10 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.font_manager import FontProperties
+import cjk_fonts
 
-# 設定中文字體（使用 macOS 內建字體）
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # 使用 macOS 內建的中文字體
-plt.rcParams['axes.unicode_minus'] = False  # 解決負號顯示問題
+# 設定中文字體（見 cjk_fonts.py）
+cjk_fonts.setup()
 
 # 數據
 data = {
@@ -1,44 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from matplotlib.font_manager import FontProperties
+import cjk_fonts
+import gov_tables
 
 # 設置中文字體
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']  # Mac使用
-# plt.rcParams['font.sans-serif'] = ['Microsoft JhengHei']  # Windows使用
-plt.rcParams['axes.unicode_minus'] = False
+cjk_fonts.setup()
 
-# 讀取數據並清洗
-def load_and_clean_data(filepath):
-    # 讀取原始文件，跳過前3行
-    df = pd.read_csv(filepath, skiprows=3, encoding='utf-8')
-    
-    # 查看實際讀取的列名
-    print("原始列名:", df.columns.tolist())
-    
-    # 根據實際列名重新命名
-    # 原始結構: ['機關別', 'Unnamed: 1', '總計', 'Unnamed: 3', 'Unnamed: 4', ...]
-    # 每種教育程度有3列: 男, 女, 總和
-    new_columns = ['機關別']
-    categories = ['總計', '不識字', '自修', '國小', '國中', '高中職', '大專', '研究所', '其他']
-    
-    for category in categories:
-        new_columns.extend([f'{category}_男', f'{category}_女', f'{category}_總和'])
-    
-    # 確保列數匹配
-    if len(df.columns) > len(new_columns):
-        df = df.iloc[:, :len(new_columns)]
-    df.columns = new_columns[:len(df.columns)]
-    
-    # 清理數據 - 去除空行
-    df = df.dropna(subset=['機關別'])
-    df = df[df['機關別'] != '民國112年']  # 移除總計行(可選)
-    
-    # 轉換數值列為數字類型
-    numeric_cols = df.columns.drop('機關別')
-    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
-    
-    return df
+# 讀取數據（版面定義與數值轉換見 gov_tables.py，已移除「民國112年」總計列）
+def load_and_clean_data():
+    return gov_tables.load('刑事案件嫌疑犯人數按教育別2')
 
 # 1. 堆疊條形圖 - 各地區教育程度分布
 def plot_education_by_region(df):
@@ -129,9 +100,8 @@ def plot_education_heatmap(df):
 # 主程序
 if __name__ == "__main__":
     # 載入數據
-    filepath = '刑事案件嫌疑犯人數－按教育別2.csv'
     try:
-        df = load_and_clean_data(filepath)
+        df = load_and_clean_data()
         print("數據加載成功，前5行數據:")
         print(df.head())
         
@@ -1,8 +1,10 @@
 import pandas as pd
-import geopandas as gpd
 import matplotlib.pyplot as plt
-from matplotlib.font_manager import FontProperties
 import numpy as np
+import boundary_store
+import geo_index
+from label_layout import draw_labels
+import cjk_fonts
 
 # 1. 準備犯罪數據
 crime_data = {
@@ -18,38 +20,25 @@ crime_data = {
 }
 df = pd.DataFrame(crime_data)
 
-# 2. 載入台灣地圖 GeoJSON
-taiwan_gdf = gpd.read_file("https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson")
+# 2. 載入本地的台灣縣市邊界（county 欄為中文縣市名稱）
+taiwan_gdf = boundary_store.load_counties(figsize=(12, 10))
 
-# 3. 統一縣市名稱格式
-taiwan_gdf['name'] = taiwan_gdf['name'].str.replace('台', '臺')
-df['地區'] = df['地區'].str.replace('台', '臺')
+# 3. 以縣市代碼對應（含 台/臺 等別名）
+codes = geo_index.county_codes(df['地區'])
 
-# 4. 合併數據時處理可能的缺失值
-merged = taiwan_gdf.merge(df, left_on='name', right_on='地區', how='left')
+# 4. 以預先建立的縣市索引將統計值排成邊界列的順序，處理可能的缺失值
+merged = taiwan_gdf
+merged['地區'] = merged['county']
+merged['暴力犯罪總數'] = boundary_store.bind(df['暴力犯罪總數'], codes=codes)
+merged['破獲率'] = boundary_store.bind(df['破獲率'], codes=codes)
 
 # 填充缺失值
 merged['暴力犯罪總數'] = merged['暴力犯罪總數'].fillna(0)
 merged['破獲率'] = merged['破獲率'].fillna(0)
 
-# 5. 設定中文字體 (macOS專用)
-try:
-    # 嘗試蘋方-繁
-    zh_font = FontProperties(fname="C:/Windows/Fonts/msjh.ttc", size=12)
-
-    plt.rcParams['font.sans-serif'] = ['PingFang TC']
-except:
-    try:
-        # 嘗試華康黑體
-        zh_font = FontProperties(fname="C:/Windows/Fonts/msjh.ttc", size=12)
-
-        plt.rcParams['font.sans-serif'] = ['Heiti TC']
-    except:
-        # 最後嘗試
-        zh_font = FontProperties(size=12)
-        print("警告: 使用系統預設字體，中文可能無法正常顯示")
-
-plt.rcParams['axes.unicode_minus'] = False
+# 5. 設定中文字體（見 cjk_fonts.py）
+cjk_fonts.setup()
+zh_font = cjk_fonts.font_properties(size=12)
 
 # 6. 創建犯罪總數地圖
 fig, ax = plt.subplots(figsize=(12, 10))
@@ -61,13 +50,11 @@ merged.plot(column='暴力犯罪總數', cmap='OrRd', legend=True,
            edgecolor='black', linewidth=0.5, ax=ax,
            legend_kwds={'title': '犯罪案件數', 'loc': 'lower right'})
 
-# 添加縣市標籤
-for idx, row in merged.iterrows():
-    if row['暴力犯罪總數'] > 0:  # 只標記有數據的縣市
-        ax.annotate(text=f"{row['地區']}\n{int(row['暴力犯罪總數'])}件", 
-                   xy=row['geometry'].centroid.coords[0],
-                   ha='center', fontsize=8, fontproperties=zh_font,
-                   bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7))
+# 添加縣市標籤（標籤位置隨邊界檔預先算好，一次配置成不重疊）
+labeled = merged[merged['暴力犯罪總數'] > 0]  # 只標記有數據的縣市
+texts = labeled['地區'] + '\n' + labeled['暴力犯罪總數'].astype(int).astype(str) + '件'
+draw_labels(ax, labeled['label_x'], labeled['label_y'], texts.tolist(),
+            fontsize=8, priority=labeled['暴力犯罪總數'], fontproperties=zh_font)
 
 ax.set_title('台灣各縣市暴力犯罪統計 (2023年)', fontproperties=zh_font, fontsize=16)
 ax.axis('off')
@@ -90,12 +77,10 @@ merged.plot(column='破獲率', cmap='YlGnBu', legend=True,
            legend_kwds={'title': '破獲率(%)', 'loc': 'lower right'})
 
 # 添加縣市標籤
-for idx, row in merged.iterrows():
-    if row['破獲率'] > 0:  # 只標記有數據的縣市
-        ax.annotate(text=f"{row['地區']}\n{row['破獲率']:.1f}%", 
-                   xy=row['geometry'].centroid.coords[0],
-                   ha='center', fontsize=8, fontproperties=zh_font,
-                   bbox=dict(boxstyle="round,pad=0.2", fc="white", ec="none", alpha=0.7))
+labeled = merged[merged['破獲率'] > 0]  # 只標記有數據的縣市
+texts = labeled['地區'] + '\n' + labeled['破獲率'].map('{:.1f}%'.format)
+draw_labels(ax, labeled['label_x'], labeled['label_y'], texts.tolist(),
+            fontsize=8, priority=labeled['暴力犯罪總數'], fontproperties=zh_font)
 
 ax.set_title('台灣各縣市暴力犯罪破獲率 (2023年)', fontproperties=zh_font, fontsize=16)
 ax.axis('off')
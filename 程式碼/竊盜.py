@@ -1,9 +1,10 @@
 import matplotlib.pyplot as plt
-import numpy as np
 
-# 設定中文字體（使用 macOS 內建字體）
-plt.rcParams['font.sans-serif'] = ['Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
+import cjk_fonts
+from chart_spec import Bars, DualAxisChart, Line, render
+
+# 設定中文字體（見 cjk_fonts.py）
+cjk_fonts.setup()
 
 # 數據準備
 years = ['92', '93', '94', '95', '96', '97', '98', '99', '100', '101', 
@@ -21,46 +22,21 @@ data = {
 # 顏色設定
 colors = ['#d62728', '#ff7f0e', '#1f77b4', '#2ca02c']
 
-# 創建圖表
-fig, ax = plt.subplots(figsize=(16, 8))
-
-# 繪製堆疊長條圖
-bottom = np.zeros(len(years))
-for i, category in enumerate(categories):
-    ax.bar(years, data[category], bottom=bottom, label=category, color=colors[i], alpha=0.8)
-    bottom += data[category]
-
-# 添加總案件數標籤（只顯示部分年份避免擁擠）
-total_cases = [sum([data[cat][i] for cat in categories]) for i in range(len(years))]
-for i in range(0, len(years), 2):  # 每隔一年顯示一個標籤
-    ax.text(years[i], total_cases[i] + 5000, f'{total_cases[i]:,}', 
-            ha='center', va='bottom', fontsize=8)
-
-# 添加破獲率折線圖（使用右軸）
-ax2 = ax.twinx()
+# 破獲率（右軸）
 clearance_rates = [53.92, 54.27, 57.27, 58.44, 62.26, 63.92, 65.89, 64.49, 66.44, 
                    70.18, 73.26, 77.59, 83.10, 84.88, 88.46, 90.90, 95.59, 98.87, 
                    99.31, 97.17, 98.34]
-ax2.plot(years, clearance_rates, color='#9467bd', marker='o', linewidth=2, label='總破獲率(%)')
-ax2.set_ylim(50, 110)
-ax2.set_ylabel('破獲率 (%)', fontsize=12)
-
-# 在折線圖上標註破獲率
-for i, rate in enumerate(clearance_rates):
-    if i % 2 == 0:  # 每隔一年顯示一個標籤
-        ax2.text(years[i], rate+1, f'{rate:.1f}%', 
-                ha='center', va='bottom', color='#9467bd', fontsize=8)
-
-# 圖表裝飾
-ax.set_title('民國92-112年竊盜案件類型分布與破獲率趨勢', fontsize=16, pad=20)
-ax.set_xlabel('民國年份', fontsize=12)
-ax.set_ylabel('案件發生數（件）', fontsize=12)
-ax.grid(axis='y', linestyle='--', alpha=0.3)
 
-# 合併圖例
-lines, labels = ax.get_legend_handles_labels()
-lines2, labels2 = ax2.get_legend_handles_labels()
-ax.legend(lines + lines2, labels + labels2, loc='upper right', bbox_to_anchor=(1.15, 1))
+# 堆疊長條圖＋破獲率折線；總案件數與破獲率每隔一年標示一個（雙軸圖規格見 chart_spec.py）
+render(DualAxisChart(
+    x=years, figsize=(16, 8), ylabel='案件發生數（件）', headroom=None,
+    bars=Bars([data[category] for category in categories], label=categories, color=colors,
+              alpha=0.8, annotate='{:,.0f}', every=2),
+    line=Line(clearance_rates, label='總破獲率(%)', color='#9467bd', annotate='{:.1f}%',
+              every=2, ylim=(50, 110)),
+    title='民國92-112年竊盜案件類型分布與破獲率趨勢', title_kwargs={'fontsize': 16, 'pad': 20},
+    legend_loc='upper right', legend_anchor=(1.15, 1),
+    grid={'axis': 'y', 'linestyle': '--', 'alpha': 0.3}))
 
 plt.tight_layout()
 plt.show()
\ No newline at end of file
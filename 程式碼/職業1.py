@@ -1,28 +1,36 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
-
-# 讀取CSV檔案，跳過前3行（標題和空白行）
-df = pd.read_csv("刑事案件嫌疑犯人數－按職業別1.csv", skiprows=3, encoding='utf-8')
-
-# 清理數據：去除空白列和無效行
-df = df.dropna(how='all')
-df = df.iloc[:, :20]  # 只保留前20列（有效數據列）
-
-# 設定列名（從原始CSV中提取）
-columns = ['Year', 'Total', 'Representatives_Managers', 'Professionals', 'Technicians', 
-           'Clerical_Support', 'Service_Workers', 'Sales_Workers', 'Agricultural_Workers', 
-           'Security_Workers', 'Craft_Workers', 'Machine_Operators', 'Elementary_Workers', 
-           'Students', 'Unemployed', 'Others']
-df.columns = columns
-
-# 清理Year列（去除"民國"和西元年份）
-df['Year'] = df['Year'].str.extract(r'(\d+)')[0].astype(int)
-
-# 將所有數值列中的逗號去除並轉換為數值
-numeric_cols = df.columns[1:]
-for col in numeric_cols:
-    df[col] = df[col].str.replace(',', '').astype(float)
+import cjk_fonts
+import gov_tables
+
+# 設定中文字型
+cjk_fonts.setup()
+
+# 讀取職業別嫌疑犯人數（版面定義與數值轉換見 gov_tables.py）
+table = gov_tables.load('刑事案件嫌疑犯人數按職業別1')
+
+# 87、88 年「服務／銷售」、「駕駛／機械設備操作」為合併數字，分別併入服務與機械設備操作
+df = pd.DataFrame({
+    'Year': table['年別'].str.extract(r'(\d+)')[0].astype(int),
+    'Total': table['總計'],
+    'Representatives_Managers': table['民意代表主管及經理人員'],
+    'Professionals': table['專業人員'],
+    'Technicians': table['技術員及助理專業人員'],
+    'Clerical_Support': table['事務支援人員'],
+    'Service_Workers': table[['服務工作人員', '服務及銷售工作人員']].sum(axis=1),
+    'Sales_Workers': table['銷售及展示工作人員'].fillna(0),
+    'Agricultural_Workers': table['農林漁牧業生產人員'],
+    'Security_Workers': table['保安服務工作人員'],
+    'Craft_Workers': table['技藝有關工作人員'],
+    'Machine_Operators': table[['駕駛及移運設備操作人員', '駕駛及機械設備操作人員',
+                                '機械設備操作及組裝人員']].sum(axis=1),
+    'Elementary_Workers': table['基層技術工及勞力工'],
+    'Students': table['學生'],
+    'Unemployed': table['無職'],
+    'Others': table['其他'],
+})
+columns = df.columns.tolist()
 
 # 繪製堆疊柱狀圖
 plt.figure(figsize=(14, 8))
@@ -1,45 +1,16 @@
-import geopandas as gpd
 import matplotlib.pyplot as plt
-from matplotlib.font_manager import FontProperties
 import pandas as pd
+import geo_index
+import boundary_store
+import cjk_fonts
 
-# 使用 Mac 支援的中文字體（可根據實際安裝情況調整）
-# 常見選項："Heiti TC", "PingFang TC", "STHeiti"
-font = FontProperties(fname="C:/Windows/Fonts/msjh.ttc", size=12)
+# 設定中文字體（見 cjk_fonts.py）
+cjk_fonts.setup()
+font = cjk_fonts.font_properties(size=12)
 
-# 下載台灣地圖資料
-geo_url = "https://raw.githubusercontent.com/codeforgermany/click_that_hood/main/public/data/taiwan.geojson"
-gdf = gpd.read_file(geo_url)
+# 載入本地的台灣縣市邊界
+gdf = boundary_store.load_counties(figsize=(10, 12))
 
-# 中文對照表
-county_mapping = {
-    '新北市': 'New Taipei City',
-    '臺北市': 'Taipei City',
-    '台北市': 'Taipei City',
-    '桃園市': 'Taoyuan City',
-    '臺中市': 'Taichung City',
-    '台中市': 'Taichung City',
-    '臺南市': 'Tainan City',
-    '台南市': 'Tainan City',
-    '高雄市': 'Kaohsiung City',
-    '宜蘭縣': 'Yilan County',
-    '新竹縣': 'Hsinchu County',
-    '苗栗縣': 'Miaoli County',
-    '彰化縣': 'Changhua County',
-    '南投縣': 'Nantou County',
-    '雲林縣': 'Yunlin County',
-    '嘉義縣': 'Chiayi County',
-    '屏東縣': 'Pingtung County',
-    '臺東縣': 'Taitung County',
-    '台東縣': 'Taitung County',
-    '花蓮縣': 'Hualien County',
-    '澎湖縣': 'Penghu County',
-    '基隆市': 'Keelung City',
-    '新竹市': 'Hsinchu City',
-    '嘉義市': 'Chiayi City',
-    '金門縣': 'Kinmen County',
-    '連江縣': 'Lienchiang County'
-}
 
 # 數據
 data = {
@@ -67,22 +38,19 @@ data = {
     '連江縣': 80
 }
 
-# 對應英文名與數值
-eng_data = {county_mapping[k]: v for k, v in data.items() if k in county_mapping}
+# 以縣市代碼對應數值
+code_data = {geo_index.county_code(k): v for k, v in data.items()}
 
-# 建立 DataFrame，並取得中心點
-gdf["count"] = gdf["name"].map(eng_data)
-gdf["centroid"] = gdf["geometry"].centroid
-gdf["x"] = gdf["centroid"].x
-gdf["y"] = gdf["centroid"].y
+# 邊界資料已含縣市代碼與標籤位置（保證落在縣市內），直接對應數值
+gdf["count"] = gdf["county_code"].map(code_data)
 
 # 繪圖
 fig, ax = plt.subplots(figsize=(10, 12))
 gdf.plot(ax=ax, color="lightgray", edgecolor="black")
 
 # 畫出氣泡（大小根據數值）
-for _, row in gdf.dropna(subset=["count"]).iterrows():
-    ax.scatter(row["x"], row["y"], s=row["count"] / 2, color="red", alpha=0.6, edgecolors='black', linewidth=0.5)
+bubbles = gdf.dropna(subset=["count"])
+ax.scatter(bubbles["label_x"], bubbles["label_y"], s=bubbles["count"] / 2, color="red", alpha=0.6, edgecolors='black', linewidth=0.5)
 
 # 標題與格式
 ax.set_title("台灣各縣市警備人數", fontproperties=font, fontsize=16)